@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the cost of reading and changing common stanza interfaces
+of messages, presences, and iqs.
+
+The way each interface is accessed is found once for each stanza
+class. The uncached figures discard the accessor tables before every
+access, so that methods, plugins, and interface sets are searched
+again each time, as was done before the tables were added.
+"""
+
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sleekxmpp.stanza import Message, Presence, Iq
+from sleekxmpp.xmlstream import ET, stanzabase
+
+
+STANZAS = {
+    'message': (Message, "<message xmlns='jabber:client' id='1' "
+                         "to='user@example.com' from='tester@example.com/a' "
+                         "type='chat'><body>Hi</body></message>",
+                ('to', 'from', 'type', 'id', 'body')),
+    'presence': (Presence, "<presence xmlns='jabber:client' "
+                           "from='user@example.com/a'><show>away</show>"
+                           "<priority>5</priority></presence>",
+                 ('to', 'from', 'type', 'show', 'priority')),
+    'iq': (Iq, "<iq xmlns='jabber:client' type='get' id='2' "
+               "from='user@example.com/a' to='example.com' />",
+           ('to', 'from', 'type', 'id', 'query'))}
+
+
+def run(name, rounds, cached):
+    cls, xml, keys = STANZAS[name]
+    stanza = cls(xml=ET.fromstring(xml))
+    tables = stanzabase._accessor_tables
+
+    def get():
+        for key in keys:
+            if not cached:
+                tables.clear()
+            stanza[key]
+
+    def change():
+        for key in keys[:4]:
+            if not cached:
+                tables.clear()
+            stanza[key] = stanza.xml.get(key, 'example.com')
+
+    per_access = 1000000.0 / rounds
+    return (min(timeit.repeat(get, number=rounds, repeat=3)) * \
+                per_access / len(keys),
+            min(timeit.repeat(change, number=rounds, repeat=3)) * \
+                per_access / 4)
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--rounds', type='int', dest='rounds',
+                    default=20000,
+                    help='number of times each interface is accessed')
+    opts, args = optp.parse_args()
+
+    print('%10s %14s %14s %16s %16s' % ('stanza', 'get (us)', 'set (us)',
+                                        'uncached get', 'uncached set'))
+    for name in ('message', 'presence', 'iq'):
+        get, change = run(name, opts.rounds, True)
+        slow_get, slow_change = run(name, opts.rounds, False)
+        print('%10s %14.2f %14.2f %16.2f %16.2f' % (name, get, change,
+                                                    slow_get, slow_change))
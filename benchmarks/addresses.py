@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the cost of reading the addresses of incoming stanzas, as
+done by several handlers for each stanza.
+
+Each message is from a different sender, as seen by a component
+serving many users. The ``to`` and ``from`` interfaces of each
+stanza are read a number of times, with and without the stream's
+``trusted_peer`` mode.
+"""
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+from sleekxmpp.xmlstream import ET
+
+
+MESSAGE = ("<message xmlns='jabber:component:accept' "
+           "to='bot@gateway.example.com' "
+           "from='user%d@example.com/Phone %d' type='chat'>"
+           "<body>Hello</body></message>")
+
+
+def run(count, accesses, trusted):
+    xmpp = sleekxmpp.ComponentXMPP('gateway.example.com', 'secret',
+                                   'localhost', 5347)
+    xmpp.trusted_peer = trusted
+    stanzas = [xmpp._build_stanza(ET.fromstring(MESSAGE % (i, i)))
+               for i in range(count)]
+
+    start = time.time()
+    for stanza in stanzas:
+        for i in range(accesses):
+            stanza['from'].bare
+            stanza['to'].full
+    elapsed = time.time() - start
+    return elapsed * 1000000.0 / (count * accesses * 2), count / elapsed
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--stanzas', type='int', dest='stanzas',
+                    default=20000,
+                    help='number of stanzas')
+    optp.add_option('-a', '--accesses', type='int', dest='accesses',
+                    default=5,
+                    help='number of times each address is read')
+    opts, args = optp.parse_args()
+
+    print('%10s %16s %12s' % ('mode', 'us per access', 'stanzas/s'))
+    for name, trusted in (('validate', False), ('trusted', True)):
+        cost, rate = run(opts.stanzas, opts.accesses, trusted)
+        print('%10s %16.2f %12.0f' % (name, cost, rate))
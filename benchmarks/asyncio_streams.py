@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Compare memory use and throughput of many component streams using
+dedicated threads against streams sharing one asyncio event loop.
+
+A loopback server (run in its own process) accepts any component
+handshake and then echoes everything it receives. For each mode and
+number of streams, a fresh client process connects every stream,
+records its resident memory and thread count once all sessions have
+started, and then measures how long it takes for every stream to send
+a number of messages and receive their echoes.
+
+Requires Python 3.7 or later and Linux for memory figures.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import subprocess
+from optparse import OptionParser, SUPPRESS_HELP
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sleekxmpp import ComponentXMPP
+
+
+HEADER = ("<stream:stream xmlns='jabber:component:accept' "
+          "xmlns:stream='http://etherx.jabber.org/streams' "
+          "id='bench' from='localhost'>").encode('utf-8')
+
+
+class EchoServer(asyncio.Protocol):
+
+    """Accept any component handshake, then echo all received data."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.data = b''
+        self.accepted = False
+
+    def data_received(self, data):
+        if self.accepted:
+            self.transport.write(data)
+            return
+        if not self.data:
+            self.transport.write(HEADER)
+        self.data += data
+        if b'</handshake>' in self.data:
+            self.accepted = True
+            self.transport.write(b'<handshake />')
+
+
+def serve():
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+            loop.create_server(EchoServer, '127.0.0.1', 0, backlog=4096))
+    print(server.sockets[0].getsockname()[1])
+    sys.stdout.flush()
+    loop.run_forever()
+
+
+def rss():
+    """Return the resident memory of this process in kilobytes."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return 0
+
+
+class Counter(object):
+
+    def __init__(self, target):
+        self.target = target
+        self.count = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def __call__(self, event=None):
+        with self.lock:
+            self.count += 1
+            if self.count == self.target:
+                self.done.set()
+
+
+def client(mode, count, port, messages):
+    base = rss()
+    if mode == 'asyncio':
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.daemon = True
+        thread.start()
+
+    sessions = Counter(count)
+    echoes = Counter(count * messages)
+    streams = []
+
+    start = time.time()
+    for i in range(count):
+        xmpp = ComponentXMPP('bench%s.localhost' % i, 'secret',
+                             '127.0.0.1', port)
+        xmpp.auto_reconnect = False
+        xmpp.add_event_handler('session_start', sessions)
+        xmpp.add_event_handler('message', echoes)
+        if mode == 'asyncio':
+            xmpp.use_asyncio(loop)
+        else:
+            xmpp._use_daemons = True
+        xmpp.connect(reattempt=False)
+        xmpp.process()
+        streams.append(xmpp)
+    if not sessions.done.wait(300):
+        raise Exception('Only %s sessions started' % sessions.count)
+    connected = time.time() - start
+    memory = rss() - base
+    threads = threading.active_count()
+
+    start = time.time()
+    for xmpp in streams:
+        for _ in range(messages):
+            xmpp.send_message(mto='echo@localhost', mbody='Testing')
+    if not echoes.done.wait(600):
+        raise Exception('Only %s echoes received' % echoes.count)
+    elapsed = time.time() - start
+
+    print('%s %s %s %s' % (connected, memory, threads,
+                           count * messages / elapsed))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-s', '--streams', dest='streams', default='1,100,1000',
+                    help='comma separated numbers of streams to test')
+    optp.add_option('-m', '--messages', type='int', dest='messages',
+                    default=100,
+                    help='number of messages echoed per stream')
+    optp.add_option('--serve', action='store_true', help=SUPPRESS_HELP)
+    optp.add_option('--client', dest='client', help=SUPPRESS_HELP)
+    optp.add_option('--port', type='int', dest='port',
+                    help=SUPPRESS_HELP)
+    opts, args = optp.parse_args()
+
+    if opts.serve:
+        serve()
+    elif opts.client:
+        client(opts.client, int(args[0]), opts.port, opts.messages)
+    else:
+        server = subprocess.Popen([sys.executable, __file__, '--serve'],
+                                  stdout=subprocess.PIPE)
+        port = int(server.stdout.readline())
+        print('%8s %8s %12s %12s %9s %12s' % (
+            'mode', 'streams', 'connect (s)', 'memory (KB)',
+            'threads', 'messages/s'))
+        try:
+            for count in [int(n) for n in opts.streams.split(',')]:
+                for mode in ('threaded', 'asyncio'):
+                    result = subprocess.run(
+                            [sys.executable, __file__, '--client', mode,
+                             '--port', str(port),
+                             '--messages', str(opts.messages), str(count)],
+                            stdout=subprocess.PIPE,
+                            universal_newlines=True)
+                    if result.returncode != 0 or not result.stdout:
+                        print('%8s %8d %12s' % (mode, count, 'failed'))
+                        continue
+                    connected, memory, threads, rate = \
+                            result.stdout.split()
+                    print('%8s %8d %12.2f %12d %9s %12.0f' % (
+                        mode, count, float(connected), int(memory),
+                        threads, float(rate)))
+        finally:
+            server.kill()
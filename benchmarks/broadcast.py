@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the cost of queueing the same message for many recipients.
+
+Messages are sent either with ``send_message()``, which builds and
+serializes a stanza object for each recipient, or with ``broadcast()``
+using a template serialized once, with and without outgoing filters.
+The stream is not connected, so the figures only include the work
+done before data reaches the send queue.
+"""
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+
+
+BODY = 'The service will be down for maintenance at 02:00 UTC.'
+
+
+def drain(xmpp):
+    """Empty the send queue, returning the number of bytes queued."""
+    size = 0
+    while not xmpp.send_queue.empty():
+        size += len(xmpp.send_queue.get(False))
+        xmpp.send_queue.task_done()
+    return size
+
+
+def run(mode, jids):
+    xmpp = sleekxmpp.ClientXMPP('notifier@example.com/bench', 'test')
+    xmpp.add_filter('out', lambda stanza: stanza)
+
+    start = time.time()
+    if mode == 'send_message':
+        for jid in jids:
+            xmpp.send_message(jid, BODY, mtype='headline')
+    else:
+        msg = xmpp.make_message(jids[0], BODY, mtype='headline')
+        template = xmpp.make_template(msg)
+        xmpp.broadcast(template, jids, use_filters=(mode == 'filtered'))
+    elapsed = time.time() - start
+    return elapsed, drain(xmpp)
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--recipients', type='int', dest='recipients',
+                    default=20000,
+                    help='number of recipients')
+    opts, args = optp.parse_args()
+
+    jids = ['user%d@example.com' % i for i in range(opts.recipients)]
+
+    print('%14s %12s %14s %12s' % ('mode', 'time (s)', 'stanzas/s',
+                                   'bytes'))
+    for mode in ('send_message', 'filtered', 'broadcast'):
+        elapsed, size = run(mode, jids)
+        print('%14s %12.3f %14.0f %12d' % (mode, elapsed,
+                                           len(jids) / elapsed, size))
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure how quickly a gateway component forwards messages.
+
+A loopback server (run in its own process) accepts any component
+handshake, sends a number of messages addressed to users of the
+gateway's domain, and counts the messages forwarded back by the
+component. Once every message has been forwarded, the server sends a
+final message to the component itself, which stops the clock.
+
+Messages are forwarded either by a stream handler, which receives a
+stanza object and sends it again, or by a raw route registered with
+``register_route()``, which receives the parsed XML and sends it on
+with ``forward()``.
+
+Requires Python 3.7 or later.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import subprocess
+from optparse import OptionParser, SUPPRESS_HELP
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sleekxmpp import ComponentXMPP
+from sleekxmpp.xmlstream.handler import Callback
+from sleekxmpp.xmlstream.matcher import StanzaPath
+
+
+HEADER = ("<stream:stream xmlns='jabber:component:accept' "
+          "xmlns:stream='http://etherx.jabber.org/streams' "
+          "id='bench' from='localhost'>").encode('utf-8')
+
+MESSAGE = ("<message to='user%s@gateway.localhost/r' "
+           "from='contact@remote.localhost/x' type='chat' id='m%s'>"
+           "<body>The quick brown fox jumps over the lazy dog.</body>"
+           "<active xmlns='http://jabber.org/protocol/chatstates' />"
+           "</message>")
+
+DONE = b"<message to='bench.localhost' from='localhost' />"
+
+
+class GatewayServer(asyncio.Protocol):
+
+    """Send messages for the component to forward, and count them."""
+
+    messages = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.data = b''
+        self.state = 'handshake'
+        self.forwarded = 0
+
+    def data_received(self, data):
+        if self.state == 'forwarding':
+            data = self.data + data
+            self.forwarded += data.count(b'</message>')
+            self.data = data[-9:]
+            if self.forwarded >= self.messages:
+                self.state = 'done'
+                self.transport.write(DONE)
+        elif self.state == 'done':
+            if b'</stream:stream>' in data:
+                self.transport.write(b'</stream:stream>')
+                self.transport.close()
+        elif self.state == 'handshake':
+            if not self.data:
+                self.transport.write(HEADER)
+            self.data += data
+            if b'</handshake>' in self.data:
+                self.state = 'forwarding'
+                self.data = b''
+                self.transport.write(b'<handshake />')
+                for i in range(self.messages):
+                    self.transport.write(
+                            (MESSAGE % (i % 100, i)).encode('utf-8'))
+
+
+def serve(messages):
+    GatewayServer.messages = messages
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+            loop.create_server(GatewayServer, '127.0.0.1', 0))
+    print(server.sockets[0].getsockname()[1])
+    sys.stdout.flush()
+    loop.run_forever()
+
+
+def run(mode, port):
+    xmpp = ComponentXMPP('bench.localhost', 'secret', '127.0.0.1', port)
+    xmpp.auto_reconnect = False
+    started = []
+    done = threading.Event()
+
+    def session_start(event):
+        started.append(time.time())
+
+    def handle_done(msg):
+        done.set()
+
+    def forward_stanza(msg):
+        msg['to'] = 'user@remote.localhost'
+        msg['from'] = 'contact@gateway.localhost'
+        msg.send()
+
+    def forward_raw(envelope):
+        xmpp.forward(envelope, sto='user@remote.localhost',
+                               sfrom='contact@gateway.localhost')
+
+    xmpp.add_event_handler('session_start', session_start)
+    xmpp.register_handler(Callback('Done',
+                                   StanzaPath('message@to=bench.localhost'),
+                                   handle_done))
+    if mode == 'route':
+        xmpp.register_route('gateway.localhost', forward_raw)
+    else:
+        xmpp.register_handler(
+                Callback('Forward',
+                         StanzaPath('message@type=chat'),
+                         forward_stanza))
+
+    xmpp.connect(reattempt=False)
+    xmpp.process()
+    if not done.wait(600):
+        raise Exception('Messages were not forwarded')
+    elapsed = time.time() - started[0]
+    xmpp.disconnect()
+    return elapsed
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-m', '--messages', type='int', dest='messages',
+                    default=20000,
+                    help='number of messages forwarded')
+    optp.add_option('--serve', action='store_true', help=SUPPRESS_HELP)
+    opts, args = optp.parse_args()
+
+    if opts.serve:
+        serve(opts.messages)
+    else:
+        print('%8s %12s %12s' % ('mode', 'time (s)', 'messages/s'))
+        for mode in ('handler', 'route'):
+            server = subprocess.Popen([sys.executable, __file__, '--serve',
+                                       '--messages', str(opts.messages)],
+                                      stdout=subprocess.PIPE)
+            try:
+                port = int(server.stdout.readline())
+                elapsed = run(mode, port)
+            finally:
+                server.kill()
+            print('%8s %12.2f %12.0f' % (mode, elapsed,
+                                         opts.messages / elapsed))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the cost of dispatching an inbound stanza to stream handlers
+as the number of Iq requests awaiting a reply grows.
+
+Each pending request registers an ``IqCallback_<id>`` handler, just as
+``Iq.send(callback=...)`` does. The indexed dispatch time is compared
+against a linear scan that checks every registered handler.
+"""
+
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+from sleekxmpp.xmlstream import ET
+from sleekxmpp.xmlstream.handler import Callback
+from sleekxmpp.xmlstream.matcher import MatcherId
+
+
+class NullQueue(object):
+
+    """Discard queued events so only dispatch is measured."""
+
+    def put(self, item):
+        pass
+
+
+def build_stream(pending):
+    xmpp = sleekxmpp.ClientXMPP('tester@localhost/bench', 'test')
+    xmpp.register_plugin('xep_0030')
+    xmpp.register_plugin('xep_0060')
+    xmpp.register_plugin('xep_0199')
+    xmpp.event_queue = NullQueue()
+    for i in range(pending):
+        xmpp.register_handler(
+                Callback('IqCallback_pending-%s' % i,
+                         MatcherId('pending-%s' % i),
+                         lambda iq: None,
+                         once=True))
+    return xmpp
+
+
+def make_stanzas():
+    return [ET.fromstring(xml) for xml in (
+        "<message xmlns='jabber:client' from='user@example.com/a' "
+        "type='chat'><body>Hi</body></message>",
+        "<presence xmlns='jabber:client' from='user@example.com/a' />",
+        "<iq xmlns='jabber:client' type='result' id='unrelated' "
+        "from='example.com' />")]
+
+
+def run(pending, rounds):
+    xmpp = build_stream(pending)
+    stanzas = make_stanzas()
+    spawn = xmpp._XMLStream__spawn_event
+    index = xmpp._XMLStream__handlers
+
+    def indexed():
+        for xml in stanzas:
+            spawn(xml)
+
+    built = [xmpp._build_stanza(xml) for xml in stanzas]
+    handlers = list(index)
+
+    def linear():
+        for stanza in built:
+            [h for h in handlers if h.match(stanza)]
+
+    def candidates():
+        for stanza in built:
+            [h for h in index.candidates(stanza) if h.match(stanza)]
+
+    per_stanza = 1000000.0 / (rounds * len(stanzas))
+    return (min(timeit.repeat(indexed, number=rounds, repeat=3)) * per_stanza,
+            min(timeit.repeat(candidates, number=rounds, repeat=3)) * per_stanza,
+            min(timeit.repeat(linear, number=rounds, repeat=3)) * per_stanza)
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--rounds', type='int', dest='rounds', default=200,
+                    help='number of times each stanza is dispatched')
+    opts, args = optp.parse_args()
+
+    print('%10s %16s %16s %16s' % ('pending', 'spawn (us)',
+                                   'matching (us)', 'linear (us)'))
+    for pending in (0, 100, 1000, 10000, 50000):
+        spawn, matching, linear = run(pending, opts.rounds)
+        print('%10d %16.1f %16.1f %16.1f' % (pending, spawn, matching, linear))
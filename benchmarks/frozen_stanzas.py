@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the time taken and the number of stanza copies made while
+dispatching a trace of presence stanzas to several handlers, with and
+without frozen stanzas.
+
+With frozen stanzas, all handlers share the stanza built for the
+incoming XML instead of each receiving a deep copy.
+"""
+
+import copy
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+from sleekxmpp.xmlstream import ET
+from sleekxmpp.xmlstream.xmlbackend import XML_TYPE
+
+
+PRESENCE = ("<presence xmlns='jabber:client' from='user%s@localhost/%s' "
+            "to='tester@localhost/bench'><show>%s</show>"
+            "<status>Working on something</status><priority>5</priority>"
+            "<c xmlns='http://jabber.org/protocol/caps' hash='sha-1' "
+            "node='http://sleekxmpp.com/ver/1.1' "
+            "ver='QgayPKawpkPSDYmwT/WM94uAlu0=' /></presence>")
+
+
+class CountCopies(object):
+
+    """Count the deep copies of stanza XML made while active."""
+
+    def __enter__(self):
+        self.copies = 0
+        self.deepcopy = copy.deepcopy
+
+        def counted_deepcopy(obj, *args):
+            if isinstance(obj, XML_TYPE):
+                self.copies += 1
+            return self.deepcopy(obj, *args)
+
+        copy.deepcopy = counted_deepcopy
+        return self
+
+    def __exit__(self, *args):
+        copy.deepcopy = self.deepcopy
+
+
+class InlineQueue(object):
+
+    """Run queued events immediately in the dispatching thread."""
+
+    def __init__(self, xmpp):
+        self.xmpp = xmpp
+
+    def put(self, item, block=True, timeout=None):
+        self.xmpp._run_event(item)
+
+
+def run(trace, frozen, handlers):
+    xmpp = sleekxmpp.ClientXMPP('tester@localhost/bench', 'test')
+    xmpp.event_queue = InlineQueue(xmpp)
+    xmpp.frozen_stanzas = frozen
+    for i in range(handlers):
+        xmpp.add_event_handler('presence_available',
+                               lambda pres: pres['status'])
+        xmpp.add_event_handler('changed_status',
+                               lambda pres: pres['show'])
+    spawn = xmpp._XMLStream__spawn_event
+
+    start = time.time()
+    for xml in trace:
+        spawn(xml)
+    elapsed = time.time() - start
+
+    with CountCopies() as counter:
+        for xml in trace:
+            spawn(xml)
+    return len(trace) / elapsed, counter.copies / float(len(trace))
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--stanzas', type='int', dest='stanzas',
+                    default=5000, help='number of presence stanzas')
+    optp.add_option('-H', '--handlers', type='int', dest='handlers',
+                    default=3, help='number of handlers for each event')
+    opts, args = optp.parse_args()
+
+    shows = ('away', 'chat', 'dnd', 'xa')
+    trace = [ET.fromstring(PRESENCE % (i % 500, i % 3, shows[i % 4]))
+             for i in range(opts.stanzas)]
+
+    print('%8s %14s %14s' % ('frozen', 'stanzas/s', 'copies/stanza'))
+    for frozen in (False, True):
+        rate, copies = run(trace, frozen, opts.handlers)
+        print('%8s %14.0f %14.1f' % (frozen, rate, copies))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Compare the cost of keeping many Iq requests in flight using callbacks
+with timeouts (a stream handler and a scheduled task per request)
+against using futures (one entry in the pending request table).
+
+Requests are sent into a discarding send queue and replies are fed
+directly to the stream's dispatcher. Callback handlers are run as soon
+as they are queued, as the event runner thread would do.
+"""
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+from sleekxmpp.xmlstream import ET
+
+
+class NullQueue(object):
+
+    """Discard queued data."""
+
+    def put(self, item, lane=None):
+        pass
+
+
+class InlineQueue(object):
+
+    """Run queued stream handlers immediately."""
+
+    def put(self, item):
+        if item[0] == 'stanza':
+            item[1].run(item[2])
+
+
+def build_stream():
+    xmpp = sleekxmpp.ClientXMPP('tester@localhost/bench', 'test')
+    xmpp.send_queue = NullQueue()
+    xmpp.event_queue = InlineQueue()
+    return xmpp
+
+
+def run(mode, requests):
+    xmpp = build_stream()
+    spawn = xmpp._XMLStream__spawn_event
+    replies = [ET.fromstring("<iq xmlns='jabber:client' type='result' "
+                             "id='req-%s' />" % i) for i in range(requests)]
+
+    start = time.time()
+    for i in range(requests):
+        iq = xmpp.Iq(stype='get', sid='req-%s' % i)
+        if mode == 'future':
+            iq.send(future=True)
+        else:
+            iq.send(callback=lambda r: None,
+                    timeout_callback=lambda r: None)
+    sent = time.time() - start
+
+    start = time.time()
+    for xml in replies:
+        spawn(xml)
+    received = time.time() - start
+
+    return sent, received
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    opts, args = optp.parse_args()
+
+    print('%10s %10s %14s %14s' % ('mode', 'in flight',
+                                   'send (us/iq)', 'reply (us/iq)'))
+    for requests in (1000, 10000, 50000):
+        for mode in ('callback', 'future'):
+            sent, received = run(mode, requests)
+            print('%10s %10d %14.1f %14.1f' % (
+                mode, requests,
+                sent * 1000000.0 / requests,
+                received * 1000000.0 / requests))
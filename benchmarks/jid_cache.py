@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the JID cache's hit rate and the cost of creating JIDs for
+a component that sees many distinct addresses.
+
+Most stanzas are addressed to a small set of busy JIDs, while the
+rest come from a large number of JIDs seen only now and then. The
+first-in, first-out figures do not move found entries to the end of
+the eviction order, as was done before the cache used LRU eviction.
+"""
+
+import os
+import sys
+import time
+import random
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sleekxmpp import jid
+from sleekxmpp.jid import JID, JIDCache
+
+
+class FIFOCache(JIDCache):
+
+    """A JID cache that evicts entries in the order they were added."""
+
+    def get(self, key):
+        with self._lock:
+            parts = self._pinned.get(key, self._entries.get(key))
+            if parts is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return parts
+
+
+def workload(count, busy, distinct):
+    rand = random.Random(0)
+    addresses = []
+    for i in range(count):
+        if rand.random() < 0.8:
+            addresses.append('user%d@example.com/phone' % rand.randrange(busy))
+        else:
+            addresses.append('contact%d@remote.example/x' %
+                             rand.randrange(distinct))
+    return addresses
+
+
+def run(cache, addresses):
+    jid.JID_CACHE = cache
+    start = time.time()
+    for address in addresses:
+        JID(address)
+    elapsed = time.time() - start
+    return elapsed, cache.stats()
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--stanzas', type='int', dest='stanzas',
+                    default=200000,
+                    help='number of addresses parsed')
+    optp.add_option('-d', '--distinct', type='int', dest='distinct',
+                    default=100000,
+                    help='number of rarely seen JIDs')
+    optp.add_option('-b', '--busy', type='int', dest='busy', default=800,
+                    help='number of busy JIDs')
+    opts, args = optp.parse_args()
+
+    addresses = workload(opts.stanzas, opts.busy, opts.distinct)
+    original = jid.JID_CACHE
+
+    print('%6s %8s %10s %12s %12s' % ('cache', 'size', 'hit rate',
+                                      'evictions', 'us per JID'))
+    try:
+        for size in (1024, 4096):
+            for name, cls in (('fifo', FIFOCache), ('lru', JIDCache)):
+                elapsed, stats = run(cls(size), addresses)
+                print('%6s %8d %9.1f%% %12d %12.2f' % (
+                    name, size,
+                    100.0 * stats['hits'] / len(addresses),
+                    stats['evictions'],
+                    elapsed * 1000000.0 / len(addresses)))
+    finally:
+        jid.JID_CACHE = original
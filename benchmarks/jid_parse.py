@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the cost of parsing and validating JIDs.
+
+Each corpus holds distinct JIDs of one kind: plain ASCII addresses,
+internationalized local parts and domains, and resources containing
+spaces. The JID cache is disabled, so every JID is parsed. The first
+pass starts with empty stringprep caches, while the second pass may
+reuse the validated local parts, domains, and resources of the first.
+"""
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sleekxmpp import jid
+from sleekxmpp.jid import JID
+
+
+DOMAINS = ['example.com', 'chat.example.org', 'Jabber.Example.NET',
+           'im.example.co.uk']
+
+IDN_DOMAINS = ['bücher.example', '例え.テスト', 'παράδειγμα.δοκιμή',
+               'xn--bcher-kva.example']
+
+
+def corpus(kind, count):
+    jids = []
+    for i in range(count):
+        if kind == 'ascii':
+            jids.append('User.%d@%s/phone-%d' % (i, DOMAINS[i % 4], i % 7))
+        elif kind == 'idn':
+            jids.append('Müller.%d@%s/телефон' % (i, IDN_DOMAINS[i % 4]))
+        else:
+            jids.append('room%d@conference.example.com/Alice Smith %d' %
+                        (i % 50, i))
+    return jids
+
+
+def clear_caches():
+    for profile in (jid.nodeprep, jid.resourceprep):
+        getattr(profile, 'cache', {}).clear()
+    getattr(jid, '_domains', {}).clear()
+
+
+def run(jids):
+    results = []
+    clear_caches()
+    for i in range(2):
+        start = time.time()
+        for value in jids:
+            JID(value)
+        results.append((time.time() - start) * 1000000.0 / len(jids))
+    return results
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--jids', type='int', dest='jids', default=20000,
+                    help='number of JIDs in each corpus')
+    opts, args = optp.parse_args()
+
+    size = jid.JID_CACHE.size
+    jid.JID_CACHE.size = 0
+    try:
+        print('%10s %16s %16s' % ('corpus', 'first (us)', 'repeat (us)'))
+        for kind in ('ascii', 'idn', 'spaces'):
+            first, repeat = run(corpus(kind, opts.jids))
+            print('%10s %16.2f %16.2f' % (kind, first, repeat))
+    finally:
+        jid.JID_CACHE.size = size
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the time and memory used to build and match large pubsub
+event and MAM result messages.
+
+Stanza plugins are created when they are first used, so building a
+stanza and matching it against a handler only creates the plugins
+along the matched path. The eager figures create every plugin, as
+was done when the stanza was built before plugins became lazy.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+from sleekxmpp.stanza import Message
+from sleekxmpp.xmlstream import ET
+
+
+PUBSUB = ("<message xmlns='jabber:client' from='pubsub.localhost' "
+          "to='user@localhost'>"
+          "<event xmlns='http://jabber.org/protocol/pubsub#event'>"
+          "<items node='princely_musings'>%s</items></event></message>")
+
+PUBSUB_ITEM = ("<item id='item-%s'>"
+               "<entry xmlns='http://www.w3.org/2005/Atom'>"
+               "<title>Soliloquy</title><summary>To be, or not to be"
+               "</summary></entry></item>")
+
+MAM = ("<message xmlns='jabber:client' to='user@localhost/r'>"
+       "<result xmlns='urn:xmpp:mam:tmp' queryid='q1' id='r%s'>"
+       "<forwarded xmlns='urn:xmpp:forward:0'>"
+       "<delay xmlns='urn:xmpp:delay' stamp='2010-07-10T23:08:25Z' />"
+       "<message xmlns='jabber:client' from='witch@localhost' "
+       "to='macbeth@localhost' type='chat'>"
+       "<body>Hail to thee</body></message></forwarded></result></message>")
+
+
+def load_all(stanza):
+    """Create every plugin of a stanza and its substanzas."""
+    for plugin in list(stanza.plugins.values()):
+        load_all(plugin)
+    for substanza in stanza.iterables:
+        load_all(substanza)
+
+
+def measure(name, xml, path, count, eager):
+    tracemalloc.start()
+    start = time.time()
+    stanzas = []
+    for i in range(count):
+        msg = Message(xml=xml)
+        if eager:
+            load_all(msg)
+        msg.match(path)
+        stanzas.append(msg)
+    elapsed = time.time() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('%8s %6s %14.0f %14.1f' % (name, 'eager' if eager else 'lazy',
+                                     count / elapsed,
+                                     memory / 1024.0 / count))
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--stanzas', type='int', dest='stanzas',
+                    default=2000, help='number of stanzas to build')
+    optp.add_option('-i', '--items', type='int', dest='items',
+                    default=50, help='number of items in each pubsub event')
+    opts, args = optp.parse_args()
+
+    xmpp = sleekxmpp.ClientXMPP('tester@localhost/bench', 'test')
+    xmpp.register_plugin('xep_0060')
+    xmpp.register_plugin('xep_0313')
+
+    pubsub = ET.fromstring(PUBSUB % ''.join(PUBSUB_ITEM % i
+                                            for i in range(opts.items)))
+    mam = ET.fromstring(MAM % 1)
+
+    print('%8s %6s %14s %14s' % ('stanza', 'mode', 'stanzas/s', 'KiB/stanza'))
+    for eager in (True, False):
+        measure('pubsub', pubsub, 'message/pubsub_event/items',
+                opts.stanzas, eager)
+    for eager in (True, False):
+        measure('mam', mam, 'message/mam_result', opts.stanzas * 10, eager)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the time taken to log in over a high latency link, from
+connecting until the end of each phase of logging in. The total
+is the time from calling ``connect()`` until the roster has been
+received.
+
+A scripted server on the loopback interface answers each request
+after a simulated round trip time. It offers SASL PLAIN, then
+resource binding and an optional session. Without fast login, the
+client requests the session, and its ``session_start`` handler then
+requests the roster and sends presence, as most applications do.
+"""
+
+import os
+import re
+import sys
+import time
+import socket
+import threading
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+
+
+HEADER = ("<?xml version='1.0'?><stream:stream "
+          "xmlns='jabber:client' "
+          "xmlns:stream='http://etherx.jabber.org/streams' "
+          "from='example.com' id='%d' version='1.0'>")
+
+AUTH_FEATURES = ("<stream:features>"
+                 "<mechanisms xmlns='urn:ietf:params:xml:ns:xmpp-sasl'>"
+                 "<mechanism>PLAIN</mechanism></mechanisms>"
+                 "</stream:features>")
+
+SESSION_FEATURES = ("<stream:features>"
+                    "<bind xmlns='urn:ietf:params:xml:ns:xmpp-bind'/>"
+                    "<session xmlns='urn:ietf:params:xml:ns:xmpp-session'>"
+                    "<optional/></session>"
+                    "</stream:features>")
+
+ELEMENTS = re.compile(r"<\?xml[^>]*\?>|<stream:stream[^>]*>|"
+                      r"</stream:stream>|"
+                      r"<(auth|iq|presence)\b[^>]*?/>|"
+                      r"<(auth|iq|presence)\b[\s\S]*?</\2>")
+
+ROSTER = ("<query xmlns='jabber:iq:roster'>%s</query>" %
+          ''.join("<item jid='contact%d@example.com' subscription='both'/>" % i
+                  for i in range(50)))
+
+
+class Server(threading.Thread):
+
+    """A server following the script of a client login."""
+
+    def __init__(self, rtt):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.rtt = rtt
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.requests = 0
+
+    def run(self):
+        conn, addr = self.listener.accept()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        buf = ''
+        streams = 0
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                break
+            # Data sent by the client reaches the server half a round
+            # trip later, and the response takes as long to return.
+            time.sleep(self.rtt)
+            self.requests += 1
+            buf += data.decode('utf-8')
+            replies = []
+            while True:
+                match = ELEMENTS.search(buf)
+                if match is None:
+                    break
+                xml = match.group(0)
+                buf = buf[match.end():]
+                if xml.startswith('<stream:stream'):
+                    streams += 1
+                    replies.append(HEADER % streams)
+                    replies.append(AUTH_FEATURES if streams == 1
+                                   else SESSION_FEATURES)
+                elif xml.startswith('<auth'):
+                    replies.append("<success xmlns="
+                                   "'urn:ietf:params:xml:ns:xmpp-sasl'/>")
+                elif xml.startswith('<iq'):
+                    sid = re.search(r"id=['\"]([^'\"]*)", xml).group(1)
+                    if 'xmpp-bind' in xml:
+                        payload = ("<bind xmlns='urn:ietf:params:xml:ns:"
+                                   "xmpp-bind'><jid>user@example.com/bench"
+                                   "</jid></bind>")
+                    elif 'jabber:iq:roster' in xml:
+                        payload = ROSTER
+                    else:
+                        payload = ''
+                    replies.append("<iq type='result' id='%s'>%s</iq>" %
+                                   (sid, payload))
+                elif xml == '</stream:stream>':
+                    replies.append(xml)
+            if replies:
+                conn.sendall(''.join(replies).encode('utf-8'))
+        conn.close()
+        self.listener.close()
+
+
+def run(rtt, fast):
+    server = Server(rtt)
+    server.start()
+
+    xmpp = sleekxmpp.ClientXMPP('user@example.com/bench', 'secret',
+            plugin_config={'feature_mechanisms': {'unencrypted_plain': True}})
+    xmpp.fast_login = fast
+    done = threading.Event()
+    received = []
+
+    def session_start(event):
+        if not fast:
+            xmpp.get_roster()
+            xmpp.send_presence()
+
+    def roster_update(iq):
+        received.append(time.time())
+        done.set()
+
+    xmpp.add_event_handler('session_start', session_start)
+    xmpp.add_event_handler('roster_update', roster_update)
+
+    start = time.time()
+    xmpp.connect(('127.0.0.1', server.port), use_tls=False)
+    xmpp.process(block=False)
+    done.wait(30)
+    timing = dict(xmpp.login_timing)
+    timing['total'] = received[0] - start
+    xmpp.disconnect()
+    server.join(5)
+    return timing, server.requests
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-r', '--rtt', type='float', dest='rtt', default=0.1,
+                    help='simulated round trip time in seconds')
+    opts, args = optp.parse_args()
+
+    phases = ('auth', 'bind', 'session', 'total')
+    print('%6s %10s ' % ('mode', 'requests') +
+          ' '.join('%8s' % phase for phase in phases))
+    for name, fast in (('normal', False), ('fast', True)):
+        timing, requests = run(opts.rtt, fast)
+        print('%6s %10d ' % (name, requests) +
+              ' '.join('%8.3f' % timing.get(phase, 0) for phase in phases))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the cost of checking a stanza against the matchers of the
+stream handlers registered by the built-in plugins.
+
+Matchers are compiled when they are created. The uncompiled figures
+repeat the parsing done before matchers were compiled: stanza paths
+are split again for every stanza, XPath expressions are applied to a
+wrapper element, and XML masks are read again for every stanza.
+"""
+
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+from sleekxmpp.xmlstream import ET, stanzabase
+from sleekxmpp.xmlstream.matcher import StanzaPath, MatchXPath, MatchXMLMask
+
+
+PLUGINS = ['xep_0004', 'xep_0009', 'xep_0012', 'xep_0030', 'xep_0045',
+           'xep_0047', 'xep_0050', 'xep_0054', 'xep_0060', 'xep_0065',
+           'xep_0085', 'xep_0092', 'xep_0184', 'xep_0199', 'xep_0202',
+           'xep_0224', 'xep_0231', 'xep_0249', 'xep_0308', 'xep_0313']
+
+
+STANZAS = [
+    "<message xmlns='jabber:client' from='user@example.com/a' "
+    "type='chat'><body>Hi</body>"
+    "<active xmlns='http://jabber.org/protocol/chatstates' /></message>",
+    "<presence xmlns='jabber:client' from='room@muc.example.com/nick'>"
+    "<x xmlns='http://jabber.org/protocol/muc#user'>"
+    "<item affiliation='member' role='participant' /></x></presence>",
+    "<iq xmlns='jabber:client' type='get' id='1' from='user@example.com/a'>"
+    "<query xmlns='http://jabber.org/protocol/disco#info' /></iq>",
+    "<iq xmlns='jabber:client' type='result' id='2' from='example.com' />"]
+
+
+def uncompiled(matcher, stanza):
+    """Match a stanza in the same way as before compiling matchers."""
+    if isinstance(matcher, StanzaPath):
+        stanzabase._compiled_paths.clear()
+        stanzabase._fixed_paths.clear()
+        return stanza.match(matcher._raw_criteria)
+    elif isinstance(matcher, MatchXPath):
+        x = ET.Element('x')
+        x.append(stanza.xml)
+        return x.find(matcher._criteria) is not None
+    elif isinstance(matcher, MatchXMLMask):
+        return matcher._compile(matcher._criteria)(stanza.xml)
+    return matcher.match(stanza)
+
+
+def run(rounds):
+    xmpp = sleekxmpp.ClientXMPP('tester@localhost/bench', 'test')
+    for plugin in PLUGINS:
+        xmpp.register_plugin(plugin)
+    handlers = list(xmpp._XMLStream__handlers)
+    stanzas = [xmpp._build_stanza(ET.fromstring(xml)) for xml in STANZAS]
+
+    results = []
+    for kind in (StanzaPath, MatchXPath, MatchXMLMask):
+        matchers = [h._matcher for h in handlers
+                    if isinstance(h._matcher, kind)]
+        for stanza in stanzas:
+            for matcher in matchers:
+                if bool(matcher.match(stanza)) != \
+                   bool(uncompiled(matcher, stanza)):
+                    raise AssertionError('Mismatch for %s' %
+                                         matcher._criteria)
+
+        def compiled_run():
+            for stanza in stanzas:
+                for matcher in matchers:
+                    matcher.match(stanza)
+
+        def uncompiled_run():
+            for stanza in stanzas:
+                for matcher in matchers:
+                    uncompiled(matcher, stanza)
+
+        per_stanza = 1000000.0 / (rounds * len(stanzas))
+        results.append((kind.__name__, len(matchers),
+                        min(timeit.repeat(compiled_run, number=rounds,
+                                          repeat=3)) * per_stanza,
+                        min(timeit.repeat(uncompiled_run, number=rounds,
+                                          repeat=3)) * per_stanza))
+    return results
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--rounds', type='int', dest='rounds', default=200,
+                    help='number of times each stanza is matched')
+    opts, args = optp.parse_args()
+
+    print('%14s %10s %16s %16s' % ('matcher', 'handlers',
+                                   'compiled (us)', 'uncompiled (us)'))
+    for name, count, compiled, legacy in run(opts.rounds):
+        print('%14s %10d %16.1f %16.1f' % (name, count, compiled, legacy))
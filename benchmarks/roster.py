@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure dictionary heavy roster operations on a large roster.
+
+A roster node is filled with contacts, which are then looked up by
+JID strings, by the JID objects of incoming stanzas, and by full
+JIDs, as is done when handling presence. JID objects are also used
+directly as dictionary and set keys. Only public interfaces are used,
+so the same figures can be taken from older versions.
+"""
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+from sleekxmpp import JID
+
+
+def timed(func, count):
+    start = time.time()
+    func()
+    return (time.time() - start) * 1000000.0 / count
+
+
+def run(count):
+    xmpp = sleekxmpp.ClientXMPP('owner@example.com/bench', 'test')
+    roster = xmpp.client_roster
+    bare = ['contact%d@example.com' % i for i in range(count)]
+    full = ['%s/phone' % jid for jid in bare]
+    jids = [JID(jid) for jid in full]
+
+    def add():
+        for jid in bare:
+            roster.add(jid)
+
+    def lookup_string():
+        for jid in bare:
+            roster[jid]
+
+    def lookup_jid():
+        for jid in jids:
+            roster[jid]
+
+    def lookup_owner():
+        for jid in jids:
+            xmpp.roster['owner@example.com'][jid]
+
+    def has_jid():
+        for jid in bare:
+            roster.has_jid(jid)
+
+    def jid_keys():
+        seen = {}
+        for jid in jids:
+            seen[jid] = seen.get(jid, 0) + 1
+        for jid in jids:
+            jid in seen
+
+    return [('add', timed(add, count)),
+            ('lookup by string', timed(lookup_string, count)),
+            ('lookup by JID', timed(lookup_jid, count)),
+            ('lookup by owner', timed(lookup_owner, count)),
+            ('has_jid', timed(has_jid, count)),
+            ('JID dict keys', timed(jid_keys, count))]
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--contacts', type='int', dest='contacts',
+                    default=100000,
+                    help='number of roster entries')
+    opts, args = optp.parse_args()
+
+    print('%18s %12s' % ('operation', 'us per JID'))
+    for name, cost in run(opts.contacts):
+        print('%18s %12.2f' % (name, cost))
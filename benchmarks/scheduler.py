@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure scheduler add/remove churn with many outstanding tasks.
+
+This mirrors the ``IqTimeout_<id>`` tasks scheduled for every Iq sent
+with a callback and removed again when the reply arrives. The scheduler
+thread runs during the measurement, so the results include contention
+with the processing loop.
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sleekxmpp.xmlstream import Scheduler
+
+
+def noop():
+    pass
+
+
+def churn(outstanding, operations):
+    stop = threading.Event()
+    scheduler = Scheduler(stop)
+    scheduler.process(threaded=True, daemon=True)
+
+    start = time.time()
+    for i in range(outstanding):
+        scheduler.add('IqTimeout_%s' % i, 30 + random.random(), noop)
+    fill = time.time() - start
+
+    # Steady state: every reply cancels one timeout and every new
+    # request schedules another one.
+    pending = list(range(outstanding))
+    random.shuffle(pending)
+    start = time.time()
+    for i in range(operations):
+        scheduler.remove('IqTimeout_%s' % pending[i % outstanding])
+        pending[i % outstanding] = outstanding + i
+        scheduler.add('IqTimeout_%s' % (outstanding + i),
+                      30 + random.random(), noop)
+    steady = time.time() - start
+
+    start = time.time()
+    for i in pending:
+        scheduler.remove('IqTimeout_%s' % i)
+    drain = time.time() - start
+
+    stop.set()
+    scheduler.quit()
+    scheduler.thread.join()
+    return fill, steady, drain
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--operations', type='int', dest='operations',
+                    default=100000,
+                    help='number of remove/add pairs in the steady state')
+    opts, args = optp.parse_args()
+
+    print('%12s %14s %18s %14s' % ('outstanding', 'add (us/op)',
+                                   'churn (us/pair)', 'remove (us/op)'))
+    for outstanding in (1000, 10000, 100000):
+        fill, steady, drain = churn(outstanding, opts.operations)
+        print('%12d %14.2f %18.2f %14.2f' % (
+            outstanding,
+            fill * 1000000.0 / outstanding,
+            steady * 1000000.0 / opts.operations,
+            drain * 1000000.0 / outstanding))
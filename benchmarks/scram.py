@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the cost of SCRAM-SHA-1 authentication when many accounts
+reconnect at once, as after a server restart.
+
+Each account authenticates a number of times with the same salt and
+iteration count, as a server does for an unchanged password. The
+``loop`` figures derive the keys with the HMAC loop used before
+``hashlib.pbkdf2_hmac``, and neither they nor the ``pbkdf2`` figures
+keep derived keys between authentications.
+"""
+
+import os
+import sys
+import time
+from base64 import b64encode
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sleekxmpp.util import XOR
+from sleekxmpp.util.sasl import mechanisms
+from sleekxmpp.util.sasl.mechanisms import SCRAM
+
+
+class LoopSCRAM(SCRAM):
+
+    """SCRAM deriving its salted password with an HMAC loop."""
+
+    def Hi(self, text, salt, iterations):
+        ui1 = self.HMAC(text, salt + b'\0\0\0\01')
+        ui = ui1
+        for i in range(iterations - 1):
+            ui1 = self.HMAC(text, ui1)
+            ui = XOR(ui, ui1)
+        return ui
+
+
+def authenticate(cls, username, salt, iterations):
+    credentials = {'username': username,
+                   'password': b'secret-' + username,
+                   'authzid': b'',
+                   'channel_binding': b''}
+    security = {'encrypted': True, 'unencrypted_scram': True}
+    mech = cls('SCRAM-SHA-1', credentials, security)
+    mech.process()
+    mech.process(b'r=' + mech.cnonce + b'server,s=' + b64encode(salt) +
+                 b',i=' + str(iterations).encode('ascii'))
+
+
+def run(cls, accounts, reconnects, iterations, cache_size):
+    mechanisms._scram_keys.clear()
+    original = mechanisms.SCRAM_CACHE_SIZE
+    mechanisms.SCRAM_CACHE_SIZE = cache_size
+    users = [('user%d' % i).encode('ascii') for i in range(accounts)]
+    try:
+        start = time.time()
+        for i in range(reconnects):
+            for user in users:
+                authenticate(cls, user, b'salt-' + user, iterations)
+        elapsed = time.time() - start
+    finally:
+        mechanisms.SCRAM_CACHE_SIZE = original
+    return elapsed * 1000.0 / (accounts * reconnects)
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-a', '--accounts', type='int', dest='accounts',
+                    default=50,
+                    help='number of accounts')
+    optp.add_option('-r', '--reconnects', type='int', dest='reconnects',
+                    default=4,
+                    help='number of times each account authenticates')
+    optp.add_option('-i', '--iterations', type='int', dest='iterations',
+                    default=4096,
+                    help='SCRAM iteration count')
+    opts, args = optp.parse_args()
+
+    print('%10s %12s' % ('mode', 'ms per auth'))
+    for name, cls, cache_size in (('loop', LoopSCRAM, 0),
+                                  ('pbkdf2', SCRAM, 0),
+                                  ('cached', SCRAM, opts.accounts)):
+        cost = run(cls, opts.accounts, opts.reconnects, opts.iterations,
+                   cache_size)
+        print('%10s %12.3f' % (name, cost))
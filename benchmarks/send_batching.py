@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the send thread's throughput for a burst of small stanzas with
+different write batch sizes and cork windows.
+
+Stanzas are written to one end of a local socket pair while a separate
+thread reads and discards everything from the other end.
+"""
+
+import os
+import sys
+import time
+import socket
+import threading
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+
+
+def drain(sock):
+    while sock.recv(65536):
+        pass
+
+
+def run(budget, cork, messages):
+    local, remote = socket.socketpair()
+    reader = threading.Thread(target=drain, args=(remote,))
+    reader.daemon = True
+    reader.start()
+
+    xmpp = sleekxmpp.ClientXMPP('tester@localhost/bench', 'test')
+    xmpp.send_batch_bytes = budget
+    xmpp.send_cork = cork
+    xmpp.set_socket(local)
+    xmpp.session_started_event.set()
+    xmpp._start_thread('send_thread', xmpp._send_thread)
+
+    data = "<message to='user@localhost'><body>Testing</body></message>"
+    start = time.time()
+    for i in range(messages):
+        xmpp.send_raw(data)
+    xmpp.send_queue.join()
+    elapsed = time.time() - start
+
+    xmpp.stop.set()
+    local.close()
+    remote.close()
+    return elapsed, xmpp.send_stats
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-m', '--messages', type='int', dest='messages',
+                    default=50000, help='number of stanzas to send')
+    opts, args = optp.parse_args()
+
+    print('%8s %10s %12s %8s %16s %14s' % (
+        'budget', 'cork (us)', 'messages/s', 'writes',
+        'stanzas/write', 'bytes/write'))
+    for budget, cork in ((0, 0), (4096, 0), (16384, 0),
+                         (16384, 100), (65536, 0)):
+        elapsed, stats = run(budget, cork, opts.messages)
+        print('%8d %10d %12.0f %8d %16.1f %14.0f' % (
+            budget, cork, opts.messages / elapsed, stats['writes'],
+            float(stats['stanzas']) / stats['writes'],
+            float(stats['bytes']) / stats['writes']))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Compare serializing stanzas for sending using the previous recursive
+serializer, followed by encoding to UTF-8, with the current
+serializer's tostring() and tobytes() functions.
+"""
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sleekxmpp.stanza import Message
+from sleekxmpp.xmlstream import XMLStream, tostring, tobytes
+from sleekxmpp.xmlstream.tostring import XML_NS
+
+
+def legacy_escape(text, use_cdata=False):
+    escapes = {'&': '&amp;',
+               '<': '&lt;',
+               '>': '&gt;',
+               "'": '&apos;',
+               '"': '&quot;'}
+    text = list(text)
+    for i, c in enumerate(text):
+        text[i] = escapes.get(c, c)
+    return ''.join(text)
+
+
+def legacy_tostring(xml=None, xmlns='', stream=None, outbuffer='',
+                    top_level=False, namespaces=None):
+    """The recursive serializer used before the current one."""
+    output = [outbuffer]
+    tag_name = xml.tag.split('}', 1)[-1]
+    if '}' in xml.tag:
+        tag_xmlns = xml.tag.split('}', 1)[0][1:]
+    else:
+        tag_xmlns = ''
+    default_ns = stream.default_ns
+    stream_ns = stream.stream_ns
+    namespace = ''
+    if tag_xmlns:
+        if top_level and tag_xmlns not in [default_ns, xmlns, stream_ns] \
+          or not top_level and tag_xmlns != xmlns:
+            namespace = ' xmlns="%s"' % tag_xmlns
+    if tag_xmlns in stream.namespace_map:
+        mapped_namespace = stream.namespace_map[tag_xmlns]
+        if mapped_namespace:
+            tag_name = "%s:%s" % (mapped_namespace, tag_name)
+    output.append("<%s" % tag_name)
+    output.append(namespace)
+    for attrib, value in xml.attrib.items():
+        value = legacy_escape(value)
+        if '}' not in attrib:
+            output.append(' %s="%s"' % (attrib, value))
+        elif attrib.split('}')[0][1:] == XML_NS:
+            output.append(' xml:%s="%s"' % (attrib.split('}')[1], value))
+    if len(xml) or xml.text:
+        output.append(">")
+        if xml.text:
+            output.append(legacy_escape(xml.text))
+        for child in xml:
+            output.append(legacy_tostring(child, tag_xmlns, stream,
+                                          namespaces=namespaces))
+        output.append("</%s>" % tag_name)
+    else:
+        output.append(" />")
+    if xml.tail:
+        output.append(legacy_escape(xml.tail))
+    return ''.join(output)
+
+
+def measure(name, func, stanzas):
+    start = time.time()
+    for stanza in stanzas:
+        func(stanza)
+    elapsed = time.time() - start
+    print('%8s %14.0f' % (name, len(stanzas) / elapsed))
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--stanzas', type='int', dest='stanzas',
+                    default=50000, help='number of stanzas to serialize')
+    opts, args = optp.parse_args()
+
+    stream = XMLStream()
+    stream.default_ns = 'jabber:client'
+    stanzas = []
+    for i in range(opts.stanzas):
+        msg = Message()
+        msg['to'] = 'user@localhost/r'
+        msg['from'] = 'bench@localhost/b'
+        msg['type'] = 'chat'
+        msg['id'] = 'm%s' % i
+        msg['lang'] = 'en'
+        msg['body'] = 'Testing & more' if i % 10 == 0 else 'Testing'
+        msg['thread'] = 't1'
+        stanzas.append(msg.xml)
+
+    for xml in stanzas[:100]:
+        assert tobytes(xml, 'jabber:client', stream, top_level=True) == \
+               legacy_tostring(xml, 'jabber:client', stream,
+                               top_level=True).encode('utf-8')
+
+    print('%8s %14s' % ('method', 'stanzas/s'))
+    measure('legacy', lambda xml: legacy_tostring(
+        xml, 'jabber:client', stream, top_level=True).encode('utf-8'),
+        stanzas)
+    measure('tostring', lambda xml: tostring(
+        xml, 'jabber:client', stream, top_level=True).encode('utf-8'),
+        stanzas)
+    measure('tobytes', lambda xml: tobytes(
+        xml, 'jabber:client', stream, top_level=True), stanzas)
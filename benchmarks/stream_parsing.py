@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Compare parsing an incoming stream with ElementTree.iterparse reading
+from a file object against feeding an incremental parser from a reused
+receive buffer, using several read sizes.
+
+A component stream of small messages is queued on a mock socket in
+64KB packets, as a busy component link would deliver it. The mock
+socket returns at most the requested number of bytes for each read,
+and handlers are not run for the parsed stanzas.
+"""
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+from sleekxmpp.test import TestSocket
+from sleekxmpp.xmlstream import ET
+
+
+class NullQueue(object):
+
+    """Discard queued events."""
+
+    def put(self, item):
+        pass
+
+
+class PacketSocket(TestSocket):
+
+    """A mock socket returning at most the requested number of bytes."""
+
+    def __init__(self, *args, **kwargs):
+        TestSocket.__init__(self, *args, **kwargs)
+        self.reads = 0
+
+    def read(self, size=4096, block=True, timeout=None):
+        self.reads += 1
+        if not self.recv_pending:
+            self.recv_pending = TestSocket.read(self, False) or b''
+        data = self.recv_pending[:size]
+        self.recv_pending = self.recv_pending[size:]
+        return data
+
+    def recv_into(self, buffer, nbytes=0, flags=0):
+        self.reads += 1
+        if not self.recv_pending:
+            self.recv_pending = TestSocket.read(self, False) or b''
+        size = min(len(self.recv_pending), len(buffer))
+        buffer[:size] = self.recv_pending[:size]
+        self.recv_pending = self.recv_pending[size:]
+        return size
+
+
+def build_data(messages):
+    header = ("<stream:stream xmlns='jabber:component:accept' "
+              "xmlns:stream='http://etherx.jabber.org/streams' "
+              "id='bench' from='localhost'>")
+    msg = ("<message from='user@localhost/r' to='bench.localhost' "
+           "id='m%s'><body>Testing</body></message>")
+    data = header + ''.join(msg % i for i in range(messages)) + \
+           '</stream:stream>'
+    data = data.encode('utf-8')
+    return [data[i:i + 65536] for i in range(0, len(data), 65536)]
+
+
+def run(mode, read_size, packets, messages):
+    xmpp = sleekxmpp.ComponentXMPP('bench.localhost', 'secret',
+                                   'localhost', 5347)
+    xmpp.event_queue = NullQueue()
+    xmpp.start_stream_handler = lambda xml: None
+    xmpp.read_size = read_size
+    sock = PacketSocket()
+    for packet in packets:
+        sock.recv_data(packet)
+    xmpp.set_socket(sock, ignore=True)
+
+    start = time.time()
+    if mode == 'iterparse':
+        xmpp._xml_depth = 0
+        for event, xml in ET.iterparse(sock, ('end', 'start')):
+            if xmpp._handle_xml_event(event, xml) is not None:
+                break
+    else:
+        xmpp._XMLStream__read_xml()
+    elapsed = time.time() - start
+    return messages / elapsed, sock.reads
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-m', '--messages', type='int', dest='messages',
+                    default=100000, help='number of messages to parse')
+    opts, args = optp.parse_args()
+
+    packets = build_data(opts.messages)
+    print('%10s %10s %12s %8s' % ('mode', 'read size',
+                                  'messages/s', 'reads'))
+    for mode, read_size in (('iterparse', 16384), ('feed', 4096),
+                            ('feed', 16384), ('feed', 65536)):
+        rate, reads = run(mode, read_size, packets, opts.messages)
+        print('%10s %10d %12.0f %8d' % (mode, read_size, rate, reads))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Measure the cost of the TLS handshake when a client reconnects many
+times, as behind a load balancer that closes idle connections.
+
+A server on the loopback interface accepts direct TLS connections,
+then answers each stream with empty stream features. The client
+verifies the server certificate against a CA file. The ``fresh``
+figures create a new SSL context for each connection and do not
+resume sessions, as was done before contexts were shared. The
+``shared`` figures reuse the context but do not resume sessions.
+
+A self signed certificate is created with the ``openssl`` command
+unless one is given.
+"""
+
+import os
+import sys
+import time
+import logging
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import sleekxmpp
+
+
+HEADER = ("<?xml version='1.0'?><stream:stream "
+          "xmlns='jabber:client' "
+          "xmlns:stream='http://etherx.jabber.org/streams' "
+          "from='localhost' id='1' version='1.0'>"
+          "<stream:features/>")
+
+
+class Server(threading.Thread):
+
+    """A server accepting direct TLS connections."""
+
+    def __init__(self, certfile):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(certfile)
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(5)
+        self.port = self.listener.getsockname()[1]
+
+    def run(self):
+        while True:
+            conn, addr = self.listener.accept()
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            thread = threading.Thread(target=self.serve, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def serve(self, conn):
+        try:
+            conn = self.context.wrap_socket(conn, server_side=True)
+            data = b''
+            while b'<stream:stream' not in data:
+                data += conn.recv(4096)
+            conn.sendall(HEADER.encode('utf-8'))
+            while b'</stream:stream>' not in data:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            conn.sendall(b'</stream:stream>')
+        except (socket.error, ssl.SSLError):
+            pass
+        finally:
+            conn.close()
+
+
+def make_cert(path):
+    subprocess.check_call(['openssl', 'req', '-x509', '-newkey', 'rsa:2048',
+                           '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                           '-keyout', path, '-out', path],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def run(port, certfile, count, mode):
+    xmpp = sleekxmpp.ClientXMPP('user@localhost/bench', 'secret')
+    xmpp.ca_certs = certfile
+    xmpp.ssl_resume = mode == 'resumed'
+    xmpp.reconnect_max_delay = 0
+    xmpp.add_event_handler('ssl_invalid_cert', lambda pem: None)
+
+    results = []
+    negotiated = threading.Event()
+    xmpp.add_event_handler('stream_negotiated',
+                           lambda event: negotiated.set())
+
+    def connected(event):
+        results.append((event['ssl_handshake_time'],
+                        event['ssl_session_reused']))
+
+    xmpp.add_event_handler('connected', connected)
+
+    start = time.time()
+    xmpp.connect(('127.0.0.1', port), use_ssl=True, reattempt=False)
+    xmpp.process(block=False)
+    for i in range(count):
+        negotiated.wait(10)
+        negotiated.clear()
+        if i < count - 1:
+            if mode == 'fresh':
+                xmpp._ssl_contexts.clear()
+            xmpp.disconnect(reconnect=True)
+    elapsed = time.time() - start
+    xmpp.disconnect()
+
+    handshake = sum(result[0] for result in results) / len(results)
+    reused = len([result for result in results if result[1]])
+    return elapsed * 1000.0 / count, handshake * 1000.0, reused
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--connections', type='int', dest='connections',
+                    default=50,
+                    help='number of connections')
+    optp.add_option('-c', '--cert', dest='cert',
+                    help='PEM file holding the server key and certificate')
+    opts, args = optp.parse_args()
+
+    # Without pyasn1, a warning is logged for each certificate.
+    logging.basicConfig(level=logging.ERROR)
+
+    tmpdir = None
+    certfile = opts.cert
+    if certfile is None:
+        tmpdir = tempfile.mkdtemp()
+        certfile = os.path.join(tmpdir, 'server.pem')
+        make_cert(certfile)
+
+    try:
+        server = Server(certfile)
+        server.start()
+        print('%8s %16s %16s %8s' % ('mode', 'ms per connect',
+                                     'handshake (ms)', 'reused'))
+        for mode in ('fresh', 'shared', 'resumed'):
+            cost, handshake, reused = run(server.port, certfile,
+                                          opts.connections, mode)
+            print('%8s %16.2f %16.2f %8d' % (mode, cost, handshake, reused))
+    finally:
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir)
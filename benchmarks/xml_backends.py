@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    SleekXMPP: The Sleek XMPP Library
+    Copyright (C) 2010  Nathanael C. Fritz
+    This file is part of SleekXMPP.
+
+    See the file LICENSE for copying permission.
+
+Compare parsing, building, and serializing message stanzas using each
+available XML backend.
+
+Each backend is measured in its own process, since the backend is
+chosen when SleekXMPP is imported.
+"""
+
+import os
+import sys
+import time
+import subprocess
+from optparse import OptionParser, SUPPRESS_HELP
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def measure(count):
+    from sleekxmpp.stanza import Message
+    from sleekxmpp.xmlstream import ET
+    from sleekxmpp.xmlstream.xmlbackend import BACKEND
+
+    msg = ("<message xmlns='jabber:client' from='user@localhost/r' "
+           "to='bench@localhost' type='chat' id='m%s' xml:lang='en'>"
+           "<body>Testing &amp; more</body><thread>t1</thread></message>")
+    data = ("<stream:stream xmlns='jabber:client' "
+            "xmlns:stream='http://etherx.jabber.org/streams'>" +
+            ''.join(msg % i for i in range(count))).encode('utf-8')
+
+    start = time.time()
+    parser = ET.XMLPullParser(events=('end',))
+    parser.feed(data)
+    stanzas = [Message(xml=xml) for event, xml in parser.read_events()
+               if xml.tag == '{jabber:client}message']
+    parse = time.time() - start
+
+    start = time.time()
+    for i in range(count):
+        built = Message()
+        built['to'] = 'user@localhost/r'
+        built['type'] = 'chat'
+        built['id'] = 'm%s' % i
+        built['body'] = 'Testing & more'
+        built['thread'] = 't1'
+    build = time.time() - start
+
+    start = time.time()
+    for stanza in stanzas:
+        str(stanza)
+    serialize = time.time() - start
+
+    print('%s %s %s %s' % (BACKEND, count / parse, count / build,
+                           count / serialize))
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('-n', '--stanzas', type='int', dest='stanzas',
+                    default=50000, help='number of stanzas to process')
+    optp.add_option('--measure', action='store_true', help=SUPPRESS_HELP)
+    opts, args = optp.parse_args()
+
+    if opts.measure:
+        measure(opts.stanzas)
+    else:
+        print('%8s %14s %14s %14s' % ('backend', 'parsed/s',
+                                      'built/s', 'serialized/s'))
+        for backend in ('etree', 'lxml'):
+            env = dict(os.environ)
+            env['SLEEKXMPP_XML_BACKEND'] = backend
+            proc = subprocess.Popen([sys.executable, __file__, '--measure',
+                                     '--stanzas', str(opts.stanzas)],
+                                    env=env, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE,
+                                    universal_newlines=True)
+            output = proc.communicate()[0]
+            if proc.returncode != 0 or not output:
+                print('%8s %14s' % (backend, 'unavailable'))
+                continue
+            name, parse, build, serialize = output.split()
+            print('%8s %14.0f %14.0f %14.0f' % (
+                name, float(parse), float(build), float(serialize)))
@@ -1,4 +1,4 @@
-from sleekxmpp.xmlstream import JID
+from sleekxmpp.jid import JID, freeze
 
 
 class APIWrapper(object):
@@ -109,22 +109,19 @@ class APIRegistry(object):
         if node is None:
             node = ''
 
+        key = jid.frozen
         if self.xmpp.is_component:
             if self.settings[ctype].get('component_bare', False):
-                jid = jid.bare
-            else:
-                jid = jid.full
+                key = key.bare_jid
         else:
             if self.settings[ctype].get('client_bare', False):
-                jid = jid.bare
-            else:
-                jid = jid.full
+                key = key.bare_jid
 
-        jid = JID(jid)
+        jid = JID(key)
 
-        handler = self._handlers[ctype][op]['node'].get((jid, node), None)
+        handler = self._handlers[ctype][op]['node'].get((key, node), None)
         if handler is None:
-            handler = self._handlers[ctype][op]['jid'].get(jid, None)
+            handler = self._handlers[ctype][op]['jid'].get(key, None)
         if handler is None:
             handler = self._handlers[ctype][op].get('global', None)
 
@@ -150,6 +147,8 @@ class APIRegistry(object):
         :param string node: Optionally provide specific node.
         """
         self._setup(ctype, op)
+        if jid is not None:
+            jid = freeze(jid)
         if jid is None and node is None:
             if handler is None:
                 handler = self._handler_defaults[op]
@@ -33,6 +33,7 @@ from sleekxmpp.xmlstream import ET, register_stanza_plugin
 from sleekxmpp.xmlstream.matcher import MatchXPath
 from sleekxmpp.xmlstream.handler import Callback
 from sleekxmpp.xmlstream.stanzabase import XML_NS
+from sleekxmpp.xmlstream.template import StanzaTemplate
 
 from sleekxmpp.features import *
 from sleekxmpp.plugins import PluginManager, register_plugin, load_plugin
@@ -580,6 +581,51 @@ class BaseXMPP(XMLStream):
                            pto=JID(pto).bare,
                            pnick=pnick).send()
 
+    def make_template(self, stanza, sfrom=False):
+        """
+        Create a :class:`~sleekxmpp.xmlstream.template.StanzaTemplate`
+        from a stanza, for sending to many recipients with
+        :meth:`broadcast`.
+
+        The stanza is serialized once, with slots for its ``to`` and
+        ``id`` attributes, and optionally its ``from`` attribute.
+
+        :param stanza: The stanza to use, such as one created by
+                       :meth:`make_message`.
+        :param bool sfrom: Indicates if a ``from`` address is given
+                           for each recipient. Defaults to ``False``.
+        """
+        return StanzaTemplate(stanza, sfrom)
+
+    def broadcast(self, template, jids, use_filters=False):
+        """
+        Send a stanza template to many recipients.
+
+        A new stanza ID is used for each recipient. If the template
+        has a ``from`` slot, each recipient is given as a
+        ``(to, from)`` pair.
+
+        Outgoing filters are only applied when ``use_filters`` is set,
+        since doing so requires a stanza object for each recipient.
+
+        Returns the list of stanza IDs used, in the same order as
+        the recipients.
+
+        :param template: A template created by :meth:`make_template`.
+        :param jids: The recipients' JIDs, as strings or
+                     :class:`~sleekxmpp.xmlstream.jid.JID` objects.
+        :param bool use_filters: Indicates if outgoing filters should
+                                 be applied to each stanza.
+                                 Defaults to ``False``.
+        """
+        new_id = self.new_id
+        if len(template.slots) > 2:
+            recipients = [(sto, new_id(), sfrom) for sto, sfrom in jids]
+        else:
+            recipients = [(sto, new_id(), None) for sto in jids]
+        self.send_template(template, recipients, use_filters)
+        return [sid for _, sid, _ in recipients]
+
     @property
     def jid(self):
         """Attribute accessor for bare jid"""
@@ -14,6 +14,7 @@
 
 from __future__ import absolute_import, unicode_literals
 
+import time
 import logging
 
 from sleekxmpp.stanza import StreamFeatures
@@ -94,7 +95,22 @@ class ClientXMPP(BaseXMPP):
         self.bound = False
         self.bindfail = False
 
+        #: If ``True``, shorten logging in by skipping the session
+        #: request when the server marks it as optional, and by
+        #: sending the roster request and initial presence together
+        #: once the session is established, without waiting for a
+        #: response. Handlers for ``session_start`` then do not need
+        #: to request the roster or send presence themselves.
+        self.fast_login = False
+
+        #: The time in seconds from connecting until each phase of
+        #: logging in finished: ``'starttls'``, ``'auth'``, ``'bind'``,
+        #: ``'session'``, and with :attr:`fast_login`, ``'roster'``.
+        self.login_timing = {}
+        self._login_start = time.time()
+
         self.add_event_handler('connected', self._reset_connection_state)
+        self.add_event_handler('auth_success', self._handle_auth_success)
         self.add_event_handler('session_bind', self._handle_session_bind)
 
         self.register_stanza(StreamFeatures)
@@ -260,6 +276,31 @@ class ClientXMPP(BaseXMPP):
         self.bound = False
         self.bindfail = False
         self.features = set()
+        self.login_timing = {}
+        self._login_start = time.time()
+
+    def _login_phase(self, name):
+        """Record the time taken to reach the end of a login phase.
+
+        :param name: The name of the phase, such as ``'bind'``.
+        """
+        self.login_timing[name] = time.time() - self._login_start
+
+    def _start_session(self):
+        """Mark the session as established and raise ``session_start``.
+
+        With :attr:`fast_login`, the roster request and initial
+        presence are queued first, so that they are sent together
+        as soon as the send queue is started.
+        """
+        self._login_phase('session')
+        if self.fast_login:
+            self.get_roster(block=False, callback=self._handle_login_roster)
+            self.send_presence()
+        log.debug("Established Session")
+        self.sessionstarted = True
+        self.session_started_event.set()
+        self.event('session_start')
 
     def _handle_stream_features(self, features):
         """Process the received stream features.
@@ -309,12 +350,24 @@ class ClientXMPP(BaseXMPP):
             resp.enable('roster')
             resp.send()
 
+    def _handle_login_roster(self, iq):
+        """Update the roster requested by :meth:`_start_session`.
+
+        :param iq: The roster stanza.
+        """
+        self._login_phase('roster')
+        self._handle_roster(iq)
+
+    def _handle_auth_success(self, stanza):
+        self._login_phase('auth')
+
     def _handle_session_bind(self, jid):
         """Set the client roster to the JID set by the server.
 
         :param :class:`sleekxmpp.xmlstream.jid.JID` jid: The bound JID as
             dictated by the server. The same as :attr:`boundjid`.
         """
+        self._login_phase('bind')
         self.client_roster = self.roster[jid]
 
 
@@ -59,7 +59,4 @@ class FeatureBind(BasePlugin):
         log.info("JID set to: %s", self.xmpp.boundjid.full)
 
         if 'session' not in features['features']:
-            log.debug("Established Session")
-            self.xmpp.sessionstarted = True
-            self.xmpp.session_started_event.set()
-            self.xmpp.event('session_start')
+            self.xmpp._start_session()
@@ -120,7 +120,8 @@ class FeatureMechanisms(BasePlugin):
             if value == 'encrypted':
                 if 'starttls' in self.xmpp.features:
                     result[value] = True
-                elif isinstance(self.xmpp.socket, ssl.SSLSocket):
+                elif isinstance(self.xmpp.socket, (ssl.SSLSocket,
+                                  getattr(ssl, 'SSLObject', ssl.SSLSocket))):
                     result[value] = True
                 else:
                     result[value] = False
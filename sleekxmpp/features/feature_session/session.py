@@ -41,14 +41,13 @@ class FeatureSession(BasePlugin):
         Arguments:
             feature -- The stream features element.
         """
-        iq = self.xmpp.Iq()
-        iq['type'] = 'set'
-        iq.enable('session')
-        iq.send(now=True)
+        if self.xmpp.fast_login and features['session']['optional']:
+            log.debug("Skipping optional session request")
+        else:
+            iq = self.xmpp.Iq()
+            iq['type'] = 'set'
+            iq.enable('session')
+            iq.send(now=True)
 
         self.xmpp.features.add('session')
-
-        log.debug("Established Session")
-        self.xmpp.sessionstarted = True
-        self.xmpp.session_started_event.set()
-        self.xmpp.event('session_start')
+        self.xmpp._start_session()
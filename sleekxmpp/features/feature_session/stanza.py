@@ -16,5 +16,6 @@ class Session(ElementBase):
 
     name = 'session'
     namespace = 'urn:ietf:params:xml:ns:xmpp-session'
-    interfaces = set()
+    interfaces = set(('optional',))
+    bool_interfaces = interfaces
     plugin_attrib = 'session'
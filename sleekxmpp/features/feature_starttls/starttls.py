@@ -62,5 +62,6 @@ class FeatureSTARTTLS(BasePlugin):
         """Restart the XML stream when TLS is accepted."""
         log.debug("Starting TLS")
         if self.xmpp.start_tls():
+            self.xmpp._login_phase('starttls')
             self.xmpp.features.add('starttls')
             raise RestartStream()
@@ -17,6 +17,7 @@ import re
 import socket
 import stringprep
 import threading
+import weakref
 import encodings.idna
 
 from sleekxmpp.util import stringprep_profiles
@@ -65,24 +66,140 @@ JID_UNESCAPE_TRANSFORMATIONS = {'\\20': ' ',
                                 '\\40': '@',
                                 '\\5c': '\\'}
 
-JID_CACHE = OrderedDict()
-JID_CACHE_LOCK = threading.Lock()
+#: The default number of unpinned JIDs kept in the JID cache.
 JID_CACHE_MAX_SIZE = 1024
 
-def _cache(key, parts, locked):
-    JID_CACHE[key] = (parts, locked)
-    if len(JID_CACHE) > JID_CACHE_MAX_SIZE:
-        with JID_CACHE_LOCK:
-            while len(JID_CACHE) > JID_CACHE_MAX_SIZE:
-                found = None
-                for key, item in JID_CACHE.items():
-                    if not item[1]: # if not locked
-                        found = key
-                        break
-                if not found: # more than MAX_SIZE locked
-                    # warn?
-                    break
-                del JID_CACHE[found]
+
+class JIDCache(object):
+
+    """
+    A thread safe, least recently used cache of parsed JIDs.
+
+    Entries are keyed by a JID string, or by a tuple of JID parts,
+    and hold the :class:`FrozenJID` made by parsing and validating
+    the key. Finding an entry moves it to the end of
+    the eviction order, and adding an entry to a full cache evicts
+    the least recently used entry.
+
+    Pinned entries, such as the stream's own JID, are kept apart
+    from the other entries and are never evicted or counted against
+    the cache's size.
+
+    :param int size: The maximum number of unpinned entries.
+    """
+
+    def __init__(self, size=JID_CACHE_MAX_SIZE):
+        self._entries = OrderedDict()
+        self._pinned = {}
+        self._size = size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries) + len(self._pinned)
+
+    def __contains__(self, key):
+        return key in self._pinned or key in self._entries
+
+    @property
+    def size(self):
+        """The maximum number of unpinned entries.
+
+        Lowering the size evicts entries until the cache fits.
+        """
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        with self._lock:
+            self._size = value
+            self._evict()
+
+    def get(self, key):
+        """Return the :class:`FrozenJID` for a key, or ``None``.
+
+        :param key: A JID string, or a tuple of JID parts.
+        """
+        with self._lock:
+            parts = self._pinned.get(key)
+            if parts is None:
+                entries = self._entries
+                parts = entries.pop(key, None)
+                if parts is None:
+                    self.misses += 1
+                    return None
+                entries[key] = parts
+            self.hits += 1
+            return parts
+
+    def add(self, key, parts, pinned=False):
+        """Add the :class:`FrozenJID` for a key.
+
+        :param key: A JID string, or a tuple of JID parts.
+        :param parts: The :class:`FrozenJID` for the key.
+        :param bool pinned: Indicates if the entry should never be
+                            evicted. Defaults to ``False``.
+        """
+        with self._lock:
+            if pinned:
+                self._entries.pop(key, None)
+                self._pinned[key] = parts
+            elif key not in self._pinned:
+                self._entries.pop(key, None)
+                self._entries[key] = parts
+                self._evict()
+
+    def _evict(self):
+        entries = self._entries
+        while len(entries) > self._size:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def unpin(self, key):
+        """Allow a pinned entry to be evicted again.
+
+        :param key: A JID string, or a tuple of JID parts.
+        """
+        with self._lock:
+            parts = self._pinned.pop(key, None)
+            if parts is not None:
+                self._entries[key] = parts
+                self._evict()
+
+    def clear(self):
+        """Remove all entries, including pinned entries, and reset
+        the statistics counters."""
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return a dictionary of cache statistics.
+
+        The dictionary holds the ``'hits'``, ``'misses'``, and
+        ``'evictions'`` counters, along with the current number of
+        ``'entries'`` and ``'pinned'`` entries and the ``'size'``
+        limit.
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries),
+                    'pinned': len(self._pinned),
+                    'size': self._size}
+
+
+#: The cache of parsed JIDs shared by all :class:`JID` objects.
+JID_CACHE = JIDCache()
+
+
+#: The number of validated JID parts kept for reuse by each of
+#: nodeprep, resourceprep, and domain validation.
+JID_PREP_CACHE_SIZE = 4096
 
 # pylint: disable=c0103
 #: The nodeprep profile of stringprep used to validate the local,
@@ -106,7 +223,8 @@ nodeprep = stringprep_profiles.create(
         stringprep.in_table_c8,
         stringprep.in_table_c9,
         lambda c: c in ' \'"&/:<>@'],
-    unassigned=[stringprep.in_table_a1])
+    unassigned=[stringprep.in_table_a1],
+    cache_size=JID_PREP_CACHE_SIZE)
 
 # pylint: disable=c0103
 #: The resourceprep profile of stringprep, which is used to validate
@@ -126,7 +244,16 @@ resourceprep = stringprep_profiles.create(
         stringprep.in_table_c7,
         stringprep.in_table_c8,
         stringprep.in_table_c9],
-    unassigned=[stringprep.in_table_a1])
+    unassigned=[stringprep.in_table_a1],
+    cache_size=JID_PREP_CACHE_SIZE)
+
+#: Validated domains, keyed by the domain given to
+#: :func:`_validate_domain`.
+_domains = {}
+
+#: Matches domain labels that may skip nameprep, which do not change
+#: after case folding and are not punycode encoded.
+_ascii_label = re.compile(r'^(?!xn--)[a-z0-9-]{1,63}\Z', re.I).match
 
 
 def _parse_jid(data):
@@ -174,6 +301,26 @@ def _validate_node(node):
 
 
 def _validate_domain(domain):
+    """Validate the domain portion of a JID, reusing earlier results.
+
+    See :func:`_prepare_domain`.
+
+    :raises InvalidJID:
+
+    :returns: The validated domain name
+    """
+    try:
+        return _domains[domain]
+    except KeyError:
+        pass
+    result = _prepare_domain(domain)
+    if len(_domains) >= JID_PREP_CACHE_SIZE:
+        _domains.clear()
+    _domains[domain] = result
+    return result
+
+
+def _prepare_domain(domain):
     """Validate the domain portion of a JID.
 
     IP literal addresses are left as-is, if valid. Domain names
@@ -213,6 +360,13 @@ def _validate_domain(domain):
 
         domain_parts = []
         for label in domain.split('.'):
+            if _ascii_label(label):
+                # Plain ASCII labels are only changed by case folding.
+                label = label.lower()
+                if '-' in (label[0], label[-1]):
+                    raise InvalidJID('Domain started or ended with -')
+                domain_parts.append(label)
+                continue
             try:
                 label = encodings.idna.nameprep(label)
                 encodings.idna.ToASCII(label)
@@ -387,6 +541,164 @@ class UnescapedJID(object):
         return self.__str__()
 
 
+class FrozenJID(object):
+
+    """
+    An immutable, interned JID value.
+
+    The bare and full JID strings and the hash are computed once, when
+    the value is created. Only one :class:`FrozenJID` is kept for each
+    full JID in use, so equal values are usually the same object.
+    A :class:`FrozenJID` compares and hashes equal to its full JID
+    string, so it may be used to look up dictionaries keyed by either.
+
+    Values are created with :func:`freeze`, or read from the
+    :attr:`JID.frozen` attribute of a :class:`JID`.
+
+    Values made by :func:`freeze_trusted` from unvalidated parts are
+    marked as :attr:`trusted`. They, and any values derived from them,
+    are never interned or cached.
+    """
+
+    __slots__ = ('local', 'domain', 'resource', 'bare', 'full', 'trusted',
+                 '_hash', '_bare_jid', '__weakref__')
+
+    def __init__(self, local, domain, resource, trusted=False):
+        setattr = object.__setattr__
+        setattr(self, 'local', local or '')
+        setattr(self, 'domain', domain or '')
+        setattr(self, 'resource', resource or '')
+        setattr(self, 'bare', _format_jid(local, domain))
+        setattr(self, 'full', _format_jid(local, domain, resource))
+        setattr(self, 'trusted', trusted)
+        setattr(self, '_hash', hash(self.full))
+        setattr(self, '_bare_jid', None if resource else self)
+
+    user = username = node = property(lambda self: self.local)
+    server = host = property(lambda self: self.domain)
+    jid = property(lambda self: self.full)
+
+    @property
+    def bare_jid(self):
+        """The :class:`FrozenJID` of the bare JID."""
+        if self._bare_jid is None:
+            if self.trusted:
+                bare = FrozenJID(self.local, self.domain, '', True)
+            else:
+                bare = _intern(self.local, self.domain, '')
+            object.__setattr__(self, '_bare_jid', bare)
+        return self._bare_jid
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenJID values can not be changed.")
+
+    def __delattr__(self, name):
+        raise AttributeError("FrozenJID values can not be changed.")
+
+    def __reduce__(self):
+        if self.trusted:
+            return (freeze_trusted, (self.full,))
+        return (freeze, (self.full,))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __str__(self):
+        return self.full
+
+    def __repr__(self):
+        return 'FrozenJID(%r)' % self.full
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other.__class__ is str:
+            return self.full == other
+        if isinstance(other, FrozenJID):
+            return self.full == other.full
+        if isinstance(other, JID):
+            return self.full == other._jid.full
+        if isinstance(other, UnescapedJID):
+            return False
+        return self.full == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return self.full < str(other)
+
+    def __gt__(self, other):
+        return self.full > str(other)
+
+
+#: Interned :class:`FrozenJID` values, keyed by full JID.
+_interned = weakref.WeakValueDictionary()
+
+#: Values made by parsing a JID string which was already in its
+#: normalized form, keyed by that string. Unlike :data:`_interned`,
+#: only values returned by parsing the key are added, so finding a
+#: string here may safely skip parsing it.
+_parsed = weakref.WeakValueDictionary()
+
+
+def _intern(local, domain, resource):
+    """Return the interned :class:`FrozenJID` for a set of JID parts.
+
+    The parts must already be validated. The value is not added to
+    :data:`_parsed`, so it is not used for JID strings until one is
+    parsed.
+    """
+    full = _format_jid(local, domain, resource)
+    frozen = _interned.get(full)
+    if frozen is None:
+        frozen = _interned.setdefault(full,
+                                      FrozenJID(local, domain, resource))
+    return frozen
+
+
+def freeze(jid):
+    """Return the :class:`FrozenJID` for a JID.
+
+    :param jid: A :class:`JID`, :class:`FrozenJID`, or JID string.
+                ``None`` is treated as an empty JID.
+
+    :raises InvalidJID:
+    """
+    if isinstance(jid, FrozenJID):
+        return jid
+    if isinstance(jid, JID):
+        return jid._jid
+    return JID(jid)._jid
+
+
+def freeze_trusted(jid):
+    """Return the :class:`FrozenJID` for a JID string from a trusted
+    source, such as our own server or component router.
+
+    Known JIDs are found without parsing. Other JIDs are only split
+    into their local, domain, and resource parts, without stringprep
+    or other validation, and are not interned or cached, so that they
+    are never used for JIDs from other sources.
+
+    :param string jid: A string of the form ``'[user@]domain[/resource]'``.
+    """
+    frozen = _interned.get(jid)
+    if frozen is None:
+        bare, _, resource = jid.partition('/')
+        local, at, domain = bare.partition('@')
+        if not at:
+            local, domain = '', local
+        frozen = FrozenJID(local, domain, resource, True)
+    return frozen
+
+
 class JID(object):
 
     """
@@ -410,6 +722,7 @@ class JID(object):
         :server: Alias for ``domain``.
         :host: Alias for ``domain``.
         :resource: The resource portion of the JID.
+        :frozen: The immutable :class:`FrozenJID` value of the JID.
 
     :param string jid:
         A string of the form ``'[user@]domain[/resource]'``.
@@ -432,6 +745,9 @@ class JID(object):
 
     # pylint: disable=W0212
     def __init__(self, jid=None, **kwargs):
+        if jid.__class__ is FrozenJID and not kwargs:
+            object.__setattr__(self, '_jid', jid)
+            return
         locked = kwargs.get('cache_lock', False)
         in_local = kwargs.get('local', None)
         in_domain = kwargs.get('domain', None)
@@ -449,18 +765,31 @@ class JID(object):
                 # it's already good to go, and there are no additions
                 self._jid = jid._jid
                 return
+            if isinstance(jid, FrozenJID):
+                self._jid = jid
+                return
             key = jid
-            self._jid, locked = JID_CACHE.get(jid, (None, locked))
+            self._jid = JID_CACHE.get(jid)
+            if self._jid is None:
+                # A JID already in use, given in its normalized form.
+                self._jid = _parsed.get(jid)
         elif jid is None and parts is not None:
             key = parts
-            self._jid, locked = JID_CACHE.get(parts, (None, locked))
-        if not self._jid:
+            self._jid = JID_CACHE.get(parts)
+        if self._jid is not None and locked:
+            JID_CACHE.add(key, self._jid, pinned=True)
+        if self._jid is None:
+            trusted = False
             if not jid:
                 parsed_jid = (None, None, None)
-            elif not isinstance(jid, JID):
-                parsed_jid = _parse_jid(jid)
+            elif isinstance(jid, JID):
+                parsed_jid = (jid.local, jid.domain, jid.resource)
+                trusted = jid._jid.trusted
+            elif isinstance(jid, FrozenJID):
+                parsed_jid = (jid.local, jid.domain, jid.resource)
+                trusted = jid.trusted
             else:
-                parsed_jid = jid._jid
+                parsed_jid = _parse_jid(jid)
 
             local, domain, resource = parsed_jid
 
@@ -471,9 +800,15 @@ class JID(object):
             if 'resource' in kwargs:
                 resource = _validate_resource(in_resource)
 
-            self._jid = (local, domain, resource)
-            if key:
-                _cache(key, self._jid, locked)
+            if trusted:
+                # Unvalidated parts from a trusted JID stay unvalidated.
+                self._jid = FrozenJID(local, domain, resource, True)
+            else:
+                self._jid = _intern(local, domain, resource)
+                if key:
+                    JID_CACHE.add(key, self._jid, pinned=locked)
+                if key is jid and key == self._jid.full:
+                    _parsed[key] = self._jid
 
     def unescape(self):
         """Return an unescaped JID object.
@@ -486,9 +821,9 @@ class JID(object):
 
         .. versionadded:: 1.1.10
         """
-        return UnescapedJID(_unescape_node(self._jid[0]),
-                            self._jid[1],
-                            self._jid[2])
+        return UnescapedJID(_unescape_node(self._jid.local),
+                            self._jid.domain,
+                            self._jid.resource)
 
     def regenerate(self):
         """No-op
@@ -506,24 +841,20 @@ class JID(object):
         """
         self._jid = JID(data)._jid
 
-    # pylint: disable=R0911
-    def __getattr__(self, name):
-        """Retrieve the given JID component.
+    resource = property(lambda self: self._jid.resource)
+    user = username = local = node = property(lambda self: self._jid.local)
+    server = domain = host = property(lambda self: self._jid.domain)
+    full = jid = property(lambda self: self._jid.full)
+    bare = property(lambda self: self._jid.bare)
 
-        :param name: one of: user, server, domain, resource,
-                     full, or bare.
-        """
-        if name == 'resource':
-            return self._jid[2] or ''
-        elif name in ('user', 'username', 'local', 'node'):
-            return self._jid[0] or ''
-        elif name in ('server', 'domain', 'host'):
-            return self._jid[1] or ''
-        elif name in ('full', 'jid'):
-            return _format_jid(*self._jid)
-        elif name == 'bare':
-            return _format_jid(self._jid[0], self._jid[1])
-        elif name == '_jid':
+    @property
+    def frozen(self):
+        """The immutable :class:`FrozenJID` value of the JID."""
+        return self._jid
+
+    def __getattr__(self, name):
+        """Return ``None`` for unknown attributes."""
+        if name == '_jid':
             return getattr(super(JID, self), '_jid')
         else:
             return None
@@ -549,11 +880,16 @@ class JID(object):
             self._jid = JID(value)._jid
         elif name == 'bare':
             parsed = JID(value)._jid
-            self._jid = (parsed[0], parsed[1], self._jid[2])
+            if self._jid.trusted:
+                self._jid = FrozenJID(parsed.local, parsed.domain,
+                                      self._jid.resource, True)
+            else:
+                self._jid = _intern(parsed.local, parsed.domain,
+                                    self._jid.resource)
 
     def __str__(self):
         """Use the full JID as the string value."""
-        return _format_jid(*self._jid)
+        return self._jid.full
 
     def __repr__(self):
         """Use the full JID as the representation."""
@@ -564,6 +900,10 @@ class JID(object):
         """Two JIDs are equal if they have the same full JID value."""
         if isinstance(other, UnescapedJID):
             return False
+        if isinstance(other, JID):
+            return self._jid == other._jid
+        if isinstance(other, FrozenJID):
+            return self._jid == other
 
         other = JID(other)
         return self._jid == other._jid
@@ -575,7 +915,7 @@ class JID(object):
 
     def __hash__(self):
         """Hash a JID based on the string version of its full JID."""
-        return hash(self.__str__())
+        return self._jid._hash
 
     def __copy__(self):
         """Generate a duplicate JID."""
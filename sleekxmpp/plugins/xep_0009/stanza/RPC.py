@@ -7,7 +7,7 @@
 """
 
 from sleekxmpp.xmlstream.stanzabase import ElementBase
-from xml.etree import cElementTree as ET
+from sleekxmpp.xmlstream import ET
 
 
 class RPCQuery(ElementBase):
@@ -133,7 +133,7 @@ class XEP_0012(BasePlugin):
         if not isinstance(iq, Iq):
             reply = self.xmpp.Iq()
         else:
-            iq.reply()
+            iq = iq.reply()
             reply = iq
 
         if jid not in self._last_activities:
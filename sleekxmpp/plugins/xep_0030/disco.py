@@ -13,6 +13,7 @@ from sleekxmpp.plugins import BasePlugin
 from sleekxmpp.xmlstream.handler import Callback
 from sleekxmpp.xmlstream.matcher import StanzaPath
 from sleekxmpp.xmlstream import register_stanza_plugin, JID
+from sleekxmpp.xmlstream.pending import resolved
 from sleekxmpp.plugins.xep_0030 import stanza, DiscoInfo, DiscoItems
 from sleekxmpp.plugins.xep_0030 import StaticDisco
 
@@ -326,6 +327,9 @@ class XEP_0030(BasePlugin):
                         the reply.
             timeout_callback -- Optional callback to execute when no result 
                         has been received in timeout seconds.
+            future   -- If true, return a future for the result instead
+                        of blocking, which may also be awaited by
+                        coroutines. See Iq.send.
         """
         if local is None:
             if jid is not None and not isinstance(jid, JID):
@@ -347,7 +351,8 @@ class XEP_0030(BasePlugin):
                     kwargs.get('ifrom', None),
                     kwargs)
             info = self._fix_default_info(info)
-            return self._wrap(kwargs.get('ifrom', None), jid, info)
+            info = self._wrap(kwargs.get('ifrom', None), jid, info)
+            return resolved(info) if kwargs.get('future', False) else info
 
         if cached:
             log.debug("Looking up cached disco#info data " + \
@@ -356,7 +361,10 @@ class XEP_0030(BasePlugin):
                     kwargs.get('ifrom', None),
                     kwargs)
             if info is not None:
-                return self._wrap(kwargs.get('ifrom', None), jid, info)
+                info = self._wrap(kwargs.get('ifrom', None), jid, info)
+                if kwargs.get('future', False):
+                    return resolved(info)
+                return info
 
         iq = self.xmpp.Iq()
         # Check dfrom parameter for backwards compatibility
@@ -367,7 +375,8 @@ class XEP_0030(BasePlugin):
         return iq.send(timeout=kwargs.get('timeout', None),
                        block=kwargs.get('block', True),
                        callback=kwargs.get('callback', None),
-                       timeout_callback=kwargs.get('timeout_callback', None))
+                       timeout_callback=kwargs.get('timeout_callback', None),
+                       future=kwargs.get('future', False))
 
     def set_info(self, jid=None, node=None, info=None):
         """
@@ -638,7 +647,7 @@ class XEP_0030(BasePlugin):
                 info['id'] = iq['id']
                 info.send()
             else:
-                iq.reply()
+                iq = iq.reply()
                 if info:
                     info = self._fix_default_info(info)
                     iq.set_payload(info.xml)
@@ -678,7 +687,7 @@ class XEP_0030(BasePlugin):
             if isinstance(items, Iq):
                 items.send()
             else:
-                iq.reply()
+                iq = iq.reply()
                 if items:
                     iq.set_payload(items.xml)
                 iq.send()
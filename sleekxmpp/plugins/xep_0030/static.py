@@ -11,7 +11,7 @@ import threading
 
 from sleekxmpp import Iq
 from sleekxmpp.exceptions import XMPPError, IqError, IqTimeout
-from sleekxmpp.xmlstream import JID
+from sleekxmpp.jid import freeze
 from sleekxmpp.plugins.xep_0030 import DiscoInfo, DiscoItems
 
 
@@ -50,6 +50,19 @@ class StaticDisco(object):
         self.disco = disco
         self.lock = threading.RLock()
 
+    def _key(self, jid, node, ifrom):
+        """
+        Return the key in self.nodes for a JID/node combination.
+
+        JIDs are stored in their immutable form, which compares equal
+        to the full JID string.
+        """
+        if jid is None:
+            jid = self.xmpp.boundjid
+        if node is None:
+            node = ''
+        return (freeze(jid), node, freeze(ifrom or ''))
+
     def add_node(self, jid=None, node=None, ifrom=None):
         """
         Create a new set of stanzas for the provided
@@ -60,47 +73,23 @@ class StaticDisco(object):
             node -- The node that will own the new stanzas.
         """
         with self.lock:
-            if jid is None:
-                jid = self.xmpp.boundjid.full
-            if node is None:
-                node = ''
-            if ifrom is None:
-                ifrom = ''
-            if isinstance(ifrom, JID):
-                ifrom = ifrom.full
-            if (jid, node, ifrom) not in self.nodes:
-                self.nodes[(jid, node, ifrom)] = {'info': DiscoInfo(),
-                                           'items': DiscoItems()}
-                self.nodes[(jid, node, ifrom)]['info']['node'] = node
-                self.nodes[(jid, node, ifrom)]['items']['node'] = node
+            key = self._key(jid, node, ifrom)
+            if key not in self.nodes:
+                self.nodes[key] = {'info': DiscoInfo(),
+                                   'items': DiscoItems()}
+                self.nodes[key]['info']['node'] = key[1]
+                self.nodes[key]['items']['node'] = key[1]
 
     def get_node(self, jid=None, node=None, ifrom=None):
         with self.lock:
-            if jid is None:
-                jid = self.xmpp.boundjid.full
-            if node is None:
-                node = ''
-            if ifrom is None:
-                ifrom = ''
-            if isinstance(ifrom, JID):
-                ifrom = ifrom.full
-            if (jid, node, ifrom) not in self.nodes:
-                self.add_node(jid, node, ifrom)
-            return self.nodes[(jid, node, ifrom)]
+            key = self._key(jid, node, ifrom)
+            if key not in self.nodes:
+                self.add_node(*key)
+            return self.nodes[key]
 
     def node_exists(self, jid=None, node=None, ifrom=None):
         with self.lock:
-            if jid is None:
-                jid = self.xmpp.boundjid.full
-            if node is None:
-                node = ''
-            if ifrom is None:
-                ifrom = ''
-            if isinstance(ifrom, JID):
-                ifrom = ifrom.full
-            if (jid, node, ifrom) not in self.nodes:
-                return False
-            return True
+            return self._key(jid, node, ifrom) in self.nodes
 
     # =================================================================
     # Node Handlers
@@ -142,7 +142,7 @@ class XEP_0047(BasePlugin):
                               self.window_size)
         stream.stream_started.set()
         self.streams[sid] = stream
-        iq.reply()
+        iq = iq.reply()
         iq.send()
 
         self.xmpp.event('ibb_stream_start', stream)
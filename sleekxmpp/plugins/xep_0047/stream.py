@@ -101,7 +101,7 @@ class IBBytestream(object):
         self.xmpp.event('ibb_stream_data', {'stream': self, 'data': data})
 
         if isinstance(stanza, Iq):
-            stanza.reply()
+            stanza = stanza.reply()
             stanza.send()
 
     def recv(self, *args, **kwargs):
@@ -135,7 +135,7 @@ class IBBytestream(object):
         while not self.window_empty.is_set():
             log.info('waiting for send window to empty')
             self.window_empty.wait(timeout=1)
-        iq.reply()
+        iq = iq.reply()
         iq.send()
         self.xmpp.event('ibb_stream_end', self)
 
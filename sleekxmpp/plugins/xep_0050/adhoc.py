@@ -343,7 +343,7 @@ class XEP_0050(BasePlugin):
         for item in payload:
             register_stanza_plugin(Command, item.__class__, iterable=True)
 
-        iq.reply()
+        iq = iq.reply()
         iq['command']['node'] = session['node']
         iq['command']['sessionid'] = session['id']
 
@@ -386,7 +386,7 @@ class XEP_0050(BasePlugin):
             if handler:
                 handler(iq, session)
             del self.sessions[sessionid]
-            iq.reply()
+            iq = iq.reply()
             iq['command']['node'] = node
             iq['command']['sessionid'] = sessionid
             iq['command']['status'] = 'canceled'
@@ -425,7 +425,7 @@ class XEP_0050(BasePlugin):
 
             del self.sessions[sessionid]
 
-            iq.reply()
+            iq = iq.reply()
             iq['command']['node'] = node
             iq['command']['sessionid'] = sessionid
             iq['command']['actions'] = []
@@ -493,6 +493,10 @@ class XEP_0050(BasePlugin):
             callback  -- Optional reference to a stream handler
                          function. Will be executed when a reply
                          stanza is received if flow=False.
+            future    -- If True, return a future for the reply
+                         instead of blocking, which may also be
+                         awaited by coroutines. See Iq.send. May
+                         not be used with flow=True.
         """
         iq = self.xmpp.Iq()
         iq['type'] = 'set'
@@ -510,6 +514,9 @@ class XEP_0050(BasePlugin):
         if not flow:
             return iq.send(**kwargs)
         else:
+            if kwargs.get('future', False):
+                raise ValueError("Command workflows can not be " + \
+                                 "used with future=True")
             if kwargs.get('block', True):
                 try:
                     result = iq.send(**kwargs)
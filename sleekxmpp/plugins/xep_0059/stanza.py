@@ -92,8 +92,7 @@ class Set(ElementBase):
             del fi.attrib['index']
 
     def set_before(self, val):
-        b = self.xml.find("{%s}before" % (self.namespace))
-        if b is None and val is True:
+        if val is True:
             self._set_sub_text('{%s}before' % self.namespace, '', True)
         else:
             self._set_sub_text('{%s}before' % self.namespace, val)
@@ -427,7 +427,8 @@ class XEP_0060(BasePlugin):
         return iq.send(block=block, callback=callback, timeout=timeout)
 
     def publish(self, jid, node, id=None, payload=None, options=None,
-                ifrom=None, block=True, callback=None, timeout=None):
+                ifrom=None, block=True, callback=None, timeout=None,
+                future=False):
         """
         Add a new item to a node, or edit an existing item.
 
@@ -456,6 +457,9 @@ class XEP_0060(BasePlugin):
                         Defaults to sleekxmpp.xmlstream.RESPONSE_TIMEOUT
             callback -- Optional reference to a stream handler function. Will
                         be executed when a reply stanza is received.
+            future   -- If true, return a future for the reply instead of
+                        blocking, which may also be awaited by coroutines.
+                        See Iq.send.
         """
         iq = self.xmpp.Iq(sto=jid, sfrom=ifrom, stype='set')
         iq['pubsub']['publish']['node'] = node
@@ -464,7 +468,8 @@ class XEP_0060(BasePlugin):
         if payload is not None:
             iq['pubsub']['publish']['item']['payload'] = payload
         iq['pubsub']['publish_options'] = options
-        return iq.send(block=block, callback=callback, timeout=timeout)
+        return iq.send(block=block, callback=callback, timeout=timeout,
+                       future=future)
 
     def retract(self, jid, node, id, notify=None, ifrom=None, block=True,
                 callback=None, timeout=None):
@@ -159,7 +159,7 @@ class XEP_0065(base_plugin):
         else:
             raise XMPPError(etype='cancel', condition='item-not-found')
 
-        iq.reply()
+        iq = iq.reply()
         with self._sessions_lock:
             self._sessions[sid] = conn
         iq['socks']['sid'] = sid
@@ -62,7 +62,8 @@ class XEP_0077(BasePlugin):
             if self.xmpp.use_tls or self.xmpp.use_ssl:
                 if 'starttls' not in self.xmpp.features:
                     return stanza
-                elif not isinstance(self.xmpp.socket, ssl.SSLSocket):
+                elif not isinstance(self.xmpp.socket, (ssl.SSLSocket,
+                        getattr(ssl, 'SSLObject', ssl.SSLSocket))):
                     return stanza
             if 'mechanisms' not in self.xmpp.features:
                 log.debug('Forced adding in-band registration stream feature')
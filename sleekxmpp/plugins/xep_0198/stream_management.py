@@ -73,6 +73,7 @@ class XEP_0198(BasePlugin):
         self.window_counter_lock = threading.Lock()
 
         self.enabled = threading.Event()
+        self.tracking = False
         self.unacked_queue = collections.deque()
 
         self.seq_lock = threading.Lock()
@@ -134,7 +135,6 @@ class XEP_0198(BasePlugin):
                     instream=True))
 
         self.xmpp.add_filter('in', self._handle_incoming)
-        self.xmpp.add_filter('out_sync', self._handle_outgoing)
 
         self.xmpp.add_event_handler('session_end', self.session_end)
 
@@ -146,7 +146,7 @@ class XEP_0198(BasePlugin):
         self.xmpp.unregister_feature('sm', self.resume_order)
         self.xmpp.del_event_handler('session_end', self.session_end)
         self.xmpp.del_filter('in', self._handle_incoming)
-        self.xmpp.del_filter('out_sync', self._handle_outgoing)
+        self._track_outgoing(False)
         self.xmpp.remove_handler('Stream Management Enabled')
         self.xmpp.remove_handler('Stream Management Resumed')
         self.xmpp.remove_handler('Stream Management Failed')
@@ -162,12 +162,28 @@ class XEP_0198(BasePlugin):
     def session_end(self, event):
         """Reset stream management state."""
         self.enabled.clear()
+        self._track_outgoing(False)
         self.unacked_queue.clear()
         self.sm_id = None
         self.handled = 0
         self.seq = 0
         self.last_ack = 0
 
+    def _track_outgoing(self, track):
+        """Add or remove the filter that counts outgoing stanzas.
+
+        The filter is only registered while stream management is in
+        use, so that other streams may send stanza templates without
+        creating a stanza object for each recipient. While it is used,
+        stanzas are sent in the order they are counted.
+        """
+        if track and not self.tracking:
+            self.xmpp.add_filter('out_sync', self._handle_outgoing)
+        elif not track and self.tracking:
+            self.xmpp.del_filter('out_sync', self._handle_outgoing)
+        self.xmpp.send_in_order = track
+        self.tracking = track
+
     def send_ack(self):
         """Send the current ack count to the server."""
         ack = stanza.Ack(self.xmpp)
@@ -176,9 +192,12 @@ class XEP_0198(BasePlugin):
         self.xmpp.send_raw(str(ack), now=True)
 
     def request_ack(self, e=None):
-        """Request an ack from the server."""
+        """Request an ack from the server.
+
+        The request is queued behind the stanzas it asks about.
+        """
         req = stanza.RequestAck(self.xmpp)
-        self.xmpp.send_queue.put(str(req))
+        self.xmpp.send_raw(str(req))
 
     def _handle_sm_feature(self, features):
         """
@@ -197,12 +216,14 @@ class XEP_0198(BasePlugin):
         if not self.sm_id:
             if 'bind' in self.xmpp.features:
                 self.enabled.set()
+                self._track_outgoing(True)
                 enable = stanza.Enable(self.xmpp)
                 enable['resume'] = self.allow_resume
                 enable.send(now=True)
                 self.handled = 0
         elif self.sm_id and self.allow_resume:
             self.enabled.set()
+            self._track_outgoing(True)
             resume = stanza.Resume(self.xmpp)
             resume['h'] = self.handled
             resume['previd'] = self.sm_id
@@ -252,6 +273,7 @@ class XEP_0198(BasePlugin):
         Raises an :term:`sm_failed` event.
         """
         self.enabled.clear()
+        self._track_outgoing(False)
         self.unacked_queue.clear()
         self.xmpp.event('sm_failed', stanza)
 
@@ -7,7 +7,7 @@
 """
 
 from sleekxmpp.stanza import Presence
-from sleekxmpp.xmlstream import JID
+from sleekxmpp.jid import freeze
 from sleekxmpp.roster import RosterNode
 
 
@@ -96,9 +96,7 @@ class Roster(object):
         """
         if key is None:
             key = self.xmpp.boundjid
-        if not isinstance(key, JID):
-            key = JID(key)
-        key = key.bare
+        key = freeze(key).bare_jid
 
         if key not in self._rosters:
             self.add(key)
@@ -121,12 +119,9 @@ class Roster(object):
         Arguments:
             node -- The JID for the new roster node.
         """
-        if not isinstance(node, JID):
-            node = JID(node)
-
-        node = node.bare
+        node = freeze(node).bare_jid
         if node not in self._rosters:
-            self._rosters[node] = RosterNode(self.xmpp, node, self.db)
+            self._rosters[node] = RosterNode(self.xmpp, node.bare, self.db)
 
     def set_backend(self, db=None, save=True):
         """
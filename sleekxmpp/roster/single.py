@@ -8,7 +8,7 @@
 
 import threading
 
-from sleekxmpp.xmlstream import JID
+from sleekxmpp.jid import freeze
 from sleekxmpp.roster import RosterItem
 
 
@@ -89,13 +89,9 @@ class RosterNode(object):
 
         A new item entry will be created if one does not already exist.
         """
-        if key is None:
-            key = JID('')
-        if not isinstance(key, JID):
-            key = JID(key)
-        key = key.bare
+        key = freeze(key).bare_jid
         if key not in self._jids:
-            self.add(key, save=True)
+            self.add(key.bare, save=True)
         return self._jids[key]
 
     def __delitem__(self, key):
@@ -104,11 +100,7 @@ class RosterNode(object):
 
         To remove an item from the server, use the remove() method.
         """
-        if key is None:
-            key = JID('')
-        if not isinstance(key, JID):
-            key = JID(key)
-        key = key.bare
+        key = freeze(key).bare_jid
         if key in self._jids:
             del self._jids[key]
 
@@ -189,10 +181,7 @@ class RosterNode(object):
                            if one is used.
                            Defaults to False.
         """
-        if isinstance(jid, JID):
-            key = jid.bare
-        else:
-            key = jid
+        key = freeze(jid).bare_jid
 
         state = {'name': name,
                  'groups': groups or [],
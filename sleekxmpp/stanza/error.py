@@ -68,6 +68,8 @@ class Error(ElementBase):
     condition_ns = 'urn:ietf:params:xml:ns:xmpp-stanzas'
     types = set(('cancel', 'continue', 'modify', 'auth', 'wait'))
 
+    __slots__ = ()
+
     def setup(self, xml=None):
         """
         Populate the stanza object using an optional XML object.
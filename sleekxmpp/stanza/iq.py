@@ -6,10 +6,13 @@
     See the file LICENSE for copying permission.
 """
 
+import copy
+
 from sleekxmpp.stanza.rootstanza import RootStanza
 from sleekxmpp.xmlstream import StanzaBase, ET
 from sleekxmpp.xmlstream.handler import Waiter, Callback
 from sleekxmpp.xmlstream.matcher import MatcherId
+from sleekxmpp.xmlstream.pending import ResponseFuture
 from sleekxmpp.exceptions import IqTimeout, IqError
 
 
@@ -68,6 +71,8 @@ class Iq(RootStanza):
     types = set(('get', 'result', 'set', 'error'))
     plugin_attrib = name
 
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         """
         Initialize a new <iq> stanza with an 'id' value.
@@ -88,10 +93,10 @@ class Iq(RootStanza):
         Overrides StanzaBase.unhandled.
         """
         if self['type'] in ('get', 'set'):
-            self.reply()
-            self['error']['condition'] = 'feature-not-implemented'
-            self['error']['text'] = 'No handlers registered for this request.'
-            self.send()
+            reply = self.reply()
+            reply['error']['condition'] = 'feature-not-implemented'
+            reply['error']['text'] = 'No handlers registered for this request.'
+            reply.send()
 
     def set_payload(self, value):
         """
@@ -154,11 +159,14 @@ class Iq(RootStanza):
             clear -- Indicates if existing content should be
                      removed before replying. Defaults to True.
         """
+        if self.frozen:
+            return copy.copy(self).reply(clear)
         self['type'] = 'result'
         StanzaBase.reply(self, clear)
         return self
 
-    def send(self, block=True, timeout=None, callback=None, now=False, timeout_callback=None):
+    def send(self, block=True, timeout=None, callback=None, now=False,
+             timeout_callback=None, future=False):
         """
         Send an <iq> stanza over the XML stream.
 
@@ -172,6 +180,13 @@ class Iq(RootStanza):
         Using both block and callback is not recommended, and only the
         callback argument will be used in that case.
 
+        Instead of blocking or using a callback, an IqFuture may be
+        requested by using future=True. The future's result will be the
+        reply stanza, or it will raise IqError or IqTimeout. Futures do
+        not register a stream handler or a scheduled task, so they are
+        the most efficient way to keep many requests in flight. They
+        may be used with concurrent.futures.wait and as_completed.
+
         Overrides StanzaBase.send
 
         Arguments:
@@ -190,10 +205,18 @@ class Iq(RootStanza):
                         response has been received with the originally-sent IQ
                         stanza.  Only called if there is a callback parameter
                         (and therefore are in async mode).
+            future   -- Return an IqFuture for the reply instead of
+                        blocking. Takes precedence over block and
+                        callback. Defaults to False.
         """
         if timeout is None:
             timeout = self.stream.response_timeout
-        if callback is not None and self['type'] in ('get', 'set'):
+        if future and self['type'] in ('get', 'set'):
+            result = IqFuture(self)
+            self.stream.pending_requests.add(result, timeout)
+            StanzaBase.send(self, now=now)
+            return result
+        elif callback is not None and self['type'] in ('get', 'set'):
             handler_name = 'IqCallback_%s' % self['id']
             if timeout_callback:
                 self.callback = callback
@@ -263,6 +286,35 @@ class Iq(RootStanza):
         return self
 
 
+class IqFuture(ResponseFuture):
+
+    """
+    A future for the reply to an <iq> stanza sent using
+    Iq.send(future=True).
+
+    The future's result is the 'result' type reply stanza. An 'error'
+    type reply raises IqError, and a missing reply raises IqTimeout.
+
+    Arguments:
+        request -- The Iq stanza that was sent.
+    """
+
+    def accepts(self, stanza):
+        """Only accept 'result' or 'error' <iq> stanzas as replies."""
+        return stanza.name == 'iq' and stanza['type'] in ('result', 'error')
+
+    def resolve(self, stanza):
+        """Complete the future with the reply stanza."""
+        if stanza['type'] == 'error':
+            self.set_exception(IqError(stanza))
+        else:
+            self.set_result(stanza)
+
+    def expire(self):
+        """Fail the future with an IqTimeout exception."""
+        self.set_exception(IqTimeout(self.request))
+
+
 # To comply with PEP8, method names now use underscores.
 # Deprecated method names are re-mapped for backwards compatibility.
 Iq.setPayload = Iq.set_payload
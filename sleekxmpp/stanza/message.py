@@ -6,6 +6,8 @@
     See the file LICENSE for copying permission.
 """
 
+import copy
+
 from sleekxmpp.stanza.rootstanza import RootStanza
 from sleekxmpp.xmlstream import StanzaBase, ET
 
@@ -63,6 +65,8 @@ class Message(RootStanza):
     lang_interfaces = sub_interfaces
     types = set(['normal', 'chat', 'headline', 'error', 'groupchat'])
 
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         """
         Initialize a new <message /> stanza with an optional 'id' value.
@@ -133,6 +137,8 @@ class Message(RootStanza):
             clear -- Indicates if existing content should be removed
                      before replying. Defaults to True.
         """
+        if self.frozen:
+            return copy.copy(self).reply(body, clear)
         thread = self['thread']
         parent = self['parent_thread']
 
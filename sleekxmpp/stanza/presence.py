@@ -6,6 +6,8 @@
     See the file LICENSE for copying permission.
 """
 
+import copy
+
 from sleekxmpp.stanza.rootstanza import RootStanza
 from sleekxmpp.xmlstream import StanzaBase
 
@@ -72,6 +74,8 @@ class Presence(RootStanza):
                  'subscribed', 'unsubscribe', 'unsubscribed'])
     showtypes = set(['dnd', 'chat', 'xa', 'away'])
 
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         """
         Initialize a new <presence /> stanza with an optional 'id' value.
@@ -174,6 +178,8 @@ class Presence(RootStanza):
             clear -- Indicates if the stanza contents should be removed
                      before replying. Defaults to True.
         """
+        if self.frozen:
+            return copy.copy(self).reply(clear)
         if self['type'] == 'unsubscribe':
             self['type'] = 'unsubscribed'
         elif self['type'] == 'subscribe':
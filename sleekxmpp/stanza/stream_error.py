@@ -67,6 +67,8 @@ class StreamError(Error, StanzaBase):
         'unsupported-version'))
     condition_ns = 'urn:ietf:params:xml:ns:xmpp-streams'
 
+    __slots__ = ()
+
     def get_see_other_host(self):
         ns = self.condition_ns
         return self._get_sub_text('{%s}see-other-host' % ns, '')
@@ -125,6 +125,20 @@ class TestLiveSocket(object):
             self.recv_queue.put(data)
         return data
 
+    def recv_into(self, buffer, *args, **kwargs):
+        """
+        Read data from the socket into a buffer.
+
+        Store a copy in the receive queue.
+
+        Arguments:
+            Placeholders. Same as for socket.recv_into.
+        """
+        size = self.socket.recv_into(buffer, *args, **kwargs)
+        with self.recv_queue_lock:
+            self.recv_queue.put(bytes(buffer[:size]))
+        return size
+
     def send(self, data):
         """
         Send data on the socket.
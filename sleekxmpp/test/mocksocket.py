@@ -38,6 +38,7 @@ class TestSocket(object):
         self.send_queue = Queue()
         self.is_live = False
         self.disconnected = False
+        self.recv_pending = b''
 
     def __getattr__(self, name):
         """
@@ -109,6 +110,29 @@ class TestSocket(object):
             raise socket.error
         return self.read(block=True)
 
+    def recv_into(self, buffer, nbytes=0, flags=0):
+        """
+        Read a value from the received queue into a buffer.
+
+        Values longer than the buffer are returned over several calls.
+
+        Arguments:
+            Placeholders. Same as for socket.Socket.recv_into.
+        """
+        if self.disconnected:
+            raise socket.error
+        data = self.recv_pending
+        if not data:
+            data = self.read(block=True)
+            if data is None:
+                return 0
+            if not isinstance(data, bytes):
+                data = data.encode('utf-8')
+        size = min(len(data), nbytes or len(buffer))
+        buffer[:size] = data[:size]
+        self.recv_pending = data[size:]
+        return size
+
     def send(self, data):
         """
         Send data by placing it in the send queue.
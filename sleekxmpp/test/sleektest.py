@@ -330,6 +330,10 @@ class SleekTest(unittest.TestCase):
         # Remove unique ID prefix to make it easier to test
         self.xmpp._id_prefix = ''
         self.xmpp._disconnect_wait_for_threads = False
+
+        # Write each stanza separately so that sent
+        # stanzas may be checked one at a time.
+        self.xmpp.send_batch_bytes = 0
         self.xmpp.default_lang = None
         self.xmpp.peer_default_lang = None
 
@@ -524,9 +528,9 @@ class SleekTest(unittest.TestCase):
             for xml in recv_xml:
                 self.xmpp.socket.recv_data(tostring(xml))
 
-            attrib = recv_xml.attrib
+            attrib = dict(recv_xml.attrib)
             recv_xml.clear()
-            recv_xml.attrib = attrib
+            recv_xml.attrib.update(attrib)
 
         self.failUnless(
             self.compare(xml, recv_xml),
@@ -28,4 +28,32 @@ else:
         import Queue as queue
     Queue = queue.Queue
 
+QueueFull = queue.Full
 QueueEmpty = queue.Empty
+
+
+# =====================================================================
+# Standardize string interning:
+
+if hasattr(sys, 'intern'):
+    intern = sys.intern
+else:
+    import __builtin__
+
+    def intern(text):
+        """Python 2 can only intern byte strings."""
+        if isinstance(text, str):
+            return __builtin__.intern(text)
+        return text
+
+
+# =====================================================================
+# Standardize detection of coroutine functions:
+
+import inspect
+if hasattr(inspect, 'iscoroutinefunction'):
+    iscoroutinefunction = inspect.iscoroutinefunction
+else:
+    def iscoroutinefunction(func):
+        """Coroutine functions require Python 3.5."""
+        return False
@@ -89,6 +89,10 @@ def XOR(x, y):
     :param bytes y: A byte string
     :rtype: bytes
     """
+    if hasattr(int, 'from_bytes'):
+        size = min(len(x), len(y))
+        return (int.from_bytes(x[:size], 'big') ^
+                int.from_bytes(y[:size], 'big')).to_bytes(size, 'big')
     result = b''
     for a, b in zip(x, y):
         if sys.version_info < (3, 0):
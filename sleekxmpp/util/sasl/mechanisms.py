@@ -16,6 +16,7 @@
 import sys
 import hmac
 import random
+import hashlib
 
 from base64 import b64encode, b64decode
 
@@ -25,6 +26,16 @@ from sleekxmpp.util.sasl.client import sasl_mech, Mech, \
                                        SASLMutualAuthFailed
 
 
+#: The number of derived SCRAM keys to remember, so that reconnecting
+#: with an unchanged salt and iteration count does not repeat the
+#: key derivation. A value of 0 disables the cache.
+SCRAM_CACHE_SIZE = 256
+
+#: Maps (hash name, username, password digest, salt, iterations) to
+#: the (salted password, client key, server key) derived from them.
+_scram_keys = {}
+
+
 @sasl_mech(0)
 class ANONYMOUS(Mech):
 
@@ -210,6 +221,12 @@ class SCRAM(Mech):
 
     def Hi(self, text, salt, iterations):
         text = bytes(text)
+        if hasattr(hashlib, 'pbkdf2_hmac'):
+            try:
+                return hashlib.pbkdf2_hmac(self.hash().name, text,
+                                           salt, iterations)
+            except ValueError:
+                pass
         ui1 = self.HMAC(text, salt + b'\0\0\0\01')
         ui = ui1
         for i in range(iterations - 1):
@@ -220,6 +237,31 @@ class SCRAM(Mech):
     def H(self, text):
         return self.hash(text).digest()
 
+    def keys(self, salt, iterations):
+        """
+        Return the salted password, client key, and server key for
+        the current credentials, reusing those derived by an earlier
+        authentication with the same salt and iteration count.
+
+        The password is not kept in the cache key, only its digest.
+        """
+        password = self.credentials['password']
+        key = (self.hash_name,
+               self.credentials['username'],
+               hashlib.sha256(password).digest(),
+               salt, iterations)
+        keys = _scram_keys.get(key)
+        if keys is None:
+            salted_password = self.Hi(password, salt, iterations)
+            keys = (salted_password,
+                    self.HMAC(salted_password, b'Client Key'),
+                    self.HMAC(salted_password, b'Server Key'))
+            if SCRAM_CACHE_SIZE:
+                if len(_scram_keys) >= SCRAM_CACHE_SIZE:
+                    _scram_keys.clear()
+                _scram_keys[key] = keys
+        return keys
+
     def saslname(self, value):
         escaped = b''
         for char in bytes(value):
@@ -292,17 +334,14 @@ class SCRAM(Mech):
         client_final_message_without_proof = channel_binding + b',' + \
                                              b'r=' + nonce
 
-        salted_password = self.Hi(self.credentials['password'],
-                                       salt,
-                                       iteration_count)
-        client_key = self.HMAC(salted_password, b'Client Key')
+        salted_password, client_key, server_key = self.keys(
+                salt, iteration_count)
         stored_key = self.H(client_key)
         auth_message = self.client_first_message_bare + b',' + \
                        challenge + b',' + \
                        client_final_message_without_proof
         client_signature = self.HMAC(stored_key, auth_message)
         client_proof = XOR(client_key, client_signature)
-        server_key = self.HMAC(salted_password, b'Server Key')
 
         self.server_signature = self.HMAC(server_key, auth_message)
 
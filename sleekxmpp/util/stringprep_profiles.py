@@ -16,6 +16,7 @@
 
 from __future__ import unicode_literals
 
+import re
 import sys
 import stringprep
 import unicodedata
@@ -23,6 +24,12 @@ import unicodedata
 from sleekxmpp.util import unicode
 
 
+if sys.version_info >= (3, 7):
+    _is_ascii = str.isascii
+else:
+    _is_ascii = lambda data: not re.search('[^\x00-\x7f]', data)
+
+
 class StringPrepError(UnicodeError):
     pass
 
@@ -113,10 +120,44 @@ def check_bidi(data):
         raise StringPrepError("BIDI violation: section 6 (3)")
 
 
+def _ascii_rules(nfkc, bidi, mappings, prohibited, unassigned):
+    """Find how a profile treats each ASCII character.
+
+    Returns a translation table for the ASCII characters changed by
+    the profile's mappings, and a compiled pattern matching the ASCII
+    characters the profile prohibits. If an ASCII character would be
+    mapped to a non-ASCII string, ``None`` is returned, since such
+    strings need the full profile.
+    """
+    table = {}
+    banned = []
+    for code in range(128):
+        char = chr(code) if sys.version_info >= (3, 0) else unichr(code)
+        mapped = normalize(map_input(char, mappings or []), nfkc)
+        if not _is_ascii(mapped):
+            return None
+        if mapped != char:
+            table[code] = mapped
+        try:
+            prohibit_output(mapped, prohibited or [])
+            if bidi:
+                check_bidi(mapped)
+        except StringPrepError:
+            banned.append(char)
+    pattern = '[%s]' % re.escape(''.join(banned)) if banned else '(?!)'
+    return table, re.compile(pattern).search
+
+
 def create(nfkc=True, bidi=True, mappings=None,
-           prohibited=None, unassigned=None):
+           prohibited=None, unassigned=None, cache_size=0):
     """Create a profile of stringprep.
 
+    Strings containing only ASCII characters are checked in a single
+    pass, using rules for each ASCII character found when the profile
+    is created. Results may also be kept for reuse, which should only
+    be done for profiles that are not used on secrets such as
+    passwords.
+
     :param bool nfkc:
         If `True`, perform NFKC Unicode normalization. Defaults to `True`.
     :param bool bidi:
@@ -130,16 +171,23 @@ def create(nfkc=True, bidi=True, mappings=None,
     :param list unassigned:
         Optional list of functions for detecting the use of unassigned
         code points.
+    :param int cache_size:
+        The number of results to keep for reuse, or ``0`` to not
+        keep any. Defaults to ``0``.
 
     :raises: StringPrepError
     :return: Unicode string of the resulting text passing the
              profile's requirements.
     """
-    def profile(data, query=False):
-        try:
-            data = unicode(data)
-        except UnicodeError:
-            raise StringPrepError
+    ascii_rules = _ascii_rules(nfkc, bidi, mappings, prohibited, unassigned)
+    cache = {}
+
+    def prepare(data, query):
+        if ascii_rules is not None and _is_ascii(data):
+            table, banned = ascii_rules
+            if banned(data):
+                raise StringPrepError("Prohibited code point in: %s" % data)
+            return data.translate(table) if table else data
 
         data = map_input(data, mappings)
         data = normalize(data, nfkc)
@@ -149,4 +197,24 @@ def create(nfkc=True, bidi=True, mappings=None,
         if query and unassigned:
             check_unassigned(data, unassigned)
         return data
+
+    def profile(data, query=False):
+        try:
+            data = unicode(data)
+        except UnicodeError:
+            raise StringPrepError
+
+        if not cache_size or query:
+            return prepare(data, query)
+        try:
+            return cache[data]
+        except KeyError:
+            result = prepare(data, query)
+            if len(cache) >= cache_size:
+                cache.clear()
+            cache[data] = result
+            return result
+
+    #: The results kept for reuse, keyed by input string.
+    profile.cache = cache
     return profile
@@ -10,10 +10,10 @@ from sleekxmpp.jid import JID
 from sleekxmpp.xmlstream.scheduler import Scheduler
 from sleekxmpp.xmlstream.stanzabase import StanzaBase, ElementBase, ET
 from sleekxmpp.xmlstream.stanzabase import register_stanza_plugin
-from sleekxmpp.xmlstream.tostring import tostring
+from sleekxmpp.xmlstream.tostring import tostring, tobytes
 from sleekxmpp.xmlstream.xmlstream import XMLStream, RESPONSE_TIMEOUT
 from sleekxmpp.xmlstream.xmlstream import RestartStream
 
 __all__ = ['JID', 'Scheduler', 'StanzaBase', 'ElementBase',
-           'ET', 'StateMachine', 'tostring', 'XMLStream',
+           'ET', 'StateMachine', 'tostring', 'tobytes', 'XMLStream',
            'RESPONSE_TIMEOUT', 'RestartStream']
@@ -0,0 +1,759 @@
+# -*- coding: utf-8 -*-
+"""
+    sleekxmpp.xmlstream.aio
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module allows running XML streams on an :mod:`asyncio` event
+    loop, so that many streams may share a single loop instead of
+    each using its own reader, sender, scheduler, and event runner
+    threads. Requires Python 3.7 or later.
+
+    Part of SleekXMPP: The Sleek XMPP Library
+
+    :copyright: (c) 2011 Nathanael C. Fritz
+    :license: MIT, see LICENSE for more details
+"""
+
+import asyncio
+import collections
+import logging
+import random
+import ssl
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from xml.parsers.expat import ExpatError
+
+from sleekxmpp.xmlstream import cert
+from sleekxmpp.xmlstream.scheduler import Task
+
+
+log = logging.getLogger(__name__)
+
+
+#: The number of threads in the pool shared by all asyncio streams
+#: for running stream and event handlers.
+HANDLER_POOL_SIZE = 32
+
+#: The maximum number of queued events a stream may run on a pool
+#: thread before yielding the thread to other streams.
+HANDLER_BATCH_SIZE = 64
+
+
+_shared_executor = None
+_shared_loop = None
+_shared_lock = threading.Lock()
+
+
+def shared_executor():
+    """Return the thread pool shared by all asyncio streams for
+    running handlers, creating it if needed."""
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(
+                    max_workers=HANDLER_POOL_SIZE,
+                    thread_name_prefix='sleekxmpp_handler')
+        return _shared_executor
+
+
+def shared_loop():
+    """Return an event loop running in a background thread, which is
+    shared by all threaded streams for running coroutine handlers,
+    starting it if needed."""
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            _shared_loop = asyncio.new_event_loop()
+            thread = threading.Thread(name='sleekxmpp_loop',
+                                      target=_shared_loop.run_forever)
+            thread.daemon = True
+            thread.start()
+        return _shared_loop
+
+
+class EventQueue(object):
+
+    """
+    A replacement for a stream's event queue which runs queued stream
+    handlers, events, and scheduled tasks on a shared executor.
+
+    Items for one stream are run in the order they were queued, and
+    never by more than one thread at a time, just as with a single
+    event runner thread.
+
+    :param stream: The :class:`~sleekxmpp.xmlstream.xmlstream.XMLStream`
+                   processing the events.
+    :param executor: The :class:`concurrent.futures.Executor` to use.
+    """
+
+    def __init__(self, stream, executor):
+        self.stream = stream
+        self.executor = executor
+        self.items = collections.deque()
+        self.lock = threading.Lock()
+        self.running = False
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item, block=True, timeout=None):
+        """Queue an event to run.
+
+        :param item: A ``(type, handler, args...)`` event queue item.
+        """
+        if item[0] == 'quit':
+            return
+        with self.lock:
+            self.items.append(item)
+            if self.running:
+                return
+            self.running = True
+        self.executor.submit(self._run)
+
+    def _run(self):
+        """Run a batch of queued events."""
+        for _ in range(HANDLER_BATCH_SIZE):
+            with self.lock:
+                if not self.items:
+                    self.running = False
+                    return
+                item = self.items.popleft()
+            try:
+                self.stream._run_event(item)
+            except Exception as e:
+                log.exception('Error processing event queue')
+                self.stream.exception(e)
+        # Let other streams use the thread before continuing.
+        self.executor.submit(self._run)
+
+
+class SendQueue(object):
+
+    """
+    A replacement for a stream's send queue which passes data to
+    the stream's :class:`AsyncioTransport`.
+
+    :param transport: The :class:`AsyncioTransport` for the stream.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def put(self, data, block=True, timeout=None, lane=None):
+        self.transport.send(data)
+
+    def qsize(self):
+        return len(self.transport.pending)
+
+    def empty(self):
+        return not self.transport.pending
+
+    def task_done(self):
+        pass
+
+    def join(self):
+        pass
+
+
+class SessionEvent(threading.Event):
+
+    """
+    A replacement for a stream's ``session_started_event`` which
+    sends any data that was waiting for the session to start.
+
+    :param transport: The :class:`AsyncioTransport` for the stream.
+    """
+
+    def __init__(self, transport):
+        threading.Event.__init__(self)
+        self.transport = transport
+
+    def set(self):
+        threading.Event.set(self)
+        self.transport._call(self.transport._flush)
+
+
+class AsyncioScheduler(object):
+
+    """
+    A scheduler providing the same interface as
+    :class:`~sleekxmpp.xmlstream.scheduler.Scheduler`, but which runs
+    tasks using the timers of an :mod:`asyncio` event loop instead of
+    a dedicated thread. Tasks may be added and removed from any thread.
+
+    :param loop: The :mod:`asyncio` event loop to use.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+
+        #: A ``[task, timer]`` entry for each scheduled task, by name.
+        self.tasks = {}
+
+        #: A flag indicating that the scheduler is running.
+        self.run = True
+
+        #: Lock for accessing :attr:`tasks`.
+        self.schedule_lock = threading.RLock()
+
+    def process(self, threaded=True, daemon=False):
+        """Begin processing scheduled tasks."""
+        self.run = True
+
+    def add(self, name, seconds, callback, args=None,
+            kwargs=None, repeat=False, qpointer=None):
+        """Schedule a new task.
+
+        :param string name: The name of the task.
+        :param int seconds: The number of seconds to wait before executing.
+        :param callback: The function to execute.
+        :param tuple args: The arguments to pass to the callback.
+        :param dict kwargs: The keyword arguments to pass to the callback.
+        :param bool repeat: Indicates if the task should repeat.
+                            Defaults to ``False``.
+        :param pointer: A pointer to an event queue for queuing callback
+                        execution instead of executing immediately.
+        """
+        entry = [Task(name, seconds, callback, args,
+                      kwargs, repeat, qpointer), None]
+        with self.schedule_lock:
+            if name in self.tasks:
+                raise ValueError("Key %s already exists" % name)
+            self.tasks[name] = entry
+        _call_soon(self.loop, self._arm, entry)
+
+    def remove(self, name):
+        """Remove a scheduled task ahead of schedule, and without
+        executing it.
+
+        :param string name: The name of the task to remove.
+        """
+        with self.schedule_lock:
+            entry = self.tasks.pop(name, None)
+        if entry is not None:
+            _call_soon(self.loop, self._cancel, entry)
+
+    def quit(self):
+        """Shutdown the scheduler, cancelling all tasks."""
+        with self.schedule_lock:
+            self.run = False
+            entries = list(self.tasks.values())
+            self.tasks.clear()
+        for entry in entries:
+            _call_soon(self.loop, self._cancel, entry)
+
+    def _arm(self, entry):
+        """Start the loop timer for a task."""
+        task = entry[0]
+        with self.schedule_lock:
+            if self.tasks.get(task.name) is not entry:
+                return
+            entry[1] = self.loop.call_later(max(task.next - time.time(), 0),
+                                            self._fire, entry)
+
+    def _cancel(self, entry):
+        """Stop the loop timer for a removed task."""
+        if entry[1] is not None:
+            entry[1].cancel()
+
+    def _fire(self, entry):
+        """Run a task once its timer expires."""
+        task = entry[0]
+        with self.schedule_lock:
+            if self.tasks.get(task.name) is not entry:
+                return
+        try:
+            repeat = task.run()
+        except Exception:
+            log.exception('Error running scheduled task %s', task.name)
+            repeat = False
+        with self.schedule_lock:
+            if self.tasks.get(task.name) is entry:
+                if repeat:
+                    self._arm(entry)
+                else:
+                    del self.tasks[task.name]
+
+
+class AsyncioTransport(asyncio.Protocol):
+
+    """
+    Runs an :class:`~sleekxmpp.xmlstream.xmlstream.XMLStream` on an
+    :mod:`asyncio` event loop.
+
+    Connecting, reading and incrementally parsing the stream, sending,
+    TLS negotiation, and the stream's scheduled tasks (such as the
+    whitespace keepalive) are all done by the loop, which may be
+    shared by any number of streams. Stream handlers, custom event
+    handlers and scheduled callbacks are run in order for each stream
+    using a thread pool, so that existing handlers and plugins which
+    block waiting for responses keep working.
+
+    Handlers marked to run ``instream``, and events triggered with
+    ``direct=True`` while processing the stream, run on the loop
+    itself and must not block. In particular, blocking calls such as
+    ``Iq.send(block=True)`` must not be made from the loop; use
+    callbacks or ``Iq.send(future=True)`` instead.
+
+    Created by :meth:`~sleekxmpp.xmlstream.xmlstream.XMLStream.use_asyncio`::
+
+        loop = asyncio.new_event_loop()
+        for jid, password in accounts:
+            xmpp = sleekxmpp.ClientXMPP(jid, password)
+            xmpp.use_asyncio(loop)
+            xmpp.connect()
+            xmpp.process()
+        loop.run_forever()
+
+    Connecting through an HTTP proxy is not supported.
+
+    :param stream: The :class:`~sleekxmpp.xmlstream.xmlstream.XMLStream`
+                   to run.
+    :param loop: The :mod:`asyncio` event loop to use. Defaults to
+                 the running event loop, or else a new event loop,
+                 which is available as :attr:`loop`.
+    :param executor: A :class:`concurrent.futures.Executor` for running
+                     handlers. Defaults to a thread pool shared by all
+                     streams.
+    """
+
+    def __init__(self, stream, loop=None, executor=None):
+        self.stream = stream
+        self.loop = loop or _running_loop() or asyncio.new_event_loop()
+        self.executor = executor or shared_executor()
+
+        #: The :mod:`asyncio` transport for the current connection.
+        self.connection = None
+
+        #: The incremental parser for the current incoming stream.
+        self.parser = None
+
+        #: Data waiting to be sent once the session starts.
+        self.pending = collections.deque()
+
+        self.processing = False
+        self.closing = False
+        self.upgrading = False
+        self.reconnecting = False
+        self._close_timer = None
+        self._connecting = None
+        self._owns_loop = False
+
+        stream.loop = self.loop
+        stream.event_queue = EventQueue(stream, self.executor)
+        stream.send_queue = SendQueue(self)
+        stream.scheduler = AsyncioScheduler(self.loop)
+        stream.session_started_event = SessionEvent(self)
+
+    def _call(self, func, *args):
+        """Run a function on the loop, immediately if already
+        running on the loop."""
+        _call_soon(self.loop, func, *args)
+
+    def process(self, block=False):
+        """Begin processing the stream once connected.
+
+        :param bool block: If ``True``, and the loop is not already
+                           running, run the loop until the stream
+                           is stopped.
+        """
+        self._call(self._process)
+        if block and not self.loop.is_running():
+            self._owns_loop = True
+            try:
+                self.loop.run_forever()
+            finally:
+                self._owns_loop = False
+
+    def _process(self):
+        self.processing = True
+        if self.connection is not None and self.parser is None \
+           and not self.upgrading:
+            self._open_stream()
+
+    def connect(self, reattempt=True):
+        """Start connecting to the server.
+
+        Returns ``True`` once the connection attempt is scheduled;
+        failures are reported using the ``'socket_error'`` and
+        ``'connection_failed'`` events.
+
+        :param reattempt: Flag indicating if connecting should be
+                          retried after errors.
+        """
+        if self.stream.use_proxy:
+            raise ValueError("HTTP proxies are not supported " + \
+                             "when using asyncio.")
+        self._call(self._start_connecting, reattempt)
+        return True
+
+    def _start_connecting(self, reattempt):
+        if self._connecting is not None and not self._connecting.done():
+            return
+        self._connecting = self.loop.create_task(self._connect(reattempt))
+
+    async def _connect(self, reattempt):
+        stream = self.stream
+        attempts = stream.reconnect_max_attempts
+        while not stream.stop.is_set():
+            if await self._attempt(reattempt):
+                return True
+            if not reattempt:
+                break
+            if attempts is not None:
+                attempts -= 1
+                if attempts <= 0:
+                    stream.event('connection_failed', direct=True)
+                    break
+        return False
+
+    async def _attempt(self, reattempt):
+        """Make a single connection attempt."""
+        stream = self.stream
+        stream.scheduler.remove('Session timeout check')
+
+        if stream.reconnect_delay is None or not reattempt:
+            delay = 1.0
+        else:
+            delay = min(stream.reconnect_delay * 2,
+                        stream.reconnect_max_delay)
+            delay = random.normalvariate(delay, delay * 0.1)
+            log.debug('Waiting %s seconds before connecting.', delay)
+            await asyncio.sleep(delay)
+            if stream.stop.is_set():
+                return False
+        if reattempt:
+            stream.reconnect_delay = delay
+
+        if stream.default_domain:
+            answer = await self.loop.run_in_executor(None,
+                                                     self._pick_dns_answer)
+            if answer is None:
+                log.debug("No remaining DNS records to try.")
+                stream.dns_answers = None
+                return False
+            host, address, port = answer
+            stream.address = (address, port)
+            stream._service_name = host
+
+        host, port = stream.address
+        log.debug("Connecting to %s:%s",
+                  '[%s]' % host if ':' in host else host, port)
+        kwargs = {}
+        stream.ssl_handshake_time = None
+        stream.ssl_session_reused = False
+        if stream.use_ssl:
+            kwargs['ssl'] = stream.get_ssl_context(ssl.PROTOCOL_SSLv23)
+            kwargs['server_hostname'] = stream._expected_server_name or host
+        try:
+            await self.loop.create_connection(lambda: self,
+                                              host, port, **kwargs)
+        except ssl.SSLError:
+            log.error('CERT: Invalid certificate trust chain.')
+            if stream.event_handled('ssl_invalid_chain'):
+                stream.event('ssl_invalid_chain', direct=True)
+            return False
+        except OSError as serr:
+            stream.event('socket_error', serr, direct=True)
+            log.error("Could not connect to %s:%s. Socket Error #%s: %s",
+                      host, port, serr.errno, serr.strerror)
+            return False
+
+        if stream.use_ssl and not self._check_cert():
+            self.connection.abort()
+            return False
+
+        stream.state._set_state('connected')
+        if stream.use_ssl:
+            stream.event('connected',
+                         {'ssl_handshake_time': stream.ssl_handshake_time,
+                          'ssl_session_reused': stream.ssl_session_reused},
+                         direct=True)
+        else:
+            stream.event('connected', direct=True)
+        if self.processing:
+            self._open_stream()
+        return True
+
+    def _pick_dns_answer(self):
+        """Find the next server address to try, or ``None``."""
+        stream = self.stream
+        try:
+            return stream.pick_dns_answer(stream.default_domain,
+                                          stream.address[1])
+        except StopIteration:
+            return None
+
+    def _check_cert(self):
+        """Check the server's certificate for the current connection.
+
+        Returns ``False`` if the certificate is invalid and no
+        ``'ssl_invalid_cert'`` handler accepted it.
+        """
+        stream = self.stream
+        ssl_object = self.connection.get_extra_info('ssl_object')
+        stream.ssl_session_reused = ssl_object.session_reused
+        stream._der_cert = ssl_object.getpeercert(binary_form=True)
+        pem_cert = ssl.DER_cert_to_PEM_cert(stream._der_cert)
+        log.debug('CERT: %s', pem_cert)
+        stream.event('ssl_cert', pem_cert, direct=True)
+
+        try:
+            cert.verify(stream._expected_server_name, stream._der_cert)
+        except cert.CertificateError as err:
+            if not stream.event_handled('ssl_invalid_cert'):
+                log.error(err)
+                return False
+            stream.event('ssl_invalid_cert', pem_cert, direct=True)
+        return True
+
+    def start_tls(self):
+        """Upgrade the connection to use TLS.
+
+        The handshake completes in the background, after which a new
+        stream is opened. Returns ``True`` if the upgrade was started.
+        """
+        if self.connection is None:
+            return False
+        self.upgrading = True
+        asyncio.run_coroutine_threadsafe(self._start_tls(), self.loop)
+        return True
+
+    async def _start_tls(self):
+        stream = self.stream
+        context = stream.get_ssl_context()
+        start = time.time()
+        try:
+            connection = await self.loop.start_tls(
+                    self.connection, self, context,
+                    server_hostname=stream._expected_server_name or None)
+        except (OSError, ssl.SSLError):
+            self.upgrading = False
+            log.error('CERT: Invalid certificate trust chain.')
+            if not stream.event_handled('ssl_invalid_chain'):
+                self._disconnect(stream.auto_reconnect, send_close=False)
+            else:
+                stream.event('ssl_invalid_chain', direct=True)
+            return
+
+        stream.ssl_handshake_time = time.time() - start
+        self.connection = connection
+        stream.socket = connection.get_extra_info('ssl_object')
+        self.upgrading = False
+        if not self._check_cert():
+            self._disconnect(stream.auto_reconnect, send_close=False)
+        elif self.processing:
+            self._open_stream()
+
+    def _open_stream(self):
+        """Start parsing a new incoming stream, and send the stream
+        header unless the session has already started."""
+        stream = self.stream
+        stream.reset_parser()
+        self.parser = stream._parser
+        if not stream.session_started_event.is_set():
+            self._send(stream.stream_header, True)
+
+    def connection_made(self, connection):
+        self.connection = connection
+        self.parser = None
+        self.closing = False
+        self.stream.socket = connection.get_extra_info('ssl_object') or \
+                             connection.get_extra_info('socket')
+
+    def data_received(self, data):
+        stream = self.stream
+        if self.parser is None:
+            log.debug('Discarding data received before stream start.')
+            return
+        try:
+            result = stream.feed_xml(data)
+            if result is True:
+                # Any remaining events belong to the old stream.
+                if self.upgrading:
+                    self.parser = None
+                else:
+                    self._open_stream()
+            elif result is False:
+                self._stream_ended()
+        except (SyntaxError, ExpatError) as e:
+            log.error("Error reading from XML stream.")
+            stream.exception(e)
+            self._disconnect(stream.auto_reconnect, send_close=False)
+        except Exception as e:
+            log.error('Connection error.')
+            stream.exception(e)
+            self._disconnect(stream.auto_reconnect, send_close=False)
+
+    def _stream_ended(self):
+        """Handle the server closing its stream."""
+        self.parser = None
+        if self.closing:
+            self._close()
+        else:
+            self._disconnect(self.stream.auto_reconnect)
+
+    def connection_lost(self, exc):
+        stream = self.stream
+        if self._close_timer is not None:
+            self._close_timer.cancel()
+            self._close_timer = None
+        closing = self.closing
+        self.connection = None
+        self.parser = None
+        self.closing = False
+        self.upgrading = False
+        stream.socket = None
+
+        if self._connecting is not None and not self._connecting.done():
+            # The connection was rejected while connecting, which will
+            # be retried as needed.
+            return
+
+        if exc is not None:
+            stream.event('socket_error', exc, direct=True)
+            log.error('Connection lost: %s', exc)
+        if not closing and stream.end_session_on_disconnect:
+            stream.event('session_end', direct=True)
+        stream.session_started_event.clear()
+        stream.stream_end_event.set()
+        stream.state._set_state('disconnected')
+        stream.event('disconnected', direct=True)
+
+        reconnect = self.reconnecting
+        self.reconnecting = False
+        if not stream.stop.is_set() and (reconnect or stream.auto_reconnect):
+            self._start_connecting(True)
+        else:
+            stream.stop.set()
+            stream.scheduler.quit()
+            if self._owns_loop:
+                self.loop.stop()
+
+    def send(self, data, now=False):
+        """Send data on the stream.
+
+        Data is sent in order from any thread. Unless ``now`` is used,
+        data is held until the session has started.
+
+        :param data: The string or UTF-8 encoded bytes to send.
+        :param bool now: Send the data immediately, even if the
+                         session has not yet started.
+        """
+        self._call(self._send, data, now)
+
+    def _send(self, data, now):
+        if now:
+            self._write(data, "SEND (IMMED): %s")
+        elif self.pending or self.connection is None or \
+             not self.stream.session_started_event.is_set():
+            self.pending.append(data)
+        else:
+            self._write(data)
+
+    def _flush(self):
+        """Send data that was waiting for the session to start."""
+        while self.pending and self.connection is not None and \
+              self.stream.session_started_event.is_set():
+            self._write(self.pending.popleft())
+
+    def _write(self, data, message="SEND: %s"):
+        if isinstance(data, bytes):
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(message, data.decode('utf-8'))
+        else:
+            log.debug(message, data)
+            data = data.encode('utf-8')
+        if self.connection is None or self.connection.is_closing():
+            log.warning("Failed to send %s", data)
+            return
+        self.connection.write(data)
+
+    def disconnect(self, reconnect=False, wait=None, send_close=True):
+        """Close the stream, waiting up to four seconds for the server
+        to close its stream before closing the connection.
+
+        Data already passed to :meth:`send` is always sent before the
+        stream is closed, so ``wait`` has no effect.
+
+        :param reconnect: Flag indicating if the connection
+                          and processing should be restarted.
+        :param wait: Ignored.
+        :param send_close: Flag indicating if the stream footer
+                           should be sent.
+        """
+        self._call(self._disconnect, reconnect, send_close)
+
+    def _disconnect(self, reconnect=False, send_close=True):
+        stream = self.stream
+        if self.connection is None or self.closing:
+            return
+        if not reconnect:
+            stream.auto_reconnect = False
+        if stream.end_session_on_disconnect or send_close:
+            stream.event('session_end', direct=True)
+        stream.session_started_event.clear()
+        self.closing = True
+
+        if send_close:
+            self._send(stream.stream_footer, True)
+            if not stream.stream_end_event.is_set():
+                log.info('Waiting for %s from server', stream.stream_footer)
+                self._close_timer = self.loop.call_later(4, self._close)
+                return
+        else:
+            stream.stream_end_event.set()
+        self._close()
+
+    def _close(self):
+        self._close_timer = None
+        if self.connection is not None:
+            self.connection.close()
+
+    def reconnect(self, reattempt=True, wait=False, send_close=True):
+        """Close the stream if connected, and connect again."""
+        self._call(self._reconnect, reattempt, send_close)
+        return True
+
+    def _reconnect(self, reattempt, send_close):
+        if self.connection is not None:
+            self.reconnecting = True
+            self._disconnect(True, send_close)
+        else:
+            self._start_connecting(reattempt)
+
+    def abort(self):
+        """Close the connection immediately and stop the stream."""
+        self._call(self._abort)
+
+    def _abort(self):
+        stream = self.stream
+        stream.session_started_event.clear()
+        stream.stop.set()
+        stream.scheduler.quit()
+        if self._connecting is not None:
+            self._connecting.cancel()
+        if self.connection is not None:
+            self.closing = True
+            self.connection.abort()
+        stream.state._set_state('disconnected')
+        stream.event('killed', direct=True)
+
+
+def _running_loop():
+    """Return the event loop running in the current thread, if any."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _call_soon(loop, func, *args):
+    """Run a function on a loop, immediately if called from the
+    loop's own thread."""
+    if _running_loop() is loop:
+        func(*args)
+    else:
+        loop.call_soon_threadsafe(func, *args)
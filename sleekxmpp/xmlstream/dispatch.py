@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+    sleekxmpp.xmlstream.dispatch
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides an index of stream handlers that allows
+    finding the handlers that may match a stanza without testing
+    every registered handler.
+
+    Part of SleekXMPP: The Sleek XMPP Library
+
+    :copyright: (c) 2011 Nathanael C. Fritz
+    :license: MIT, see LICENSE for more details
+"""
+
+import logging
+import threading
+
+
+log = logging.getLogger(__name__)
+
+
+class HandlerIndex(object):
+
+    """
+    An ordered collection of stream handlers, bucketed by the keys
+    returned by each handler's matcher
+    (see :meth:`~sleekxmpp.xmlstream.matcher.base.MatcherBase.index_keys`).
+
+    Handlers whose matchers can not be indexed are kept in a separate
+    group that is checked for every stanza. The handlers returned by
+    :meth:`candidates` are always ordered by their priority, which is
+    the registration order unless the ``before`` or ``after`` options
+    of :meth:`add` were used.
+
+    Handlers with the ID keys used by :class:`~sleekxmpp.stanza.Iq`
+    callbacks and waiters are found with a single dictionary lookup,
+    so the cost of dispatching a stanza does not depend on the number
+    of requests awaiting a response.
+    """
+
+    def __init__(self):
+        #: The sort position of each registered handler.
+        self._rank = {}
+
+        #: The next sort position to use for appended handlers.
+        self._next_rank = 0
+
+        #: Registered handlers, mapped by name. Handler names are
+        #: not required to be unique.
+        self._names = {}
+
+        #: The index keys used for each registered handler.
+        self._keys = {}
+
+        #: Handlers for stanzas with a given ID.
+        self._ids = {}
+
+        #: Handlers for stanzas with a given root XML tag.
+        self._tags = {}
+
+        #: Handlers for stanzas with a given root XML tag and a child
+        #: element in a given namespace.
+        self._children = {}
+
+        #: Handlers for stanzas with a given name, and then
+        #: by a given stanza type.
+        self._stanza_names = {}
+
+        #: Handlers that must be checked against every stanza.
+        self._unindexed = {}
+
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._rank)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(sorted(self._rank, key=self._rank.get))
+
+    def add(self, handler, before=None, after=None):
+        """Add a handler to the index.
+
+        :param handler: The handler object to add.
+        :param before: The name of a registered handler that the new
+                       handler must be checked before.
+        :param after: The name of a registered handler that the new
+                      handler must be checked after.
+        """
+        with self._lock:
+            self._rank[handler] = self._find_rank(before, after)
+            self._names.setdefault(handler.name, []).append(handler)
+
+            matcher = getattr(handler, '_matcher', None)
+            keys = None
+            if hasattr(matcher, 'index_keys'):
+                keys = matcher.index_keys()
+            self._keys[handler] = keys
+            if not keys:
+                self._unindexed[handler] = None
+            for key in keys or ():
+                self._bucket(key, True)[handler] = None
+
+    def remove(self, name):
+        """Remove the first registered handler with the given name.
+
+        Returns ``True`` if a handler was removed.
+
+        :param name: The name of the handler.
+        """
+        with self._lock:
+            handlers = self._names.get(name)
+            if not handlers:
+                return False
+            return self.discard(handlers[0])
+
+    def discard(self, handler):
+        """Remove a specific handler object from the index.
+
+        Returns ``True`` if the handler was registered.
+
+        :param handler: The handler object to remove.
+        """
+        with self._lock:
+            if handler not in self._rank:
+                return False
+            del self._rank[handler]
+
+            handlers = self._names[handler.name]
+            handlers.remove(handler)
+            if not handlers:
+                del self._names[handler.name]
+
+            keys = self._keys.pop(handler)
+            if not keys:
+                del self._unindexed[handler]
+            for key in keys or ():
+                bucket = self._bucket(key)
+                bucket.pop(handler, None)
+                if not bucket:
+                    self._drop_bucket(key)
+            return True
+
+    def candidates(self, stanza):
+        """Return, in priority order, the handlers that may match
+        the given stanza.
+
+        The returned handlers must still be checked by calling
+        their ``match`` method.
+
+        :param stanza: The :class:`~sleekxmpp.xmlstream.stanzabase.ElementBase`
+                       object to find handlers for.
+        """
+        with self._lock:
+            found = dict(self._unindexed)
+            if self._ids:
+                bucket = self._ids.get(stanza['id'])
+                if bucket:
+                    found.update(bucket)
+            if self._tags:
+                bucket = self._tags.get(stanza.xml.tag)
+                if bucket:
+                    found.update(bucket)
+            if self._children:
+                tag = stanza.xml.tag
+                for child in stanza.xml:
+                    child_tag = child.tag
+                    # Comments and processing instructions have a
+                    # function as their tag.
+                    if callable(child_tag):
+                        continue
+                    if child_tag[:1] == '{':
+                        namespace = child_tag[1:].split('}', 1)[0]
+                    else:
+                        namespace = ''
+                    bucket = self._children.get((tag, namespace))
+                    if bucket:
+                        found.update(bucket)
+            types = self._stanza_names.get(stanza.name)
+            if types:
+                bucket = types.get(None)
+                if bucket:
+                    found.update(bucket)
+                if len(types) > 1 or bucket is None:
+                    bucket = types.get(stanza['type'])
+                    if bucket:
+                        found.update(bucket)
+            if len(found) < 2:
+                return list(found)
+            return sorted(found, key=self._rank.get)
+
+    def _find_rank(self, before=None, after=None):
+        """Return a sort position for a new handler.
+
+        :param before: The name of the handler to insert before.
+        :param after: The name of the handler to insert after.
+        """
+        target = None
+        if before is not None:
+            target = self._names.get(before)
+        elif after is not None:
+            target = self._names.get(after)
+
+        if not target:
+            if before is not None or after is not None:
+                log.debug('Handler %s is not registered, appending new ' + \
+                          'handler instead.', before or after)
+            rank = self._next_rank
+            self._next_rank += 1
+            return rank
+
+        rank = self._rank[target[0]]
+        if before is not None:
+            lower = [r for r in self._rank.values() if r < rank]
+            neighbor = max(lower) if lower else rank - 1
+        else:
+            higher = [r for r in self._rank.values() if r > rank]
+            neighbor = min(higher) if higher else rank + 1
+
+        new_rank = (rank + neighbor) / 2.0
+        if new_rank in (rank, neighbor):
+            # The available positions between the two handlers have
+            # been exhausted, so renumber all handlers and try again.
+            self._renumber()
+            return self._find_rank(before, after)
+        return new_rank
+
+    def _renumber(self):
+        """Reassign evenly spaced sort positions to all handlers."""
+        ordered = sorted(self._rank, key=self._rank.get)
+        for rank, handler in enumerate(ordered):
+            self._rank[handler] = rank
+        self._next_rank = len(ordered)
+
+    def _bucket(self, key, create=False):
+        """Return the set of handlers stored under an index key.
+
+        :param key: An index key tuple.
+        :param create: Create the bucket if it does not exist.
+        """
+        if key[0] == 'id':
+            buckets, value = self._ids, key[1]
+        elif key[0] == 'tag':
+            buckets, value = self._tags, key[1]
+        elif key[0] == 'child':
+            buckets, value = self._children, key[1:]
+        else:
+            if create:
+                buckets = self._stanza_names.setdefault(key[1], {})
+            else:
+                buckets = self._stanza_names.get(key[1], {})
+            value = key[2]
+        if create:
+            return buckets.setdefault(value, {})
+        return buckets.get(value, {})
+
+    def _drop_bucket(self, key):
+        """Remove an empty bucket from the index.
+
+        :param key: An index key tuple.
+        """
+        if key[0] == 'id':
+            self._ids.pop(key[1], None)
+        elif key[0] == 'tag':
+            self._tags.pop(key[1], None)
+        elif key[0] == 'child':
+            self._children.pop(key[1:], None)
+        else:
+            types = self._stanza_names.get(key[1], {})
+            types.pop(key[2], None)
+            if not types:
+                self._stanza_names.pop(key[1], None)
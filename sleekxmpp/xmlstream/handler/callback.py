@@ -9,6 +9,7 @@
     :license: MIT, see LICENSE for more details
 """
 
+from sleekxmpp.util import iscoroutinefunction
 from sleekxmpp.xmlstream.handler.base import BaseHandler
 
 
@@ -32,7 +33,9 @@ class Callback(BaseHandler):
     :param string name: The name of the handler.
     :param matcher: A :class:`~sleekxmpp.xmlstream.matcher.base.MatcherBase`
                     derived object for matching stanza objects.
-    :param pointer: The function to execute during callback.
+    :param pointer: The function to execute during callback. Coroutine
+                    functions (``async def``) are run on the stream's
+                    :mod:`asyncio` event loop.
     :param bool thread: **DEPRECATED.** Remains only for
                         backwards compatibility.
     :param bool once: Indicates if the handler should be used only
@@ -50,6 +53,7 @@ class Callback(BaseHandler):
         self._pointer = pointer
         self._once = once
         self._instream = instream
+        self._coroutine = iscoroutinefunction(pointer)
 
     def prerun(self, payload):
         """Execute the callback during stream processing, if
@@ -73,7 +77,10 @@ class Callback(BaseHandler):
                               :meth:`prerun()`. Defaults to ``False``.
         """
         if not self._instream or instream:
-            self._pointer(payload)
+            if self._coroutine:
+                self.stream().run_coroutine(self._pointer(payload), payload)
+            else:
+                self._pointer(payload)
             if self._once:
                 self._destroy = True
                 del self._pointer
@@ -29,3 +29,28 @@ class MatcherBase(object):
         Meant to be overridden.
         """
         return False
+
+    def index_keys(self):
+        """Return the keys under which a stream may index this matcher
+        to avoid testing it against stanzas that can never match.
+
+        Each key is a tuple of one of the forms:
+
+            ``('id', value)``
+                Only stanzas whose ``'id'`` interface equals ``value``.
+            ``('tag', '{namespace}name')``
+                Only stanzas whose root XML tag is exactly the given tag.
+            ``('child', '{namespace}name', child_namespace)``
+                Only stanzas whose root XML tag is exactly the given tag
+                and which have a child element in ``child_namespace``.
+            ``('name', name, type)``
+                Only stanzas whose :attr:`name` is ``name`` and, unless
+                ``type`` is ``None``, whose ``'type'`` equals ``type``.
+
+        A stanza must satisfy at least one of the returned keys in
+        order for :meth:`match` to succeed. An empty list means that the
+        matcher can not be indexed and must be checked for every stanza.
+
+        Meant to be overridden.
+        """
+        return []
@@ -38,3 +38,18 @@ class MatchMany(MatcherBase):
             if m.match(xml):
                 return True
         return False
+
+    def index_keys(self):
+        """
+        Index the matcher under the keys of all of its criteria. If any
+        of the criteria can not be indexed, then neither can this matcher.
+
+        Overrides MatcherBase.index_keys.
+        """
+        keys = []
+        for m in self._criteria:
+            m_keys = m.index_keys() if hasattr(m, 'index_keys') else None
+            if not m_keys:
+                return []
+            keys.extend(m_keys)
+        return keys
@@ -10,7 +10,7 @@
 """
 
 from sleekxmpp.xmlstream.matcher.base import MatcherBase
-from sleekxmpp.xmlstream.stanzabase import fix_ns
+from sleekxmpp.xmlstream.stanzabase import fix_ns, compile_path
 
 
 class StanzaPath(MatcherBase):
@@ -20,6 +20,9 @@ class StanzaPath(MatcherBase):
     which is similar to a normal XPath except that it uses the interfaces and
     plugins of the stanza instead of the actual, underlying XML.
 
+    The path is compiled once, when the matcher is created, instead of
+    being parsed again for every stanza.
+
     :param criteria: Object to compare some aspect of a stanza against.
     """
 
@@ -28,6 +31,7 @@ class StanzaPath(MatcherBase):
                                           propagate_ns=False,
                                           default_ns='jabber:client')
         self._raw_criteria = criteria
+        self._path = compile_path(self._criteria)
 
     def match(self, stanza):
         """
@@ -40,4 +44,26 @@ class StanzaPath(MatcherBase):
         :param stanza: The :class:`~sleekxmpp.xmlstream.stanzabase.ElementBase`
                        stanza to compare against.
         """
-        return stanza.match(self._criteria) or stanza.match(self._raw_criteria)
+        # Since namespaces are not propagated, the raw criteria split
+        # into the same path as the fixed criteria, so a single
+        # comparison is enough.
+        return stanza.match(self._path)
+
+    def index_keys(self):
+        """Index the matcher by the root stanza name of the path, along
+        with any ``type`` attribute check made on the root stanza.
+
+        Stanza paths are expected to begin with the name of the root
+        stanza, such as ``'iq@type=get/disco_info'``.
+        """
+        if not self._criteria:
+            return []
+        components = self._criteria[0].split('@')
+        name = components[0]
+        if not name or '{' in name or '*' in name:
+            return []
+        stype = None
+        for attribute in components[1:]:
+            if attribute.startswith('type='):
+                stype = attribute[5:]
+        return [('name', name, stype)]
@@ -8,8 +8,6 @@
 
 import logging
 
-from xml.parsers.expat import ExpatError
-
 from sleekxmpp.xmlstream.stanzabase import ET
 from sleekxmpp.xmlstream.matcher.base import MatcherBase
 
@@ -42,6 +40,7 @@ class MatchXMLMask(MatcherBase):
         if isinstance(criteria, str):
             self._criteria = ET.fromstring(self._criteria)
         self.default_ns = default_ns
+        self._check = self._compile(self._criteria)
 
     def setDefaultNS(self, ns):
         """Set the default namespace to use during comparisons.
@@ -49,6 +48,57 @@ class MatchXMLMask(MatcherBase):
         :param ns: The new namespace to use as the default.
         """
         self.default_ns = ns
+        self._check = self._compile(self._criteria)
+
+    def _compile(self, mask):
+        """Convert an XML mask into a function that compares an XML
+        object against the mask.
+
+        An XML object matches if its tag is the mask's tag, or the
+        mask's tag in the default namespace, its text matches any text
+        of the mask, it has every attribute of the mask, and each child
+        of the mask matches one of its children with the same tag.
+
+        The tags, text, and attributes of the mask are read once here
+        instead of during every comparison.
+
+        :param mask: The :class:`~xml.etree.ElementTree.Element` XML object
+                     serving as the mask.
+        """
+        tags = (mask.tag, "{%s}%s" % (self.default_ns, mask.tag))
+        text = mask.text.strip() if mask.text else None
+        attributes = tuple(mask.attrib.items())
+        children = tuple((sub.tag, self._compile(sub)) for sub in mask
+                         if isinstance(sub.tag, str))
+
+        def check(source):
+            if source.tag not in tags:
+                return False
+
+            # If the mask includes text, compare it.
+            if text is not None and source.text and \
+               source.text.strip() != text:
+                return False
+
+            # Compare attributes. The stanza must include the attributes
+            # defined by the mask, but may include others.
+            attrib = source.attrib
+            for name, value in attributes:
+                if attrib.get(name, "__None__") != value:
+                    return False
+
+            # Each subelement of the mask must match at least one
+            # subelement of the source with the same tag.
+            for tag, check_child in children:
+                for other in source:
+                    if other.tag == tag and check_child(other):
+                        break
+                else:
+                    return False
+
+            # Everything matches.
+            return True
+        return check
 
     def match(self, xml):
         """Compare a stanza object or XML object against the stored XML mask.
@@ -59,59 +109,21 @@ class MatchXMLMask(MatcherBase):
         """
         if hasattr(xml, 'xml'):
             xml = xml.xml
-        return self._mask_cmp(xml, self._criteria, True)
+        return self._check(xml)
 
-    def _mask_cmp(self, source, mask, use_ns=False, default_ns='__no_ns__'):
-        """Compare an XML object against an XML mask.
+    def index_keys(self):
+        """Index the matcher by the root tag of the mask.
 
-        :param source: The :class:`~xml.etree.ElementTree.Element` XML object
-                       to compare against the mask.
-        :param mask: The :class:`~xml.etree.ElementTree.Element` XML object
-                     serving as the mask.
-        :param use_ns: Indicates if namespaces should be respected during
-                       the comparison.
-        :default_ns: The default namespace to apply to elements that
-                     do not have a specified namespace.
-                     Defaults to ``"__no_ns__"``.
+        Masks without an explicit namespace are not indexed since
+        the namespace applied to them may be changed later by
+        :meth:`setDefaultNS`. If the mask has a child element with an
+        explicit namespace, the matcher is indexed by that namespace
+        as well.
         """
-        if source is None:
-            # If the element was not found. May happend during recursive calls.
-            return False
-
-        # Convert the mask to an XML object if it is a string.
-        if not hasattr(mask, 'attrib'):
-            try:
-                mask = ET.fromstring(mask)
-            except ExpatError:
-                log.warning("Expat error: %s\nIn parsing: %s", '', mask)
-
-        mask_ns_tag = "{%s}%s" % (self.default_ns, mask.tag)
-        if source.tag not in [mask.tag, mask_ns_tag]:
-            return False
-
-        # If the mask includes text, compare it.
-        if mask.text and source.text and \
-           source.text.strip() != mask.text.strip():
-            return False
-
-        # Compare attributes. The stanza must include the attributes
-        # defined by the mask, but may include others.
-        for name, value in mask.attrib.items():
-            if source.attrib.get(name, "__None__") != value:
-                return False
-
-        # Recursively check subelements.
-        matched_elements = {}
-        for subelement in mask:
-            matched = False
-            for other in source.findall(subelement.tag):
-                matched_elements[other] = False
-                if self._mask_cmp(other, subelement, use_ns):
-                    if not matched_elements.get(other, False):
-                        matched_elements[other] = True
-                        matched = True
-            if not matched:
-                return False
-
-        # Everything matches.
-        return True
+        tag = getattr(self._criteria, 'tag', None)
+        if not tag or not tag.startswith('{'):
+            return []
+        for child in self._criteria:
+            if isinstance(child.tag, str) and child.tag.startswith('{'):
+                return [('child', tag, child.tag[1:].split('}')[0])]
+        return [('tag', tag)]
@@ -34,6 +34,34 @@ class MatchXPath(MatcherBase):
 
     def __init__(self, criteria):
         self._criteria = fix_ns(criteria)
+        self._root = fix_ns(criteria, split=True)[:1]
+        self._compile()
+
+    def _compile(self):
+        """Split the expression into a check of the stanza's root tag
+        and an expression for finding the remaining elements.
+
+        Expressions whose first element is not a plain tag name are
+        matched by wrapping the stanza in a placeholder element.
+        """
+        #: The tags accepted for the root element, or ``None`` if the
+        #: expression can not be split.
+        self._root_tags = None
+        #: The expression applied to the root element, if any.
+        self._rest = None
+        if not self._root:
+            return
+        tag = self._root[0]
+        name = tag.split('}')[-1]
+        if name in ('', '.', '..') or '*' in name or \
+           '[' in name or '@' in name:
+            return
+        self._root_tags = (tag,)
+        if tag.startswith('{}'):
+            self._root_tags = (tag, tag[2:])
+        rest = self._criteria[len(tag) + 1:]
+        if rest:
+            self._rest = rest
 
     def match(self, xml):
         """
@@ -53,7 +81,23 @@ class MatchXPath(MatcherBase):
         """
         if hasattr(xml, 'xml'):
             xml = xml.xml
-        x = ET.Element('x')
-        x.append(xml)
-
-        return x.find(self._criteria) is not None
+        if self._root_tags is None:
+            x = ET.Element('x')
+            x.append(xml)
+            return x.find(self._criteria) is not None
+
+        if xml.tag not in self._root_tags:
+            return False
+        return self._rest is None or xml.find(self._rest) is not None
+
+    def index_keys(self):
+        """Index the matcher by the root element tag of the XPath,
+        along with the namespace of the element's child when the
+        expression requires a namespaced child element."""
+        if self._root_tags is None:
+            return []
+        tag = self._root_tags[-1]
+        if self._rest and self._rest.startswith('{'):
+            namespace = self._rest[1:].split('}')[0]
+            return [('child', tag, namespace)]
+        return [('tag', tag)]
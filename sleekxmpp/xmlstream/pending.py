@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+    sleekxmpp.xmlstream.pending
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides a table of requests awaiting a response,
+    where each request is represented by a future that is resolved
+    when the response arrives or the request times out.
+
+    Part of SleekXMPP: The Sleek XMPP Library
+
+    :copyright: (c) 2011 Nathanael C. Fritz
+    :license: MIT, see LICENSE for more details
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+try:
+    from concurrent.futures import Future, TimeoutError
+    HAVE_FUTURES = True
+except ImportError:
+    # Python 2 without the ``futures`` backport package.
+    Future = object
+    TimeoutError = Exception
+    HAVE_FUTURES = False
+
+try:
+    import asyncio
+except ImportError:
+    # Python 2
+    asyncio = None
+
+
+log = logging.getLogger(__name__)
+
+
+class ResponseFuture(Future):
+
+    """
+    A :class:`concurrent.futures.Future` for the response to a stanza,
+    which may be used with :func:`concurrent.futures.wait` and
+    :func:`concurrent.futures.as_completed`.
+
+    Futures are resolved by the thread reading from the XML stream, so
+    any callbacks added with :meth:`add_done_callback` will also run
+    in that thread and should not block.
+
+    Futures may also be awaited by coroutines running on an
+    :mod:`asyncio` event loop, such as coroutine event handlers.
+
+    :param request: The stanza object that was sent, if any.
+    """
+
+    def __init__(self, request=None):
+        if not HAVE_FUTURES:
+            raise ImportError('Response futures require the ' + \
+                              'concurrent.futures module, provided ' + \
+                              'by the futures package for Python 2.')
+        Future.__init__(self)
+
+        #: The stanza object that was sent.
+        self.request = request
+
+        #: The ID used to match the response to the request.
+        self.request_id = request['id'] if request is not None else None
+
+    def __await__(self):
+        return asyncio.wrap_future(self).__await__()
+
+    def accepts(self, stanza):
+        """Check if a stanza with the request's ID is a response.
+
+        Meant to be overridden.
+
+        :param stanza: The received stanza object.
+        """
+        return True
+
+    def resolve(self, stanza):
+        """Complete the future using the received response.
+
+        Meant to be overridden.
+
+        :param stanza: The received stanza object.
+        """
+        self.set_result(stanza)
+
+    def expire(self):
+        """Complete the future after the request timed out.
+
+        Meant to be overridden.
+        """
+        self.set_exception(TimeoutError())
+
+
+def resolved(result):
+    """Return a :class:`ResponseFuture` that already has a result,
+    for requests that were answered without sending a stanza.
+
+    :param result: The result of the request.
+    """
+    future = ResponseFuture()
+    future.set_result(result)
+    return future
+
+
+class PendingRequests(object):
+
+    """
+    A single table of all requests awaiting a response on a stream,
+    mapped by stanza ID.
+
+    Responses are looked up directly from the stream's reader thread
+    instead of through stream handlers, and timeouts for every pending
+    request are enforced by one scheduled task which runs when the
+    earliest request expires.
+
+    :param stream: The :class:`~sleekxmpp.xmlstream.xmlstream.XMLStream`
+                   that the requests are sent on.
+    """
+
+    #: The name of the scheduled task used to expire requests.
+    sweep_name = 'Pending Request Timeouts'
+
+    def __init__(self, stream):
+        self.stream = stream
+
+        #: Pending futures, mapped by request ID.
+        self.futures = {}
+
+        #: A heap of ``(deadline, sequence, id, future)`` entries.
+        #: Entries for requests that have already been resolved are
+        #: discarded when their deadline passes.
+        self._deadlines = []
+        self._sequence = itertools.count()
+        self._stale = 0
+        self._sweep_at = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.futures)
+
+    def __contains__(self, request_id):
+        return request_id in self.futures
+
+    def add(self, future, timeout):
+        """Start tracking a request.
+
+        :param future: The :class:`ResponseFuture` for the request.
+        :param timeout: The number of seconds to wait for a response.
+        """
+        request_id = future.request_id
+        deadline = time.time() + timeout
+        with self._lock:
+            if request_id in self.futures:
+                raise ValueError("Request %s is already pending" % request_id)
+            self.futures[request_id] = future
+            heapq.heappush(self._deadlines,
+                           (deadline, next(self._sequence),
+                            request_id, future))
+            if self._sweep_at is None or deadline < self._sweep_at:
+                self._schedule_sweep()
+
+    def discard(self, future):
+        """Stop tracking a request.
+
+        Cancelled futures are otherwise kept until a response
+        arrives or their deadline passes.
+
+        :param future: The :class:`ResponseFuture` for the request.
+        """
+        with self._lock:
+            if self.futures.get(future.request_id) is future:
+                self._forget(future.request_id)
+
+    def resolve(self, stanza):
+        """Deliver a received stanza to a pending request.
+
+        Returns ``True`` if the stanza was a response to a
+        pending request.
+
+        :param stanza: The received stanza object.
+        """
+        request_id = stanza['id']
+        if request_id not in self.futures:
+            return False
+        with self._lock:
+            future = self.futures.get(request_id)
+            if future is None or not future.accepts(stanza):
+                return False
+            self._forget(request_id)
+        if future.set_running_or_notify_cancel():
+            future.resolve(stanza)
+        return True
+
+    def _sweep(self):
+        """Expire all requests whose deadlines have passed."""
+        now = time.time()
+        expired = []
+        with self._lock:
+            self._sweep_at = None
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, _, request_id, future = heapq.heappop(self._deadlines)
+                if self.futures.get(request_id) is future:
+                    del self.futures[request_id]
+                    expired.append(future)
+                else:
+                    self._stale -= 1
+            if self._deadlines:
+                self._schedule_sweep()
+        for future in expired:
+            log.warning("Timed out waiting for %s", future.request_id)
+            if future.set_running_or_notify_cancel():
+                future.expire()
+
+    def _forget(self, request_id):
+        """Stop tracking a request before its deadline.
+
+        The request's deadline entry is left in place, unless such
+        stale entries begin to dominate the deadline heap, in which
+        case the heap is rebuilt without them.
+
+        Must be called while holding the table's lock.
+
+        :param request_id: The ID of the request.
+        """
+        del self.futures[request_id]
+        self._stale += 1
+        if self._stale > 64 and self._stale * 2 > len(self._deadlines):
+            self._deadlines = [entry for entry in self._deadlines \
+                               if self.futures.get(entry[2]) is entry[3]]
+            heapq.heapify(self._deadlines)
+            self._stale = 0
+
+    def _schedule_sweep(self):
+        """Schedule the sweep task for the earliest deadline.
+
+        Must be called while holding the table's lock.
+        """
+        self._sweep_at = self._deadlines[0][0]
+        self.stream.scheduler.remove(self.sweep_name)
+        self.stream.schedule(self.sweep_name,
+                             max(self._sweep_at - time.time(), 0),
+                             self._sweep)
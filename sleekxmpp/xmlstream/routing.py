@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+    sleekxmpp.xmlstream.routing
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides a table of raw stanza routes, used by streams
+    that forward most of the stanzas they receive, such as gateway and
+    router components.
+
+    A routed stanza is passed to its route as the parsed XML object,
+    along with the addressing attributes read directly from the XML.
+    No stanza object is created, and no stream handlers or incoming
+    filters are used, so routed stanzas are not counted by stream
+    management (XEP-0198). Iq replies to the stream's own pending
+    requests are not routed.
+
+    Part of SleekXMPP: The Sleek XMPP Library
+
+    :copyright: (c) 2011 Nathanael C. Fritz
+    :license: MIT, see LICENSE for more details
+"""
+
+import logging
+import threading
+from fnmatch import fnmatchcase
+
+
+log = logging.getLogger(__name__)
+
+
+class Envelope(object):
+
+    """
+    The addressing information of a raw stanza.
+
+    Interface values are read from the stanza's XML attributes using
+    dictionary syntax, as with stanza objects, but are plain strings
+    instead of :class:`~sleekxmpp.jid.JID` objects::
+
+        >>> envelope['to']
+        'user@example.com/resource'
+        >>> envelope['payload']
+        'http://jabber.org/protocol/disco#info'
+
+    The ``'payload'`` interface gives the namespace of the first child
+    element that is not in the stanza's own namespace, such as the
+    namespace of an Iq query.
+
+    :param xml: The stanza's :class:`~xml.etree.ElementTree.Element`.
+    :param string domain: The domain of the stanza's ``to`` address.
+    :param string bare: The bare JID of the stanza's ``to`` address.
+    """
+
+    __slots__ = ('xml', 'domain', 'bare')
+
+    def __init__(self, xml, domain='', bare=''):
+        #: The stanza's XML object.
+        self.xml = xml
+
+        #: The domain of the stanza's ``to`` address, in lower case.
+        self.domain = domain
+
+        #: The bare JID of the stanza's ``to`` address, with the
+        #: domain in lower case.
+        self.bare = bare
+
+    @property
+    def name(self):
+        """The name of the stanza's root element, without namespace."""
+        return self.xml.tag.split('}')[-1]
+
+    def __getitem__(self, key):
+        if key == 'payload':
+            stanza_ns = self.xml.tag[1:].split('}')[0]
+            for child in self.xml:
+                tag = child.tag
+                if not callable(tag) and tag[:1] == '{':
+                    namespace = tag[1:].split('}')[0]
+                    if namespace != stanza_ns:
+                        return namespace
+            return ''
+        return self.xml.get(key, '')
+
+    def __repr__(self):
+        return '<Envelope %s to=%r from=%r>' % (self.name,
+                                                self.xml.get('to', ''),
+                                                self.xml.get('from', ''))
+
+
+def split_address(address):
+    """Split a JID string into its full JID, bare JID, and domain.
+
+    Only the domain is normalized, by converting it to lower case.
+    No other stringprep checks are done.
+
+    :param string address: The JID string.
+    """
+    bare, sep, resource = address.partition('/')
+    local, at, domain = bare.rpartition('@')
+    domain = domain.lower()
+    bare = '%s@%s' % (local, domain) if at else domain
+    return ('%s/%s' % (bare, resource) if sep else bare), bare, domain
+
+
+class RouteTable(object):
+
+    """
+    A set of raw stanza routes, chosen by the ``to`` address of
+    each stanza.
+
+    A route is registered for a pattern, which is one of:
+
+        * A domain, such as ``'example.com'``, matching every
+          address at that domain.
+        * A bare JID, such as ``'user@example.com'``, matching every
+          resource of that JID.
+        * A full JID, such as ``'user@example.com/resource'``.
+        * A pattern containing ``*`` or ``?`` wildcards, compared with
+          :func:`fnmatch.fnmatchcase`. Patterns without ``@`` or ``/``
+          are compared with the domain, patterns without ``/`` with
+          the bare JID, and others with the full JID.
+
+    Full JIDs are checked first, then bare JIDs, then domains, and
+    finally wildcard patterns in the order they were registered.
+    """
+
+    def __init__(self):
+        #: Routes for exact full JIDs, bare JIDs, and domains.
+        self._exact = {}
+
+        #: Wildcard routes, as a list of ``(pattern, part, route,
+        #: normalized_pattern)``, where ``part`` selects the part of
+        #: the address to compare.
+        self._patterns = []
+
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._exact) + len(self._patterns)
+
+    def add(self, pattern, route):
+        """Register a route for a pattern.
+
+        A route already registered for the same pattern is replaced.
+
+        :param string pattern: The domain, JID, or wildcard pattern.
+        :param route: The function to call with the
+                      :class:`Envelope` of each matching stanza.
+        """
+        with self._lock:
+            if '*' in pattern or '?' in pattern or '[' in pattern:
+                if '/' in pattern:
+                    part = 0
+                elif '@' in pattern:
+                    part = 1
+                else:
+                    part = 2
+                patterns = [p for p in self._patterns if p[0] != pattern]
+                patterns.append((pattern, part, route,
+                                 split_address(pattern)[0]))
+                self._patterns = patterns
+            else:
+                self._exact[split_address(pattern)[0]] = route
+
+    def remove(self, pattern):
+        """Remove the route registered for a pattern.
+
+        Returns ``True`` if a route was removed.
+
+        :param string pattern: The pattern given to :meth:`add`.
+        """
+        with self._lock:
+            if self._exact.pop(split_address(pattern)[0], None) is not None:
+                return True
+            patterns = [p for p in self._patterns if p[0] != pattern]
+            if len(patterns) == len(self._patterns):
+                return False
+            self._patterns = patterns
+            return True
+
+    def find(self, xml):
+        """Return the route and :class:`Envelope` for a stanza.
+
+        If no route matches the stanza, ``(None, None)`` is returned.
+
+        :param xml: The stanza's :class:`~xml.etree.ElementTree.Element`.
+        """
+        address = xml.get('to')
+        if not address:
+            return None, None
+        exact = self._exact
+        parts = split_address(address)
+        for part in parts:
+            route = exact.get(part)
+            if route is not None:
+                return route, Envelope(xml, parts[2], parts[1])
+        for _, part, route, pattern in self._patterns:
+            if fnmatchcase(parts[part], pattern):
+                return route, Envelope(xml, parts[2], parts[1])
+        return None, None
@@ -13,16 +13,21 @@
 """
 
 import time
+import heapq
 import threading
 import logging
 import itertools
 
-from sleekxmpp.util import Queue, QueueEmpty
-
 
 log = logging.getLogger(__name__)
 
 
+#: The maximum time in seconds the scheduler will sleep before
+#: checking if it has been asked to stop from outside of the
+#: scheduler's own methods.
+MAX_WAIT = 3.0
+
+
 class Task(object):
 
     """
@@ -93,6 +98,11 @@ class Scheduler(object):
     A threaded scheduler that allows for updates mid-execution unlike the
     scheduler in the standard library.
 
+    Tasks are kept in a heap ordered by execution time, and the
+    processing thread sleeps until the earliest task is due or the
+    schedule is changed. Adding a task and removing a task by name
+    both take ``O(log n)`` time.
+
     Based on: http://docs.python.org/library/sched.html#module-sched
 
     :param parentstop: An :class:`~threading.Event` to signal stopping
@@ -100,12 +110,15 @@ class Scheduler(object):
     """
 
     def __init__(self, parentstop=None):
-        #: A queue for storing tasks
-        self.addq = Queue()
-
-        #: A list of tasks in order of execution time.
+        #: A heap of ``[next, sequence, task]`` entries in order of
+        #: execution time. Entries for removed tasks have their task
+        #: set to ``None`` and are discarded once they reach the top
+        #: of the heap.
         self.schedule = []
 
+        #: The current heap entry for each scheduled task, by name.
+        self.tasks = {}
+
         #: If running in threaded mode, this will be the thread processing
         #: the schedule.
         self.thread = None
@@ -116,10 +129,23 @@ class Scheduler(object):
         #: An :class:`~threading.Event` instance for signalling to stop
         #: the scheduler.
         self.stop = parentstop
+        if self.stop is None:
+            self.stop = threading.Event()
 
         #: Lock for accessing the task queue.
         self.schedule_lock = threading.RLock()
 
+        #: Condition used to wake the processing thread when the
+        #: schedule changes.
+        self.schedule_cond = threading.Condition(self.schedule_lock)
+
+        #: The maximum time in seconds to sleep before checking if the
+        #: :attr:`stop` event has been set by another thread.
+        self.max_wait = MAX_WAIT
+
+        self._sequence = itertools.count()
+        self._removed = 0
+
     def process(self, threaded=True, daemon=False):
         """Begin accepting and processing scheduled tasks.
 
@@ -139,56 +165,67 @@ class Scheduler(object):
         self.run = True
         try:
             while self.run and not self.stop.is_set():
-                wait = 0.1
-                updated = False
-                if self.schedule:
-                    wait = self.schedule[0].next - time.time()
+                with self.schedule_cond:
+                    task = self._next_task()
+                    if task is None:
+                        continue
                 try:
-                    if wait <= 0.0:
-                        newtask = self.addq.get(False)
-                    else:
-                        if wait >= 3.0:
-                            wait = 3.0
-                        newtask = None
-                        elapsed = 0
-                        while not self.stop.is_set() and \
-                              newtask is None and \
-                              elapsed < wait:
-                            newtask = self.addq.get(True, 0.1)
-                            elapsed += 0.1
-                except QueueEmpty:
-                    self.schedule_lock.acquire()
-                    # select only those tasks which are to be executed now
-                    relevant = itertools.takewhile(
-                        lambda task: time.time() >= task.next, self.schedule)
-                    # run the tasks and keep the return value in a tuple
-                    status = map(lambda task: (task, task.run()), relevant)
-                    # remove non-repeating tasks
-                    for task, doRepeat in status:
-                        if not doRepeat:
-                            try:
-                                self.schedule.remove(task)
-                            except ValueError:
-                                pass
+                    repeat = task.run()
+                except Exception:
+                    log.exception('Error running scheduled task %s',
+                                  task.name)
+                    repeat = False
+                with self.schedule_cond:
+                    if self.tasks.get(task.name, [None] * 3)[2] is task:
+                        if repeat:
+                            self._push(task)
                         else:
-                            # only need to resort tasks if a repeated task has
-                            # been kept in the list.
-                            updated = True
-                else:
-                    updated = True
-                    self.schedule_lock.acquire()
-                    if newtask is not None:
-                        self.schedule.append(newtask)
-                finally:
-                    if updated:
-                        self.schedule.sort(key=lambda task: task.next)
-                    self.schedule_lock.release()
+                            del self.tasks[task.name]
         except KeyboardInterrupt:
             self.run = False
         except SystemExit:
             self.run = False
         log.debug("Quitting Scheduler thread")
 
+    def _next_task(self):
+        """Wait until the earliest task is due and return it.
+
+        Returns ``None`` if the schedule changed or the wait
+        timed out, in which case the caller should try again.
+        Must be called while holding :attr:`schedule_lock`.
+        """
+        while self.schedule and self.schedule[0][2] is None:
+            heapq.heappop(self.schedule)
+            self._removed -= 1
+
+        if not self.schedule:
+            self.schedule_cond.wait(self.max_wait)
+            return None
+
+        wait = self.schedule[0][0] - time.time()
+        if wait > 0:
+            self.schedule_cond.wait(min(wait, self.max_wait))
+            return None
+
+        entry = heapq.heappop(self.schedule)
+        # Mark the entry as no longer being in the heap.
+        entry[1] = None
+        return entry[2]
+
+    def _push(self, task):
+        """Add a task to the heap and wake the processing thread if
+        the task is now the first to execute.
+
+        Must be called while holding :attr:`schedule_lock`.
+
+        :param task: The :class:`Task` to add.
+        """
+        entry = [task.next, next(self._sequence), task]
+        self.tasks[task.name] = entry
+        heapq.heappush(self.schedule, entry)
+        if self.schedule[0] is entry:
+            self.schedule_cond.notify()
+
     def add(self, name, seconds, callback, args=None,
             kwargs=None, repeat=False, qpointer=None):
         """Schedule a new task.
@@ -203,18 +240,11 @@ class Scheduler(object):
         :param pointer: A pointer to an event queue for queuing callback
                         execution instead of executing immediately.
         """
-        try:
-            self.schedule_lock.acquire()
-            for task in self.schedule:
-                if task.name == name:
-                    raise ValueError("Key %s already exists" % name)
-
-            self.addq.put(Task(name, seconds, callback, args,
-                               kwargs, repeat, qpointer))
-        except:
-            raise
-        finally:
-            self.schedule_lock.release()
+        with self.schedule_cond:
+            if name in self.tasks:
+                raise ValueError("Key %s already exists" % name)
+            self._push(Task(name, seconds, callback, args,
+                            kwargs, repeat, qpointer))
 
     def remove(self, name):
         """Remove a scheduled task ahead of schedule, and without
@@ -222,19 +252,27 @@ class Scheduler(object):
 
         :param string name: The name of the task to remove.
         """
-        try:
-            self.schedule_lock.acquire()
-            the_task = None
-            for task in self.schedule:
-                if task.name == name:
-                    the_task = task
-            if the_task is not None:
-                self.schedule.remove(the_task)
-        except:
-            raise
-        finally:
-            self.schedule_lock.release()
+        with self.schedule_cond:
+            entry = self.tasks.pop(name, None)
+            if entry is None:
+                return
+            entry[2] = None
+            if entry[1] is None:
+                # The task is currently running and is no longer
+                # in the heap.
+                return
+            self._removed += 1
+
+            # Lazily removed entries are normally discarded as they
+            # reach the top of the heap; compact the heap if they
+            # begin to dominate it.
+            if self._removed > 64 and self._removed * 2 > len(self.schedule):
+                self.schedule = [e for e in self.schedule if e[2] is not None]
+                heapq.heapify(self.schedule)
+                self._removed = 0
 
     def quit(self):
         """Shutdown the scheduler."""
-        self.run = False
+        with self.schedule_cond:
+            self.run = False
+            self.schedule_cond.notify()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+    sleekxmpp.xmlstream.sendqueue
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides a send queue with separate lanes for stream
+    control data, responses, and other traffic, along with limits on
+    the amount of queued data.
+
+    Part of SleekXMPP: The Sleek XMPP Library
+
+    :copyright: (c) 2011 Nathanael C. Fritz
+    :license: MIT, see LICENSE for more details
+"""
+
+import collections
+import threading
+import time
+
+from sleekxmpp.util import QueueEmpty, QueueFull
+
+
+#: Stream control data, such as stream management acks and keepalives.
+CONTROL = 0
+
+#: Responses to requests, such as Iq results and errors.
+RESPONSE = 1
+
+#: All other traffic.
+BULK = 2
+
+#: Wait for the queue to drain below the high-water mark.
+BLOCK = 'block'
+
+#: Raise :class:`~sleekxmpp.util.QueueFull`.
+RAISE = 'raise'
+
+#: Accept the data and call the queue's :attr:`~LaneQueue.on_full`
+#: callback.
+EVENT = 'event'
+
+
+class LaneQueue(object):
+
+    """
+    A queue of data to send, with one lane for each priority.
+
+    Data is taken from the :data:`CONTROL` lane first, then the
+    :data:`RESPONSE` lane, and then the :data:`BULK` lane, and in
+    order within each lane.
+
+    Once :attr:`high_water` items are queued, adding more data to the
+    :data:`RESPONSE` or :data:`BULK` lanes is handled using the queue's
+    :attr:`policy`. Control data is always accepted. When the number
+    of queued items then falls to :attr:`low_water`, the
+    :attr:`on_drained` callback is called and waiting producers
+    are released.
+
+    Supports the same methods as :class:`~queue.Queue`.
+
+    :param int high_water: The number of queued items at which the
+                           queue is considered full, or ``0`` for
+                           no limit.
+    :param int low_water: The number of queued items at which a full
+                          queue is considered drained. Defaults to
+                          half of ``high_water``.
+    :param policy: One of :data:`BLOCK`, :data:`RAISE`, or
+                   :data:`EVENT`. Defaults to :data:`BLOCK`.
+    """
+
+    def __init__(self, high_water=0, low_water=None, policy=BLOCK):
+        if policy not in (BLOCK, RAISE, EVENT):
+            raise ValueError("Unknown send queue policy: %s" % policy)
+
+        #: The number of queued items at which the queue is full.
+        self.high_water = high_water
+
+        #: The number of queued items at which the queue is drained.
+        self.low_water = high_water // 2 if low_water is None else low_water
+
+        #: How to handle data arriving while the queue is full.
+        self.policy = policy
+
+        #: Called with no arguments when the queue becomes full.
+        self.on_full = None
+
+        #: Called with no arguments when a full queue has drained.
+        self.on_drained = None
+
+        self.lanes = (collections.deque(),
+                      collections.deque(),
+                      collections.deque())
+        self.full = False
+        self._size = 0
+        self._unfinished = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._finished = threading.Condition(self._lock)
+
+    def qsize(self, lane=None):
+        """Return the number of queued items.
+
+        :param lane: Only count the items in this lane.
+        """
+        if lane is not None:
+            return len(self.lanes[lane])
+        return self._size
+
+    def empty(self):
+        return self._size == 0
+
+    def put(self, item, block=True, timeout=None, lane=BULK):
+        """Add data to a lane of the queue.
+
+        :param item: The data to send.
+        :param bool block: If ``False``, the :data:`BLOCK` policy raises
+                           :class:`~sleekxmpp.util.QueueFull` instead
+                           of waiting.
+        :param timeout: The maximum number of seconds to wait for a
+                        full queue to drain.
+        :param lane: One of :data:`CONTROL`, :data:`RESPONSE`,
+                     or :data:`BULK`. Defaults to :data:`BULK`.
+        """
+        became_full = False
+        with self._lock:
+            over = lane != CONTROL and self.high_water and \
+                   self._size >= self.high_water
+            if not over:
+                self._append(item, lane)
+                return
+            if not self.full:
+                self.full = became_full = True
+
+        # Report reaching the high-water mark before raising an
+        # exception or waiting for the queue to drain.
+        if became_full and self.on_full is not None:
+            self.on_full()
+
+        with self._lock:
+            if not self.high_water or self._size < self.high_water:
+                # The queue drained while the lock was released.
+                pass
+            elif self.policy == RAISE:
+                raise QueueFull()
+            elif self.policy == BLOCK:
+                if not block:
+                    raise QueueFull()
+                if timeout is not None:
+                    end = time.time() + timeout
+                while self.full:
+                    if timeout is None:
+                        self._drained.wait()
+                    else:
+                        remaining = end - time.time()
+                        if remaining <= 0:
+                            raise QueueFull()
+                        self._drained.wait(remaining)
+            self._append(item, lane)
+
+    def _append(self, item, lane):
+        """Add data to a lane. The queue's lock must be held."""
+        self.lanes[lane].append(item)
+        self._size += 1
+        self._unfinished += 1
+        self._not_empty.notify()
+
+    def get(self, block=True, timeout=None):
+        """Remove the next item, in priority order.
+
+        :param bool block: Wait for an item if the queue is empty.
+        :param timeout: The maximum number of seconds to wait.
+        """
+        drained = False
+        with self._lock:
+            if not block:
+                if not self._size:
+                    raise QueueEmpty()
+            elif timeout is None:
+                while not self._size:
+                    self._not_empty.wait()
+            else:
+                end = time.time() + timeout
+                while not self._size:
+                    remaining = end - time.time()
+                    if remaining <= 0:
+                        raise QueueEmpty()
+                    self._not_empty.wait(remaining)
+            for lane in self.lanes:
+                if lane:
+                    item = lane.popleft()
+                    break
+            self._size -= 1
+            if self.full and self._size <= self.low_water:
+                self.full = False
+                drained = True
+                self._drained.notify_all()
+        if drained and self.on_drained is not None:
+            self.on_drained()
+        return item
+
+    def task_done(self):
+        """Mark a previously removed item as sent."""
+        with self._lock:
+            if self._unfinished <= 0:
+                raise ValueError('task_done() called too many times')
+            self._unfinished -= 1
+            if not self._unfinished:
+                self._finished.notify_all()
+
+    def join(self):
+        """Wait until every queued item has been sent."""
+        with self._lock:
+            while self._unfinished:
+                self._finished.wait()
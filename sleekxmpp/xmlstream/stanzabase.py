@@ -16,22 +16,36 @@ from __future__ import with_statement, unicode_literals
 
 import copy
 import logging
+import threading
+import types
 import weakref
-from xml.etree import cElementTree as ET
 
 from sleekxmpp.xmlstream import JID
+from sleekxmpp.jid import freeze, freeze_trusted
+from sleekxmpp.xmlstream.xmlbackend import ET, XML_TYPE
 from sleekxmpp.xmlstream.tostring import tostring
 from sleekxmpp.thirdparty import OrderedDict
+from sleekxmpp.util import intern
 
 
 log = logging.getLogger(__name__)
 
 
-# Used to check if an argument is an XML object.
-XML_TYPE = type(ET.Element('xml'))
+XML_NS = 'http://www.w3.org/XML/1998/namespace'
 
+#: Serializes creating plugins for frozen stanzas, which may be
+#: shared by handlers running in several threads.
+_frozen_lock = threading.RLock()
 
-XML_NS = 'http://www.w3.org/XML/1998/namespace'
+#: The maximum number of expanded XPath expressions and compiled
+#: stanza paths kept by :func:`fix_ns` and :func:`compile_path`.
+PATH_CACHE_SIZE = 4096
+
+_fixed_paths = {}
+
+_compiled_paths = {}
+
+_accessor_tables = {}
 
 
 def register_stanza_plugin(stanza, plugin, iterable=False, overrides=False):
@@ -68,6 +82,9 @@ def register_stanza_plugin(stanza, plugin, iterable=False, overrides=False):
     """
     tag = "{%s}%s" % (plugin.namespace, plugin.name)
 
+    # The interfaces of stanza classes may now resolve differently.
+    _accessor_tables.clear()
+
     # Prevent weird memory reference gotchas by ensuring
     # that the parent stanza class has its own set of
     # plugin info maps and is not using the mappings from
@@ -162,6 +179,9 @@ def multifactory(stanza, plugin_attrib):
 def fix_ns(xpath, split=False, propagate_ns=True, default_ns=''):
     """Apply the stanza's namespace to elements in an XPath expression.
 
+    Expanded expressions are cached, so repeated calls with the same
+    arguments do not parse the expression again.
+
     :param string xpath: The XPath expression to fix with namespaces.
     :param bool split: Indicates if the fixed XPath should be left as a
                        list of element names with namespaces. Defaults to
@@ -173,6 +193,24 @@ def fix_ns(xpath, split=False, propagate_ns=True, default_ns=''):
                               parent namespaces are known not to always
                               match. Defaults to True.
     """
+    key = (xpath, propagate_ns, default_ns)
+    try:
+        fixed = _fixed_paths[key]
+    except KeyError:
+        fixed = tuple(_expand_ns(xpath, propagate_ns, default_ns))
+        if len(_fixed_paths) >= PATH_CACHE_SIZE:
+            _fixed_paths.clear()
+        _fixed_paths[key] = fixed
+    if split:
+        return list(fixed)
+    return '/'.join(fixed)
+
+
+def _expand_ns(xpath, propagate_ns, default_ns):
+    """Return the namespaced element names of an XPath expression.
+
+    See :func:`fix_ns` for the meaning of the parameters.
+    """
     fixed = []
     # Split the XPath into a series of blocks, where a block
     # is started by an element with a namespace.
@@ -197,9 +235,288 @@ def fix_ns(xpath, split=False, propagate_ns=True, default_ns=''):
                 else:
                     tag = element
                 fixed.append(tag)
-    if split:
-        return fixed
-    return '/'.join(fixed)
+    return fixed
+
+
+def compile_path(xpath):
+    """Compile a stanza path for use with :meth:`ElementBase.match`.
+
+    Each element of the path is split once into its name and attribute
+    checks, giving a tuple of ``(node, name, attributes, plugin)``
+    entries, where ``attributes`` is a tuple of ``(interface, value)``
+    pairs and ``plugin`` is the element name without its namespace.
+    Compiled paths are cached.
+
+    :param xpath: A stanza path string, or a list of the element
+                  names in a path.
+    """
+    if isinstance(xpath, tuple):
+        return xpath
+    key = xpath if not isinstance(xpath, list) else tuple(xpath)
+    try:
+        return _compiled_paths[key]
+    except KeyError:
+        pass
+
+    if not isinstance(xpath, list):
+        xpath = fix_ns(xpath, split=True, propagate_ns=False)
+    path = []
+    for node in xpath:
+        components = node.split('@')
+        attributes = []
+        for attribute in components[1:]:
+            name, value = attribute.split('=')
+            attributes.append((name, value))
+        path.append((node, components[0], tuple(attributes),
+                     components[0].split('}')[-1]))
+    path = tuple(path)
+
+    if len(_compiled_paths) >= PATH_CACHE_SIZE:
+        _compiled_paths.clear()
+    _compiled_paths[key] = path
+    return path
+
+
+def _accessors(cls):
+    """Return the interface accessor tables of a stanza class.
+
+    The tables map interface names to the functions used by
+    :meth:`ElementBase.__getitem__`, :meth:`ElementBase.__setitem__`,
+    and :meth:`ElementBase.__delitem__`, so that the methods, plugins,
+    and interface sets of the class are only searched the first time
+    an interface is used. The tables are discarded whenever a stanza
+    plugin is registered.
+
+    :param class cls: The stanza class.
+    """
+    try:
+        return _accessor_tables[cls]
+    except KeyError:
+        tables = ({}, {}, {})
+        _accessor_tables[cls] = tables
+        return tables
+
+
+def _find_method(cls, names):
+    """Return a function calling the first of the named methods that
+    the class provides, or ``None``.
+
+    :param class cls: The stanza class.
+    :param list names: The method names to look for.
+    """
+    for name in names:
+        for klass in cls.__mro__:
+            if name in klass.__dict__:
+                method = klass.__dict__[name]
+                break
+        else:
+            continue
+        if isinstance(method, types.FunctionType):
+            return method
+        return lambda self, *args, **kwargs: \
+                getattr(self, name)(*args, **kwargs)
+    return None
+
+
+def _with_override(default, action, plugin_name, method_name, lang_kwarg):
+    """Wrap an accessor so that it first tries the method provided by
+    a plugin registered to override the interface.
+
+    :param default: The accessor used if the plugin does not
+                    provide the method.
+    :param string action: One of ``'get'``, ``'set'``, or ``'del'``.
+    :param string plugin_name: The plugin that overrides the interface.
+    :param string method_name: The name of the overriding method.
+    :param bool lang_kwarg: Pass the requested language to the method.
+    """
+    if action == 'set':
+        def accessor(self, value, lang, full_attrib):
+            plugin = self._get_plugin(plugin_name, lang)
+            if plugin:
+                handler = getattr(plugin, method_name, None)
+                if handler:
+                    if lang and lang_kwarg:
+                        return handler(value, lang=lang)
+                    return handler(value)
+            return default(self, value, lang, full_attrib)
+    else:
+        def accessor(self, lang, full_attrib):
+            plugin = self._get_plugin(plugin_name, lang)
+            if plugin:
+                handler = getattr(plugin, method_name, None)
+                if handler:
+                    if lang and lang_kwarg:
+                        return handler(lang=lang)
+                    return handler()
+            return default(self, lang, full_attrib)
+    return accessor
+
+
+def _build_getter(cls, attrib):
+    """Return the function reading an interface of a stanza class.
+
+    See :meth:`ElementBase.__getitem__` for the search order.
+
+    :param class cls: The stanza class.
+    :param string attrib: The interface name, without a language.
+    """
+    if attrib == 'substanzas':
+        return lambda self, lang, full_attrib: self.iterables
+
+    if attrib in cls.interfaces or attrib == 'lang':
+        lang_kwarg = attrib in cls.lang_interfaces
+        get_method = "get_%s" % attrib.lower()
+        method = _find_method(cls, (get_method, "get%s" % attrib.title()))
+        if method is not None:
+            if lang_kwarg:
+                def getter(self, lang, full_attrib):
+                    if lang:
+                        return method(self, lang=lang)
+                    return method(self)
+            else:
+                getter = lambda self, lang, full_attrib: method(self)
+        elif attrib in cls.sub_interfaces:
+            getter = lambda self, lang, full_attrib: \
+                    self._get_sub_text(attrib, lang=lang)
+        elif attrib in cls.bool_interfaces:
+            tag = '{%s}%s' % (cls.namespace, attrib)
+            getter = lambda self, lang, full_attrib: \
+                    self.xml.find(tag) is not None
+        else:
+            getter = lambda self, lang, full_attrib: self._get_attr(attrib)
+
+        plugin_name = cls.plugin_overrides.get(get_method, None)
+        if plugin_name:
+            getter = _with_override(getter, 'get', plugin_name,
+                                    get_method, lang_kwarg)
+        return getter
+
+    if attrib in cls.plugin_attrib_map:
+        def getter(self, lang, full_attrib):
+            plugin = self._get_plugin(attrib, lang)
+            if plugin and plugin.is_extension:
+                return plugin[full_attrib]
+            return plugin
+        return getter
+
+    return lambda self, lang, full_attrib: ''
+
+
+def _build_setter(cls, attrib):
+    """Return the function changing an interface of a stanza class.
+
+    See :meth:`ElementBase.__setitem__` for the search order. The
+    returned function is not used for ``None`` values, which delete
+    the interface instead.
+
+    :param class cls: The stanza class.
+    :param string attrib: The interface name, without a language.
+    """
+    if attrib in cls.interfaces or attrib == 'lang':
+        lang_kwarg = attrib in cls.lang_interfaces
+        set_method = "set_%s" % attrib.lower()
+        method = _find_method(cls, (set_method, "set%s" % attrib.title()))
+        if method is not None:
+            if lang_kwarg:
+                def setter(self, value, lang, full_attrib):
+                    if lang:
+                        method(self, value, lang=lang)
+                    else:
+                        method(self, value)
+                    return self
+            else:
+                def setter(self, value, lang, full_attrib):
+                    method(self, value)
+                    return self
+        elif attrib in cls.sub_interfaces:
+            def setter(self, value, lang, full_attrib):
+                if lang == '*':
+                    return self._set_all_sub_text(attrib, value, lang='*')
+                return self._set_sub_text(attrib, text=value, lang=lang)
+        elif attrib in cls.bool_interfaces:
+            def setter(self, value, lang, full_attrib):
+                return self._set_sub_text(attrib, '', keep=bool(value),
+                                          lang=lang)
+        else:
+            def setter(self, value, lang, full_attrib):
+                self._set_attr(attrib, value)
+                return self
+
+        plugin_name = cls.plugin_overrides.get(set_method, None)
+        if plugin_name:
+            setter = _with_override(setter, 'set', plugin_name,
+                                    set_method, lang_kwarg)
+        return setter
+
+    if attrib in cls.plugin_attrib_map:
+        def setter(self, value, lang, full_attrib):
+            plugin = self._get_plugin(attrib, lang)
+            if plugin:
+                plugin[full_attrib] = value
+            return self
+        return setter
+
+    return lambda self, value, lang, full_attrib: self
+
+
+def _build_deleter(cls, attrib):
+    """Return the function deleting an interface of a stanza class.
+
+    See :meth:`ElementBase.__delitem__` for the search order.
+
+    :param class cls: The stanza class.
+    :param string attrib: The interface name, without a language.
+    """
+    if attrib in cls.interfaces or attrib == 'lang':
+        lang_kwarg = attrib in cls.lang_interfaces
+        del_method = "del_%s" % attrib.lower()
+        method = _find_method(cls, (del_method, "del%s" % attrib.title()))
+        if method is not None:
+            if lang_kwarg:
+                def deleter(self, lang, full_attrib):
+                    if lang:
+                        method(self, lang=lang)
+                    else:
+                        method(self)
+                    return self
+            else:
+                def deleter(self, lang, full_attrib):
+                    method(self)
+                    return self
+        elif attrib in cls.sub_interfaces or attrib in cls.bool_interfaces:
+            deleter = lambda self, lang, full_attrib: \
+                    self._del_sub(attrib, lang=lang)
+        else:
+            def deleter(self, lang, full_attrib):
+                self._del_attr(attrib)
+                return self
+
+        if cls.plugin_overrides.get(del_method, None):
+            # The overriding plugin is looked up by the name of
+            # the interface, not the name of the plugin.
+            deleter = _with_override(deleter, 'del', attrib,
+                                     del_method, lang_kwarg)
+        return deleter
+
+    if attrib in cls.plugin_attrib_map:
+        def deleter(self, lang, full_attrib):
+            plugin = self._get_plugin(attrib, lang, check=True)
+            if not plugin:
+                return self
+            if plugin.is_extension:
+                del plugin[full_attrib]
+                del self.plugins[(attrib, None)]
+            else:
+                del self.plugins[(attrib, plugin['lang'])]
+            self.loaded_plugins.remove(attrib)
+            try:
+                self.xml.remove(plugin.xml)
+            except ValueError:
+                pass
+            return self
+        return deleter
+
+    return lambda self, lang, full_attrib: self
 
 
 class ElementBase(object):
@@ -400,26 +717,38 @@ class ElementBase(object):
     #: The default XML namespace: ``http://www.w3.org/XML/1998/namespace``.
     xml_ns = XML_NS
 
+    # The attributes used by every stanza are stored in slots. Other
+    # attributes, including any set by subclasses, are stored in the
+    # instance dictionary, which is only created once it is needed.
+    __slots__ = ('xml', 'tag', 'parent', 'frozen', '_index', '_plugins',
+                 '_loaded_plugins', '_iterables', '_unloaded',
+                 '__dict__', '__weakref__')
+
     def __init__(self, xml=None, parent=None):
         self._index = 0
 
+        #: If ``True``, the stanza is read only. See :meth:`freeze`.
+        self.frozen = False
+
         #: The underlying XML object for the stanza. It is a standard
         #: :class:`xml.etree.cElementTree` object.
         self.xml = xml
 
-        #: An ordered dictionary of plugin stanzas, mapped by their
-        #: :attr:`plugin_attrib` value.
-        self.plugins = OrderedDict()
-        self.loaded_plugins = set()
+        # The containers for plugins are created when the first
+        # plugin is added.
+        self._plugins = None
+        self._loaded_plugins = None
+        self._iterables = None
 
-        #: A list of child stanzas whose class is included in
-        #: :attr:`plugin_iterables`.
-        self.iterables = []
+        #: Child elements handled by plugins which have not yet been
+        #: created, as a list of ``(plugin_class, xml)`` pairs.
+        self._unloaded = None
 
         #: The name of the tag for the stanza's root element. It is the
         #: same as calling :meth:`tag_name()` and is formatted as
-        #: ``'{namespace}elementname'``.
-        self.tag = self.tag_name()
+        #: ``'{namespace}elementname'``. The string is shared by all
+        #: stanzas with the same tag.
+        self.tag = intern(self.tag_name())
 
         #: A :class:`weakref.weakref` to the parent stanza, if there is one.
         #: If not, then :attr:`parent` is ``None``.
@@ -438,13 +767,109 @@ class ElementBase(object):
             # If we generated our own XML, then everything is ready.
             return
 
-        # Initialize values using provided XML
-        for child in self.xml:
-            if child.tag in self.plugin_tag_map:
-                plugin_class = self.plugin_tag_map[child.tag]
-                self.init_plugin(plugin_class.plugin_attrib,
-                                 existing_xml=child,
-                                 reuse=False)
+        # Record the child elements handled by plugins. The plugin
+        # objects are only created once they are used.
+        tag_map = self.plugin_tag_map
+        if tag_map:
+            unloaded = [(tag_map[child.tag], child) for child in self.xml
+                        if child.tag in tag_map]
+            if unloaded:
+                self._unloaded = unloaded
+
+    @property
+    def plugins(self):
+        """An ordered dictionary of plugin stanzas, mapped by their
+        :attr:`plugin_attrib` value and language."""
+        if self._unloaded:
+            self._load_plugins()
+        if self._plugins is None:
+            self._plugins = OrderedDict()
+        return self._plugins
+
+    @plugins.setter
+    def plugins(self, value):
+        self._plugins = value
+
+    @property
+    def loaded_plugins(self):
+        """The set of :attr:`plugin_attrib` values of loaded plugins."""
+        if self._unloaded:
+            self._load_plugins()
+        if self._loaded_plugins is None:
+            self._loaded_plugins = set()
+        return self._loaded_plugins
+
+    @loaded_plugins.setter
+    def loaded_plugins(self, value):
+        self._loaded_plugins = value
+
+    @property
+    def iterables(self):
+        """A list of child stanzas whose class is included in
+        :attr:`plugin_iterables`."""
+        if self._unloaded:
+            self._load_plugins(iterables=True)
+        if self._iterables is None:
+            self._iterables = []
+        return self._iterables
+
+    @iterables.setter
+    def iterables(self, value):
+        self._iterables = value
+
+    def _load_plugins(self, attrib=None, iterables=False):
+        """Create plugin objects for child elements found when the
+        stanza was built from existing XML.
+
+        If no plugin name is given, every remaining plugin is created.
+        Plugins which are iterable are always created together, so
+        that :attr:`iterables` keeps the order of the XML.
+
+        :param string attrib: Only create plugins with this
+                              :attr:`plugin_attrib` value.
+        :param bool iterables: Only create iterable plugins.
+        """
+        if self.frozen:
+            with _frozen_lock:
+                self._load_unloaded(attrib, iterables)
+        else:
+            self._load_unloaded(attrib, iterables)
+
+    def _load_unloaded(self, attrib, iterables):
+        unloaded = self._unloaded
+        if not unloaded:
+            return
+        if attrib is None and not iterables:
+            load = unloaded
+        else:
+            if attrib is not None:
+                iterables = False
+                for plugin_class, child in unloaded:
+                    if plugin_class.plugin_attrib == attrib and \
+                       plugin_class in self.plugin_iterables:
+                        iterables = True
+                        break
+            if iterables:
+                load = [(plugin_class, child)
+                        for plugin_class, child in unloaded
+                        if plugin_class in self.plugin_iterables or \
+                           plugin_class.plugin_attrib == attrib]
+            else:
+                load = [(plugin_class, child)
+                        for plugin_class, child in unloaded
+                        if plugin_class.plugin_attrib == attrib]
+            if not load:
+                return
+        if len(load) == len(unloaded):
+            self._unloaded = None
+        else:
+            loading = set(id(child) for plugin_class, child in load)
+            self._unloaded = [item for item in unloaded
+                              if id(item[1]) not in loading]
+        for plugin_class, child in load:
+            self.init_plugin(plugin_class.plugin_attrib,
+                             existing_xml=child,
+                             reuse=False)
 
     def setup(self, xml=None):
         """Initialize the stanza's XML contents.
@@ -488,6 +913,26 @@ class ElementBase(object):
         """
         return self.init_plugin(attrib, lang)
 
+    def freeze(self):
+        """Make the stanza, and the plugins created for it, read only.
+
+        A frozen stanza may be shared by several handlers instead of
+        giving each handler its own copy. Attempts to modify it raise
+        a :class:`TypeError`; use :meth:`StanzaBase.reply` or
+        :func:`copy.copy` to get a stanza that may be modified.
+        """
+        self.frozen = True
+        for plugin in list((self._plugins or {}).values()):
+            plugin.freeze()
+        for stanza in list(self._iterables or ()):
+            stanza.freeze()
+        return self
+
+    def _check_frozen(self):
+        if self.frozen:
+            raise TypeError("The stanza is read only, use reply() or " + \
+                            "copy.copy() to get a stanza to modify")
+
     def _get_plugin(self, name, lang=None, check=False):
         if lang is None:
             lang = self.get_lang()
@@ -495,16 +940,20 @@ class ElementBase(object):
         if name not in self.plugin_attrib_map:
             return None
 
+        if self._unloaded:
+            self._load_plugins(name)
+
         plugin_class = self.plugin_attrib_map[name]
+        plugins = self._plugins or ()
 
         if plugin_class.is_extension:
-            if (name, None) in self.plugins:
-                return self.plugins[(name, None)]
+            if (name, None) in plugins:
+                return plugins[(name, None)]
             else:
                 return None if check else self.init_plugin(name, lang)
         else:
-            if (name, lang) in self.plugins:
-                return self.plugins[(name, lang)]
+            if (name, lang) in plugins:
+                return plugins[(name, lang)]
             else:
                 return None if check else self.init_plugin(name, lang)
 
@@ -514,32 +963,51 @@ class ElementBase(object):
         :param string attrib: The :attr:`plugin_attrib` value of the
                               plugin to enable.
         """
+        if existing_xml is None and self._unloaded:
+            self._load_plugins(attrib)
+
         default_lang = self.get_lang()
         if not lang:
             lang = default_lang
 
         plugin_class = self.plugin_attrib_map[attrib]
 
-        if plugin_class.is_extension and (attrib, None) in self.plugins:
-            return self.plugins[(attrib, None)]
-        if reuse and (attrib, lang) in self.plugins:
-            return self.plugins[(attrib, lang)]
-
-        plugin = plugin_class(parent=self, xml=existing_xml)
+        plugins = self._plugins
+        if plugins is None:
+            plugins = self._plugins = OrderedDict()
+        if plugin_class.is_extension and (attrib, None) in plugins:
+            return plugins[(attrib, None)]
+        if reuse and (attrib, lang) in plugins:
+            return plugins[(attrib, lang)]
+
+        detached = existing_xml is None and self.frozen
+        if detached:
+            # Do not add a new element to the XML of a read only stanza.
+            plugin = plugin_class()
+            plugin.parent = weakref.ref(self)
+        else:
+            plugin = plugin_class(parent=self, xml=existing_xml)
 
         if plugin.is_extension:
-            self.plugins[(attrib, None)] = plugin
+            plugins[(attrib, None)] = plugin
         else:
             if lang != default_lang:
                 plugin['lang'] = lang
-            self.plugins[(attrib, lang)] = plugin
+            plugins[(attrib, lang)] = plugin
 
-        if plugin_class in self.plugin_iterables:
-            self.iterables.append(plugin)
+        if plugin_class in self.plugin_iterables and not detached:
+            if self._iterables is None:
+                self._iterables = []
+            self._iterables.append(plugin)
             if plugin_class.plugin_multi_attrib:
                 self.init_plugin(plugin_class.plugin_multi_attrib)
 
-        self.loaded_plugins.add(attrib)
+        if self._loaded_plugins is None:
+            self._loaded_plugins = set()
+        self._loaded_plugins.add(attrib)
+
+        if self.frozen:
+            plugin.freeze()
 
         return plugin
 
@@ -665,51 +1133,24 @@ class ElementBase(object):
             8. The plugin named ``'foo'``
             9. An empty string.
 
+        The search is done once for each interface of a stanza class,
+        and repeated only after another stanza plugin is registered.
+
         :param string attrib: The name of the requested stanza interface.
         """
         full_attrib = attrib
-        attrib_lang = ('%s|' % attrib).split('|')
-        attrib = attrib_lang[0]
-        lang = attrib_lang[1] or None
-
-        kwargs = {}
-        if lang and attrib in self.lang_interfaces:
-            kwargs['lang'] = lang
-
-        if attrib == 'substanzas':
-            return self.iterables
-        elif attrib in self.interfaces or attrib == 'lang':
-            get_method = "get_%s" % attrib.lower()
-            get_method2 = "get%s" % attrib.title()
-
-            if self.plugin_overrides:
-                name = self.plugin_overrides.get(get_method, None)
-                if name:
-                    plugin = self._get_plugin(name, lang)
-                    if plugin:
-                        handler = getattr(plugin, get_method, None)
-                        if handler:
-                            return handler(**kwargs)
-
-            if hasattr(self, get_method):
-                return getattr(self, get_method)(**kwargs)
-            elif hasattr(self, get_method2):
-                return getattr(self, get_method2)(**kwargs)
-            else:
-                if attrib in self.sub_interfaces:
-                    return self._get_sub_text(attrib, lang=lang)
-                elif attrib in self.bool_interfaces:
-                    elem = self.xml.find('{%s}%s' % (self.namespace, attrib))
-                    return elem is not None
-                else:
-                    return self._get_attr(attrib)
-        elif attrib in self.plugin_attrib_map:
-            plugin = self._get_plugin(attrib, lang)
-            if plugin and plugin.is_extension:
-                return plugin[full_attrib]
-            return plugin
+        if '|' in attrib:
+            attrib, lang = attrib.split('|')[:2]
+            lang = lang or None
         else:
-            return ''
+            lang = None
+
+        getters = _accessors(self.__class__)[0]
+        try:
+            getter = getters[attrib]
+        except KeyError:
+            getter = getters[attrib] = _build_getter(self.__class__, attrib)
+        return getter(self, lang, full_attrib)
 
     def __setitem__(self, attrib, value):
         """Set the value of a stanza interface using dictionary-like syntax.
@@ -743,59 +1184,26 @@ class ElementBase(object):
         :param string attrib: The name of the stanza interface to modify.
         :param value: The new value of the stanza interface.
         """
+        if self.frozen:
+            self._check_frozen()
+
         full_attrib = attrib
-        attrib_lang = ('%s|' % attrib).split('|')
-        attrib = attrib_lang[0]
-        lang = attrib_lang[1] or None
-
-        kwargs = {}
-        if lang and attrib in self.lang_interfaces:
-            kwargs['lang'] = lang
-
-        if attrib in self.interfaces or attrib == 'lang':
-            if value is not None:
-                set_method = "set_%s" % attrib.lower()
-                set_method2 = "set%s" % attrib.title()
-
-                if self.plugin_overrides:
-                    name = self.plugin_overrides.get(set_method, None)
-                    if name:
-                        plugin = self._get_plugin(name, lang)
-                        if plugin:
-                            handler = getattr(plugin, set_method, None)
-                            if handler:
-                                return handler(value, **kwargs)
-
-                if hasattr(self, set_method):
-                    getattr(self, set_method)(value, **kwargs)
-                elif hasattr(self, set_method2):
-                    getattr(self, set_method2)(value, **kwargs)
-                else:
-                    if attrib in self.sub_interfaces:
-                        if lang == '*':
-                            return self._set_all_sub_text(attrib,
-                                                          value,
-                                                          lang='*')
-                        return self._set_sub_text(attrib, text=value,
-                                                          lang=lang)
-                    elif attrib in self.bool_interfaces:
-                        if value:
-                            return self._set_sub_text(attrib, '',
-                                    keep=True,
-                                    lang=lang)
-                        else:
-                            return self._set_sub_text(attrib, '',
-                                    keep=False,
-                                    lang=lang)
-                    else:
-                        self._set_attr(attrib, value)
-            else:
-                self.__delitem__(attrib)
-        elif attrib in self.plugin_attrib_map:
-            plugin = self._get_plugin(attrib, lang)
-            if plugin:
-                plugin[full_attrib] = value
-        return self
+        if '|' in attrib:
+            attrib, lang = attrib.split('|')[:2]
+            lang = lang or None
+        else:
+            lang = None
+
+        if value is None and (attrib in self.interfaces or attrib == 'lang'):
+            self.__delitem__(attrib)
+            return self
+
+        setters = _accessors(self.__class__)[1]
+        try:
+            setter = setters[attrib]
+        except KeyError:
+            setter = setters[attrib] = _build_setter(self.__class__, attrib)
+        return setter(self, value, lang, full_attrib)
 
     def __delitem__(self, attrib):
         """Delete the value of a stanza interface using dict-like syntax.
@@ -829,54 +1237,22 @@ class ElementBase(object):
 
         :param attrib: The name of the affected stanza interface.
         """
+        if self.frozen:
+            self._check_frozen()
+
         full_attrib = attrib
-        attrib_lang = ('%s|' % attrib).split('|')
-        attrib = attrib_lang[0]
-        lang = attrib_lang[1] or None
-
-        kwargs = {}
-        if lang and attrib in self.lang_interfaces:
-            kwargs['lang'] = lang
-
-        if attrib in self.interfaces or attrib == 'lang':
-            del_method = "del_%s" % attrib.lower()
-            del_method2 = "del%s" % attrib.title()
-
-            if self.plugin_overrides:
-                name = self.plugin_overrides.get(del_method, None)
-                if name:
-                    plugin = self._get_plugin(attrib, lang)
-                    if plugin:
-                        handler = getattr(plugin, del_method, None)
-                        if handler:
-                            return handler(**kwargs)
-
-            if hasattr(self, del_method):
-                getattr(self, del_method)(**kwargs)
-            elif hasattr(self, del_method2):
-                getattr(self, del_method2)(**kwargs)
-            else:
-                if attrib in self.sub_interfaces:
-                    return self._del_sub(attrib, lang=lang)
-                elif attrib in self.bool_interfaces:
-                    return self._del_sub(attrib, lang=lang)
-                else:
-                    self._del_attr(attrib)
-        elif attrib in self.plugin_attrib_map:
-            plugin = self._get_plugin(attrib, lang, check=True)
-            if not plugin:
-                return self
-            if plugin.is_extension:
-                del plugin[full_attrib]
-                del self.plugins[(attrib, None)]
-            else:
-                del self.plugins[(attrib, plugin['lang'])]
-            self.loaded_plugins.remove(attrib)
-            try:
-                self.xml.remove(plugin.xml)
-            except ValueError:
-                pass
-        return self
+        if '|' in attrib:
+            attrib, lang = attrib.split('|')[:2]
+            lang = lang or None
+        else:
+            lang = None
+
+        deleters = _accessors(self.__class__)[2]
+        try:
+            deleter = deleters[attrib]
+        except KeyError:
+            deleter = deleters[attrib] = _build_deleter(self.__class__, attrib)
+        return deleter(self, lang, full_attrib)
 
     def _set_attr(self, name, value):
         """Set the value of a top level attribute of the XML object.
@@ -888,9 +1264,13 @@ class ElementBase(object):
         :param value: The new value of the attribute, or None or '' to
                       remove it.
         """
+        if self.frozen:
+            self._check_frozen()
         if value is None or value == '':
             self.__delitem__(name)
         else:
+            if not isinstance(value, (str, bytes)):
+                value = '%s' % value
             self.xml.attrib[name] = value
 
     def _del_attr(self, name):
@@ -898,6 +1278,8 @@ class ElementBase(object):
 
         :param name: The name of the attribute.
         """
+        if self.frozen:
+            self._check_frozen()
         if name in self.xml.attrib:
             del self.xml.attrib[name]
 
@@ -973,6 +1355,8 @@ class ElementBase(object):
         :param keep: Indicates if the element should be kept if its text is
                      removed. Defaults to False.
         """
+        if self.frozen:
+            self._check_frozen()
         default_lang = self.get_lang()
         if lang is None:
             lang = default_lang
@@ -1046,6 +1430,8 @@ class ElementBase(object):
         :param bool all: If True, remove all empty elements in the path to the
                          deleted element. Defaults to False.
         """
+        if self.frozen:
+            self._check_frozen()
         path = self._fix_ns(name, split=True)
         original_target = path[-1]
 
@@ -1059,7 +1445,7 @@ class ElementBase(object):
             parent_path = "/".join(path[:len(path) - level - 1])
 
             elements = self.xml.findall(element_path)
-            parent = self.xml.find(parent_path)
+            parent = self.xml.find(parent_path) if parent_path else None
 
             if elements:
                 if parent is None:
@@ -1092,16 +1478,12 @@ class ElementBase(object):
         has a priority value of ``'2'``, and has a status element.
 
         :param string xpath: The XPath expression to check against. It
-                             may be either a string or a list of element
-                             names with attribute checks.
+                             may be either a string, a list of element
+                             names with attribute checks, or a path
+                             compiled with :func:`compile_path`.
         """
-        if not isinstance(xpath, list):
-            xpath = self._fix_ns(xpath, split=True, propagate_ns=False)
-
-        # Extract the tag name and attribute checks for the first XPath node.
-        components = xpath[0].split('@')
-        tag = components[0]
-        attributes = components[1:]
+        path = compile_path(xpath)
+        node, tag, attributes, _ = path[0]
 
         if tag not in (self.name, "{%s}%s" % (self.namespace, self.name)) and \
             tag not in self.loaded_plugins and tag not in self.plugin_attrib:
@@ -1110,33 +1492,35 @@ class ElementBase(object):
 
         # Check the rest of the XPath against any substanzas.
         matched_substanzas = False
-        for substanza in self.iterables:
-            if xpath[1:] == []:
-                break
-            matched_substanzas = substanza.match(xpath[1:])
-            if matched_substanzas:
-                break
+        if len(path) > 1:
+            for substanza in self.iterables:
+                matched_substanzas = substanza.match(path[1:])
+                if matched_substanzas:
+                    break
 
         # Check attribute values.
-        for attribute in attributes:
-            name, value = attribute.split('=')
+        for name, value in attributes:
             if self[name] != value:
                 return False
 
         # Check sub interfaces.
-        if len(xpath) > 1:
-            next_tag = xpath[1]
+        if len(path) > 1:
+            next_tag = path[1][0]
             if next_tag in self.sub_interfaces and self[next_tag]:
                 return True
 
         # Attempt to continue matching the XPath using the stanza's plugins.
-        if not matched_substanzas and len(xpath) > 1:
-            # Convert {namespace}tag@attribs to just tag
-            next_tag = xpath[1].split('@')[0].split('}')[-1]
-            langs = [name[1] for name in self.plugins if name[0] == next_tag]
+        if not matched_substanzas and len(path) > 1:
+            # The plugin name is the next tag without its namespace
+            # or attribute checks.
+            next_tag = path[1][3]
+            if self._unloaded:
+                self._load_plugins(next_tag)
+            langs = [name[1] for name in self._plugins or ()
+                     if name[0] == next_tag]
             for lang in langs:
                 plugin = self._get_plugin(next_tag, lang)
-                if plugin and plugin.match(xpath[1:]):
+                if plugin and plugin.match(path[1:]):
                     return True
             return False
 
@@ -1215,12 +1599,16 @@ class ElementBase(object):
         :param item: Either an XML object or a stanza object to add to
                      this stanza's contents.
         """
+        if self.frozen:
+            self._check_frozen()
         if not isinstance(item, ElementBase):
-            if type(item) == XML_TYPE:
+            if isinstance(item, XML_TYPE):
                 return self.appendxml(item)
             else:
                 raise TypeError
         self.xml.append(item.xml)
+        # The XML may have been copied if it already had a parent.
+        item.xml = self.xml[-1]
         self.iterables.append(item)
         if item.__class__ in self.plugin_iterables:
             if item.__class__.plugin_multi_attrib:
@@ -1239,6 +1627,8 @@ class ElementBase(object):
 
         :param XML xml: The XML object to add to the stanza.
         """
+        if self.frozen:
+            self._check_frozen()
         self.xml.append(xml)
         return self
 
@@ -1250,6 +1640,8 @@ class ElementBase(object):
 
         :param int index: The index of the substanza to remove.
         """
+        if self.frozen:
+            self._check_frozen()
         substanza = self.iterables.pop(index)
         self.xml.remove(substanza.xml)
         return substanza
@@ -1263,6 +1655,8 @@ class ElementBase(object):
 
         Any attribute values will be preserved.
         """
+        if self.frozen:
+            self._check_frozen()
         for child in list(self.xml):
             self.xml.remove(child)
 
@@ -1393,7 +1787,7 @@ class ElementBase(object):
 
     def __copy__(self):
         """Return a copy of the stanza object that does not share the same
-        underlying XML object.
+        underlying XML object. The copy of a frozen stanza may be modified.
         """
         return self.__class__(xml=copy.deepcopy(self.xml), parent=self.parent)
 
@@ -1457,10 +1851,13 @@ class StanzaBase(ElementBase):
     #: A basic set of allowed values for the ``'type'`` interface.
     types = set(('get', 'set', 'error', None, 'unavailable', 'normal', 'chat'))
 
+    __slots__ = ('stream', '_to', '_from')
+
     def __init__(self, stream=None, xml=None, stype=None,
                  sto=None, sfrom=None, sid=None, parent=None):
         self.stream = stream
-        if stream is not None:
+        self._to = self._from = None
+        if stream is not None and stream.default_ns != self.namespace:
             self.namespace = stream.default_ns
         ElementBase.__init__(self, xml, parent)
         if stype is not None:
@@ -1471,7 +1868,7 @@ class StanzaBase(ElementBase):
             self['from'] = sfrom
         if sid is not None:
             self['id'] = sid
-        self.tag = "{%s}%s" % (self.namespace, self.name)
+        self.tag = intern("{%s}%s" % (self.namespace, self.name))
 
     def set_type(self, value):
         """Set the stanza's ``'type'`` attribute.
@@ -1484,9 +1881,28 @@ class StanzaBase(ElementBase):
             self.xml.attrib['type'] = value
         return self
 
+    def _parse_address(self, value):
+        """Return the :class:`~sleekxmpp.jid.FrozenJID` for an address
+        of this stanza.
+
+        Addresses are only split into their parts, without validation,
+        if the stanza's stream has :attr:`~XMLStream.trusted_peer` set.
+        """
+        stream = self.stream
+        if stream is not None and getattr(stream, 'trusted_peer', False):
+            return freeze_trusted(value)
+        return freeze(value)
+
     def get_to(self):
-        """Return the value of the stanza's ``'to'`` attribute."""
-        return JID(self._get_attr('to'))
+        """Return the value of the stanza's ``'to'`` attribute.
+
+        The parsed JID is kept until the attribute changes.
+        """
+        raw = self.xml.attrib.get('to', '')
+        memo = self._to
+        if memo is None or memo[0] != raw:
+            memo = self._to = (raw, self._parse_address(raw))
+        return JID(memo[1])
 
     def set_to(self, value):
         """Set the ``'to'`` attribute of the stanza.
@@ -1494,11 +1910,19 @@ class StanzaBase(ElementBase):
         :param value: A string or :class:`sleekxmpp.xmlstream.JID` object
                representing the recipient's JID.
         """
+        self._to = None
         return self._set_attr('to', str(value))
 
     def get_from(self):
-        """Return the value of the stanza's ``'from'`` attribute."""
-        return JID(self._get_attr('from'))
+        """Return the value of the stanza's ``'from'`` attribute.
+
+        The parsed JID is kept until the attribute changes.
+        """
+        raw = self.xml.attrib.get('from', '')
+        memo = self._from
+        if memo is None or memo[0] != raw:
+            memo = self._from = (raw, self._parse_address(raw))
+        return JID(memo[1])
 
     def set_from(self, value):
         """Set the 'from' attribute of the stanza.
@@ -1506,6 +1930,7 @@ class StanzaBase(ElementBase):
         Arguments:
             from -- A string or JID object representing the sender's JID.
         """
+        self._from = None
         return self._set_attr('from', str(value))
 
     def get_payload(self):
@@ -1541,7 +1966,12 @@ class StanzaBase(ElementBase):
 
         :param bool clear: Indicates if the stanza's contents should be
                            removed. Defaults to ``True``.
+
+        A frozen stanza is not changed; the reply is made using a copy
+        of the stanza instead. Always use the returned stanza.
         """
+        if self.frozen:
+            return copy.copy(self).reply(clear)
         # if it's a component, use from
         if self.stream and hasattr(self.stream, "is_component") and \
             self.stream.is_component:
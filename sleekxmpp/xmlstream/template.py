@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+    sleekxmpp.xmlstream.template
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides pre-serialized stanza templates, used to send
+    the same stanza to many recipients without building and serializing
+    a stanza object for each of them.
+
+    Part of SleekXMPP: The Sleek XMPP Library
+
+    :copyright: (c) 2011 Nathanael C. Fritz
+    :license: MIT, see LICENSE for more details
+"""
+
+import copy
+import uuid
+
+from sleekxmpp.xmlstream.tostring import tobytes, escape
+
+
+class StanzaTemplate(object):
+
+    """
+    A stanza serialized once, with slots for the addressing attributes
+    that change for each recipient.
+
+    The ``to`` and ``id`` attributes are always slots, and the ``from``
+    attribute may be made a slot as well, such as for components that
+    send from many addresses. Other content is copied into every
+    stanza stamped from the template::
+
+        >>> msg = xmpp.make_message('placeholder@example.com', 'Hi')
+        >>> template = StanzaTemplate(msg)
+        >>> template.stamp('user@example.com', 'a1')
+        b'<message to="user@example.com" id="a1" ...'
+
+    Changes made to the stanza after the template has been created
+    are not included in the template.
+
+    :param stanza: The :class:`~sleekxmpp.xmlstream.stanzabase.StanzaBase`
+                   stanza to use.
+    :param bool sfrom: Indicates if the ``from`` attribute is a slot.
+                       Defaults to ``False``.
+    """
+
+    def __init__(self, stanza, sfrom=False):
+        #: A private copy of the stanza, used to create stanza objects
+        #: for each recipient when outgoing filters are used.
+        self.stanza = copy.copy(stanza)
+
+        #: The names of the attributes filled in for each recipient.
+        self.slots = ('to', 'id', 'from') if sfrom else ('to', 'id')
+
+        stream = stanza.stream
+        xml = copy.deepcopy(stanza.xml)
+        token = uuid.uuid4().hex
+        markers = {}
+        for slot in self.slots:
+            marker = 'sleekxmpp-%s-%s' % (slot, token)
+            markers[marker.encode('utf-8')] = slot
+            xml.set(slot, marker)
+        raw = tobytes(xml, xmlns=stream.default_ns if stream else '',
+                           stream=stream,
+                           top_level=True)
+
+        found = sorted((raw.index(marker), marker) for marker in markers)
+        segments = []
+        order = []
+        start = 0
+        for position, marker in found:
+            segments.append(raw[start:position])
+            order.append(self.slots.index(markers[marker]))
+            start = position + len(marker)
+        segments.append(raw[start:])
+
+        #: The serialized stanza, split at each slot.
+        self.segments = tuple(segments)
+
+        #: The index in :attr:`slots` of the value for each slot, in
+        #: the order the slots appear in :attr:`segments`.
+        self.order = tuple(order)
+
+    def stamp(self, sto, sid, sfrom=None):
+        """Return the serialized stanza for a recipient as UTF-8
+        encoded bytes.
+
+        Addresses are used as they are given, without checking that
+        they are valid JIDs.
+
+        :param sto: The recipient's JID.
+        :param sid: The stanza's ``id`` value.
+        :param sfrom: The sender's JID, if the template has a
+                      ``from`` slot.
+        """
+        values = (escape('%s' % sto).encode('utf-8'),
+                  escape('%s' % sid).encode('utf-8'),
+                  escape('%s' % sfrom).encode('utf-8'))
+        segments = self.segments
+        parts = [segments[0]]
+        for i, slot in enumerate(self.order):
+            parts.append(values[slot])
+            parts.append(segments[i + 1])
+        return b''.join(parts)
+
+    def make_stanza(self, sto, sid, sfrom=None):
+        """Return a new stanza object for a recipient.
+
+        :param sto: The recipient's JID.
+        :param sid: The stanza's ``id`` value.
+        :param sfrom: The sender's JID, if the template has a
+                      ``from`` slot.
+        """
+        stanza = copy.copy(self.stanza)
+        stanza['to'] = sto
+        stanza['id'] = sid
+        if len(self.slots) > 2:
+            stanza['from'] = sfrom
+        return stanza
@@ -15,6 +15,7 @@
 
 from __future__ import unicode_literals
 
+import re
 import sys
 
 if sys.version_info < (3, 0):
@@ -23,6 +24,41 @@ if sys.version_info < (3, 0):
 
 XML_NS = 'http://www.w3.org/XML/1998/namespace'
 
+#: The maximum number of tag and attribute names kept in the name cache.
+NAME_CACHE_SIZE = 4096
+
+_names = {}
+
+_escapes = {ord('&'): '&amp;',
+            ord('<'): '&lt;',
+            ord('>'): '&gt;',
+            ord("'"): '&apos;',
+            ord('"'): '&quot;'}
+
+_needs_escape = re.compile('[&<>\'"]').search
+
+
+def _split_name(name):
+    """Split a tag or attribute name into its namespace and local name.
+
+    Results are cached, since a stream uses a small set of names
+    over and over.
+
+    :param string name: A name in ``{namespace}name`` form.
+    """
+    try:
+        return _names[name]
+    except KeyError:
+        if '}' in name:
+            ns, local = name[1:].split('}', 1)
+            result = (ns, local, ' xmlns="%s"' % ns)
+        else:
+            result = ('', name, '')
+        if len(_names) >= NAME_CACHE_SIZE:
+            _names.clear()
+        _names[name] = result
+        return result
+
 
 def tostring(xml=None, xmlns='', stream=None, outbuffer='',
              top_level=False, open_only=False, namespaces=None):
@@ -49,94 +85,125 @@ def tostring(xml=None, xmlns='', stream=None, outbuffer='',
 
     :rtype: Unicode string
     """
-    # Add previous results to the start of the output.
     output = [outbuffer]
+    _serialize(xml, xmlns, stream, output, top_level, open_only, namespaces)
+    return ''.join(output)
 
-    # Extract the element's tag name.
-    tag_name = xml.tag.split('}', 1)[-1]
 
-    # Extract the element's namespace if it is defined.
-    if '}' in xml.tag:
-        tag_xmlns = xml.tag.split('}', 1)[0][1:]
-    else:
-        tag_xmlns = ''
+def tobytes(xml=None, xmlns='', stream=None,
+            top_level=False, open_only=False, namespaces=None):
+    """Serialize an XML object to UTF-8 encoded bytes.
+
+    The output is the same as :func:`tostring`, ready to be written
+    to a socket without further encoding.
+
+    :rtype: bytes
+    """
+    output = []
+    _serialize(xml, xmlns, stream, output, top_level, open_only, namespaces)
+    return ''.join(output).encode('utf-8')
 
-    default_ns = ''
-    stream_ns = ''
-    use_cdata = False
 
+def _serialize(xml, xmlns, stream, output, top_level=False,
+               open_only=False, namespaces=None):
+    """Append the serialization of an XML object to a list of strings.
+
+    Stream settings are looked up once, and child elements are
+    written to the same list instead of being joined separately.
+
+    See :func:`tostring` for a description of the parameters.
+    """
     if stream:
         default_ns = stream.default_ns
         stream_ns = stream.stream_ns
         use_cdata = stream.use_cdata
-
-    # Output the tag name and derived namespace of the element.
-    namespace = ''
-    if tag_xmlns:
-        if top_level and tag_xmlns not in [default_ns, xmlns, stream_ns] \
-          or not top_level and tag_xmlns != xmlns:
-            namespace = ' xmlns="%s"' % tag_xmlns
-    if stream and tag_xmlns in stream.namespace_map:
-        mapped_namespace = stream.namespace_map[tag_xmlns]
-        if mapped_namespace:
-            tag_name = "%s:%s" % (mapped_namespace, tag_name)
-    output.append("<%s" % tag_name)
-    output.append(namespace)
-
-    # Output escaped attribute values.
-    new_namespaces = set()
-    for attrib, value in xml.attrib.items():
-        value = escape(value, use_cdata)
-        if '}' not in attrib:
-            output.append(' %s="%s"' % (attrib, value))
-        else:
-            attrib_ns = attrib.split('}')[0][1:]
-            attrib = attrib.split('}')[1]
-            if attrib_ns == XML_NS:
-                output.append(' xml:%s="%s"' % (attrib, value))
-            elif stream and attrib_ns in stream.namespace_map:
-                mapped_ns = stream.namespace_map[attrib_ns]
-                if mapped_ns:
-                    if namespaces is None:
-                        namespaces = set()
-                    if attrib_ns not in namespaces:
-                        namespaces.add(attrib_ns)
-                        new_namespaces.add(attrib_ns)
-                        output.append(' xmlns:%s="%s"' % (
-                            mapped_ns, attrib_ns))
-                    output.append(' %s:%s="%s"' % (
-                        mapped_ns, attrib, value))
-
-    if open_only:
-        # Only output the opening tag, regardless of content.
-        output.append(">")
-        return ''.join(output)
-
-    if len(xml) or xml.text:
-        # If there are additional child elements to serialize.
-        output.append(">")
-        if xml.text:
-            output.append(escape(xml.text, use_cdata))
+        namespace_map = stream.namespace_map
+    else:
+        default_ns = stream_ns = ''
+        use_cdata = False
+        namespace_map = {}
+    if namespaces is None:
+        namespaces = set()
+
+    if top_level:
+        tag_xmlns, tag_name, namespace = _split_name(xml.tag)
+        if tag_xmlns in (default_ns, xmlns, stream_ns):
+            namespace = ''
+    else:
+        tag_xmlns, tag_name, namespace = '', '', ''
+
+    write = output.append
+
+    def serialize(xml, xmlns, tag_xmlns, tag_name, namespace, open_only):
+        mapped = namespace_map.get(tag_xmlns) if namespace_map else None
+        if mapped:
+            tag_name = '%s:%s' % (mapped, tag_name)
+        write('<')
+        write(tag_name)
+        write(namespace)
+
+        # Output escaped attribute values.
+        new_namespaces = None
+        attrib = xml.attrib
+        if attrib:
+            for name, value in attrib.items():
+                value = escape(value, use_cdata)
+                if '}' not in name:
+                    write(' %s="%s"' % (name, value))
+                    continue
+                attrib_ns, name, _ = _split_name(name)
+                if attrib_ns == XML_NS:
+                    write(' xml:%s="%s"' % (name, value))
+                elif attrib_ns in namespace_map:
+                    mapped_ns = namespace_map[attrib_ns]
+                    if mapped_ns:
+                        if attrib_ns not in namespaces:
+                            namespaces.add(attrib_ns)
+                            if new_namespaces is None:
+                                new_namespaces = []
+                            new_namespaces.append(attrib_ns)
+                            write(' xmlns:%s="%s"' % (mapped_ns, attrib_ns))
+                        write(' %s:%s="%s"' % (mapped_ns, name, value))
+
+        if open_only:
+            # Only output the opening tag, regardless of content.
+            write('>')
+            return
+
+        text = xml.text
         if len(xml):
+            write('>')
+            if text:
+                write(escape(text, use_cdata))
             for child in xml:
-                output.append(tostring(child, tag_xmlns, stream,
-                    namespaces=namespaces))
-        output.append("</%s>" % tag_name)
-    elif xml.text:
-        # If we only have text content.
-        output.append(">%s</%s>" % (escape(xml.text, use_cdata), tag_name))
-    else:
-        # Empty element.
-        output.append(" />")
-    if xml.tail:
-        # If there is additional text after the element.
-        output.append(escape(xml.tail, use_cdata))
-    for ns in new_namespaces:
-        # Remove namespaces introduced in this context. This is necessary
-        # because the namespaces object continues to be shared with other
-        # contexts.
-        namespaces.remove(ns)
-    return ''.join(output)
+                child_xmlns, child_name, child_namespace = \
+                        _split_name(child.tag)
+                if child_xmlns == tag_xmlns:
+                    child_namespace = ''
+                serialize(child, tag_xmlns, child_xmlns, child_name,
+                          child_namespace, False)
+            write('</%s>' % tag_name)
+        elif text:
+            write('>%s</%s>' % (escape(text, use_cdata), tag_name))
+        else:
+            # Empty element.
+            write(' />')
+        tail = xml.tail
+        if tail:
+            # If there is additional text after the element.
+            write(escape(tail, use_cdata))
+        if new_namespaces:
+            # Remove namespaces introduced in this context. This is
+            # necessary because the namespaces object continues to be
+            # shared with other contexts.
+            for ns in new_namespaces:
+                namespaces.discard(ns)
+
+    if not top_level:
+        tag_xmlns, tag_name, namespace = _split_name(xml.tag)
+        if tag_xmlns == xmlns:
+            namespace = ''
+    serialize(xml, xmlns, tag_xmlns, tag_name, namespace, open_only)
 
 
 def escape(text, use_cdata=False):
@@ -149,24 +216,9 @@ def escape(text, use_cdata=False):
         if type(text) != types.UnicodeType:
             text = unicode(text, 'utf-8', 'ignore')
 
-    escapes = {'&': '&amp;',
-               '<': '&lt;',
-               '>': '&gt;',
-               "'": '&apos;',
-               '"': '&quot;'}
-
-    if not use_cdata:
-        text = list(text)
-        for i, c in enumerate(text):
-            text[i] = escapes.get(c, c)
-        return ''.join(text)
-    else:
-        escape_needed = False
-        for c in text:
-            if c in escapes:
-                escape_needed = True
-                break
-        if escape_needed:
-            escaped = map(lambda x : "<![CDATA[%s]]>" % x, text.split("]]>"))
-            return "<![CDATA[]]]><![CDATA[]>]]>".join(escaped)
+    if not _needs_escape(text):
         return text
+    if not use_cdata:
+        return text.translate(_escapes)
+    escaped = map(lambda x : "<![CDATA[%s]]>" % x, text.split("]]>"))
+    return "<![CDATA[]]]><![CDATA[]>]]>".join(escaped)
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+    sleekxmpp.xmlstream.workers
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides a bounded pool of worker threads for running
+    threaded event handlers, and an event queue that is split across
+    several event runner threads while keeping the events for each
+    sender in order.
+
+    Part of SleekXMPP: The Sleek XMPP Library
+
+    :copyright: (c) 2011 Nathanael C. Fritz
+    :license: MIT, see LICENSE for more details
+"""
+
+import collections
+import logging
+import threading
+
+from sleekxmpp.util import Queue
+from sleekxmpp.xmlstream.stanzabase import StanzaBase
+
+
+log = logging.getLogger(__name__)
+
+
+#: Wait for room in the queue before accepting more jobs.
+BLOCK = 'block'
+
+#: Discard jobs that arrive while the queue is full.
+DROP = 'drop'
+
+#: Run jobs that arrive while the queue is full in the submitting thread.
+INLINE = 'inline'
+
+
+class WorkerPool(object):
+
+    """
+    A pool of up to :attr:`max_workers` threads for running jobs.
+
+    Worker threads are started as jobs arrive and no idle worker is
+    available, and exit after :attr:`idle_timeout` seconds without
+    work. Jobs waiting for a worker are held in a queue of at most
+    :attr:`max_queue` jobs; once the queue is full, new jobs are
+    handled using the pool's :attr:`policy`.
+
+    :param int max_workers: The maximum number of worker threads.
+    :param int max_queue: The maximum number of jobs waiting for a
+                          worker, or ``0`` for no limit.
+    :param policy: One of :data:`BLOCK`, :data:`DROP`, or
+                   :data:`INLINE`. Defaults to :data:`BLOCK`.
+    :param string name: A name used for the worker threads.
+    """
+
+    def __init__(self, max_workers=16, max_queue=1000, policy=BLOCK,
+                 name='worker'):
+        if policy not in (BLOCK, DROP, INLINE):
+            raise ValueError("Unknown rejection policy: %s" % policy)
+
+        #: The maximum number of worker threads.
+        self.max_workers = max_workers
+
+        #: The maximum number of jobs waiting for a worker,
+        #: or ``0`` for no limit.
+        self.max_queue = max_queue
+
+        #: How to handle jobs arriving while the queue is full.
+        self.policy = policy
+
+        #: The number of seconds an idle worker waits for a new
+        #: job before exiting.
+        self.idle_timeout = 5.0
+
+        #: If ``True``, worker threads are daemon threads.
+        self.daemon = False
+
+        #: The number of jobs currently being run.
+        self.active = 0
+
+        #: The total number of jobs that have finished running.
+        self.completed = 0
+
+        #: The total number of jobs discarded by the :data:`DROP` policy.
+        self.dropped = 0
+
+        #: The total number of jobs run by the :data:`INLINE` policy.
+        self.inlined = 0
+
+        self.name = name
+        self.jobs = collections.deque()
+        self.workers = 0
+        self._idle = 0
+        self._wakeups = 0
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    @property
+    def queued(self):
+        """The number of jobs waiting for a worker."""
+        return len(self.jobs)
+
+    def stats(self):
+        """Return a dictionary of the pool's current metrics."""
+        with self._lock:
+            return {'workers': self.workers,
+                    'active': self.active,
+                    'queued': len(self.jobs),
+                    'completed': self.completed,
+                    'dropped': self.dropped,
+                    'inlined': self.inlined}
+
+    def submit(self, func, *args):
+        """Run a function in a worker thread.
+
+        Returns ``False`` if the job was dropped because the
+        queue was full.
+
+        :param func: The function to run.
+        :param args: Arguments for the function.
+        """
+        with self._lock:
+            self._stopping = False
+            while self.max_queue and len(self.jobs) >= self.max_queue:
+                if self.policy == DROP:
+                    self.dropped += 1
+                    log.warning('Worker queue is full, dropping %s', func)
+                    return False
+                elif self.policy == INLINE:
+                    self.inlined += 1
+                    break
+                self._not_full.wait()
+            else:
+                self.jobs.append((func, args))
+                # An idle worker only takes one job, so jobs beyond the
+                # idle workers not yet woken need new workers.
+                if self._idle > self._wakeups:
+                    self._wakeups += 1
+                    self._not_empty.notify()
+                elif self.workers < self.max_workers:
+                    self._start_worker()
+                return True
+        func(*args)
+        return True
+
+    def shutdown(self):
+        """Stop all worker threads once the queued jobs have run.
+
+        Submitting a new job restarts the pool.
+        """
+        with self._lock:
+            self._stopping = True
+            self._not_empty.notify_all()
+
+    def _start_worker(self):
+        """Start a new worker thread.
+
+        Must be called while holding the pool's lock.
+        """
+        self.workers += 1
+        thread = threading.Thread(name='%s_%s' % (self.name, self.workers),
+                                  target=self._work)
+        thread.daemon = self.daemon
+        thread.start()
+
+    def _work(self):
+        """Run jobs until idle for too long or the pool is stopped."""
+        while True:
+            with self._lock:
+                if not self.jobs and not self._stopping:
+                    self._idle += 1
+                    self._not_empty.wait(self.idle_timeout)
+                    self._idle -= 1
+                    if self._wakeups:
+                        self._wakeups -= 1
+                if not self.jobs:
+                    self.workers -= 1
+                    return
+                func, args = self.jobs.popleft()
+                self.active += 1
+                self._not_full.notify()
+            try:
+                func(*args)
+            except Exception:
+                log.exception('Error running job in %s', self.name)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+
+class ShardedQueue(object):
+
+    """
+    An event queue split into one queue for each event runner thread.
+
+    Stream handlers and events for a stanza are placed in the queue
+    chosen by the bare JID of the stanza's sender, so that events from
+    one sender are processed in order while events from different
+    senders may be processed concurrently. Other events and scheduled
+    tasks use the first queue.
+
+    :param int count: The number of queues.
+    """
+
+    def __init__(self, count=1):
+        if count < 1:
+            raise ValueError("At least one event queue is required")
+
+        #: The queue for each event runner thread.
+        self.queues = [Queue() for _ in range(count)]
+
+    def qsize(self):
+        return sum(queue.qsize() for queue in self.queues)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def put(self, item, block=True, timeout=None):
+        """Add an event to the queue for its sender.
+
+        :param item: A ``(type, handler, args...)`` event queue item.
+        """
+        if item[0] == 'quit':
+            for queue in self.queues:
+                queue.put(item, block, timeout)
+            return
+        self.queues[self.shard(item)].put(item, block, timeout)
+
+    def get(self, block=True, timeout=None):
+        """Remove an event from the first queue."""
+        return self.queues[0].get(block, timeout)
+
+    def shard(self, item):
+        """Return the index of the queue to use for an event.
+
+        :param item: A ``(type, handler, args...)`` event queue item.
+        """
+        if len(self.queues) == 1 or item[0] == 'schedule':
+            return 0
+        data = item[2]
+        if not isinstance(data, StanzaBase):
+            return 0
+        return hash(data['from'].bare) % len(self.queues)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+    sleekxmpp.xmlstream.xmlbackend
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module selects the ElementTree implementation used for
+    parsing streams and building stanzas.
+
+    The standard library's :mod:`xml.etree.cElementTree` is used by
+    default. Setting the environment variable ``SLEEKXMPP_XML_BACKEND``
+    to ``'lxml'`` before importing SleekXMPP selects the ElementTree
+    API of `lxml <http://lxml.de>`_ instead.
+
+    The lxml backend is not faster: it parses at about the same speed,
+    builds stanzas more slowly, and stanzas are still serialized by
+    :func:`~sleekxmpp.xmlstream.tostring.tostring`. It also differs
+    from ElementTree in one way. An element can only have one parent
+    in lxml, so adding an element that already has a parent to
+    another element adds a copy of it, and later changes to the
+    original are not seen in the copy.
+
+    Part of SleekXMPP: The Sleek XMPP Library
+
+    :copyright: (c) 2011 Nathanael C. Fritz
+    :license: MIT, see LICENSE for more details
+"""
+
+import copy
+import os
+
+
+#: The name of the selected backend, either ``'lxml'`` or ``'etree'``.
+BACKEND = os.environ.get('SLEEKXMPP_XML_BACKEND', '') or 'etree'
+
+if BACKEND not in ('lxml', 'etree'):
+    raise ValueError("Unknown XML backend: %s" % BACKEND)
+
+
+#: The tag used by the lxml backend for elements created with an
+#: empty tag name, such as those held by stanza plugins that manage
+#: their parent's XML instead of their own element. lxml does not
+#: allow empty tag names.
+PLACEHOLDER = '{urn:sleekxmpp:placeholder}placeholder'
+
+
+if BACKEND == 'lxml':
+    from lxml import etree as lxml_etree
+
+    class LxmlElement(lxml_etree.ElementBase):
+
+        """
+        An lxml element which may be added to more than one parent.
+
+        ElementTree allows the same element to appear in several trees,
+        while lxml moves an element that already has a parent. To keep
+        the original tree intact, a copy of such an element is added
+        instead.
+        """
+
+        def append(self, element):
+            if element.getparent() is not None:
+                element = copy.deepcopy(element)
+            lxml_etree.ElementBase.append(self, element)
+
+        def insert(self, index, element):
+            if element.getparent() is not None:
+                element = copy.deepcopy(element)
+            lxml_etree.ElementBase.insert(self, index, element)
+
+    class LxmlTree(object):
+
+        """
+        The ElementTree API provided by lxml, creating elements of
+        the :class:`LxmlElement` class.
+        """
+
+        def __init__(self):
+            self.lookup = lxml_etree.ElementDefaultClassLookup(
+                    element=LxmlElement)
+            self.parser = lxml_etree.XMLParser()
+            self.parser.set_element_class_lookup(self.lookup)
+
+        def __getattr__(self, name):
+            return getattr(lxml_etree, name)
+
+        def Element(self, tag, attrib=None, nsmap=None, **extra):
+            if not tag:
+                tag = PLACEHOLDER
+            return self.parser.makeelement(tag, attrib, nsmap, **extra)
+
+        def fromstring(self, text):
+            return lxml_etree.fromstring(text, self.parser)
+
+        XML = fromstring
+
+        def XMLPullParser(self, events=None, **kwargs):
+            parser = lxml_etree.XMLPullParser(events, **kwargs)
+            parser.set_element_class_lookup(self.lookup)
+            return parser
+
+    ET = LxmlTree()
+
+    #: The base type of element objects created by the backend.
+    XML_TYPE = lxml_etree._Element
+
+else:
+    try:
+        from xml.etree import cElementTree as ET
+    except ImportError:
+        from xml.etree import ElementTree as ET
+
+    #: The base type of element objects created by the backend.
+    XML_TYPE = type(ET.Element('xml'))
@@ -29,11 +29,23 @@ import uuid
 
 from xml.parsers.expat import ExpatError
 
+try:
+    import asyncio
+except ImportError:
+    # Python 2
+    asyncio = None
+
 import sleekxmpp
-from sleekxmpp.util import Queue, QueueEmpty
+from sleekxmpp.util import QueueEmpty, iscoroutinefunction
 from sleekxmpp.thirdparty.statemachine import StateMachine
-from sleekxmpp.xmlstream import Scheduler, tostring, cert
+from sleekxmpp.xmlstream import Scheduler, tostring, tobytes, cert
+from sleekxmpp.xmlstream.dispatch import HandlerIndex
+from sleekxmpp.xmlstream.pending import PendingRequests
+from sleekxmpp.xmlstream.routing import RouteTable
+from sleekxmpp.xmlstream.workers import WorkerPool, ShardedQueue, BLOCK
+from sleekxmpp.xmlstream.sendqueue import LaneQueue, CONTROL, RESPONSE, BULK
 from sleekxmpp.xmlstream.stanzabase import StanzaBase, ET, ElementBase
+from sleekxmpp.xmlstream.xmlbackend import BACKEND
 from sleekxmpp.xmlstream.handler import Waiter, XMLCallback
 from sleekxmpp.xmlstream.matcher import MatchXMLMask
 from sleekxmpp.xmlstream.resolver import resolve, default_resolver
@@ -43,6 +55,9 @@ from sleekxmpp.xmlstream.resolver import resolve, default_resolver
 if sys.version_info < (3, 0):
     from sleekxmpp.xmlstream.filesocket import FileSocket, Socket26
 
+# TLS sessions can only be resumed from Python 3.6 onwards.
+SSL_SESSIONS = hasattr(ssl.SSLSocket, 'session')
+
 
 #: The time in seconds to wait before timing out waiting for response stanzas.
 RESPONSE_TIMEOUT = 30
@@ -55,9 +70,23 @@ WAIT_TIMEOUT = 0.1
 #: same as the number of custom event handling threads.
 #: :data:`HANDLER_THREADS` must be at least 1. For Python implementations
 #: with a GIL, this should be left at 1, but for implemetnations without
-#: a GIL increasing this value can provide better performance.
+#: a GIL increasing this value can provide better performance. Events for
+#: stanzas from the same bare JID are always handled by the same thread.
 HANDLER_THREADS = 1
 
+#: The maximum number of threads used to run event handlers
+#: registered with ``threaded=True``.
+THREADED_HANDLER_WORKERS = 16
+
+#: The maximum number of events waiting for a threaded event handler
+#: worker before :data:`THREADED_HANDLER_POLICY` is applied.
+THREADED_HANDLER_QUEUE = 1000
+
+#: How to handle threaded events while the worker queue is full: one of
+#: ``'block'``, ``'drop'``, or ``'inline'``. See
+#: :class:`~sleekxmpp.xmlstream.workers.WorkerPool`.
+THREADED_HANDLER_POLICY = BLOCK
+
 #: The time in seconds to delay between attempts to resend data
 #: after an SSL error.
 SSL_RETRY_DELAY = 0.5
@@ -66,6 +95,26 @@ SSL_RETRY_DELAY = 0.5
 #: an SSL error.
 SSL_RETRY_MAX = 10
 
+#: The maximum number of bytes of queued stanzas to combine into
+#: a single write. One TLS record holds up to 16KB of data.
+SEND_BATCH_BYTES = 16384
+
+#: The number of microseconds to wait for more stanzas to add to a
+#: write before sending it.
+SEND_CORK = 0
+
+#: The number of stanzas that may wait in the send queue before it is
+#: considered full, or ``0`` for no limit. See
+#: :class:`~sleekxmpp.xmlstream.sendqueue.LaneQueue`.
+SEND_QUEUE_HIGH_WATER = 0
+
+#: How to handle stanzas sent while the send queue is full: one of
+#: ``'block'``, ``'raise'``, or ``'event'``.
+SEND_QUEUE_POLICY = 'block'
+
+#: The maximum number of bytes to read from the socket at once.
+READ_SIZE = 65536
+
 #: Maximum time to delay between connection attempts is one hour.
 RECONNECT_MAX_DELAY = 600
 
@@ -141,6 +190,26 @@ class XMLStream(object):
         #: client certificate to use for authenticating via SASL EXTERNAL.
         self.keyfile = None
 
+        #: An :class:`ssl.SSLContext` to use for TLS and SSL, which may
+        #: be shared by several streams. If ``None``, a context is made
+        #: from :attr:`ssl_version`, :attr:`ca_certs`, :attr:`certfile`,
+        #: and :attr:`keyfile`, and kept for later connections while
+        #: those settings are unchanged.
+        self.ssl_context = None
+        self._ssl_contexts = {}
+
+        #: If ``True``, offer to resume the TLS session of the last
+        #: connection when reconnecting to the same address, so that
+        #: the server may skip the full handshake.
+        self.ssl_resume = True
+        self._ssl_session = None
+
+        #: The time in seconds taken by the TLS handshake of the
+        #: current connection, and whether it resumed an earlier
+        #: session. Both are set before the ``ssl_cert`` event.
+        self.ssl_handshake_time = None
+        self.ssl_session_reused = False
+
         self._der_cert = None
 
         #: The time in seconds to wait for events from the event queue,
@@ -173,6 +242,21 @@ class XMLStream(object):
         #: an SSL error.
         self.ssl_retry_delay = SSL_RETRY_DELAY
 
+        #: The maximum number of bytes of queued stanzas to combine into
+        #: a single write. Setting to ``0`` sends every stanza with a
+        #: separate write.
+        self.send_batch_bytes = SEND_BATCH_BYTES
+
+        #: The number of microseconds to wait for more stanzas to arrive
+        #: before writing a batch smaller than :attr:`send_batch_bytes`.
+        self.send_cork = SEND_CORK
+
+        #: Counters for tuning write batching: the number of ``writes``,
+        #: and the number of ``stanzas`` and ``bytes`` written, along with
+        #: the largest number of stanzas and bytes in one write.
+        self.send_stats = {'writes': 0, 'stanzas': 0, 'bytes': 0,
+                           'max_stanzas': 0, 'max_bytes': 0}
+
         #: The connection state machine tracks if the stream is
         #: ``'connected'`` or ``'disconnected'``.
         self.state = StateMachine(('disconnected', 'connected'))
@@ -194,6 +278,11 @@ class XMLStream(object):
         #: A file-like wrapper for the socket for use with the
         #: :mod:`~xml.etree.ElementTree` module.
         self.filesocket = None
+
+        #: The maximum number of bytes to read from the socket at once.
+        self.read_size = READ_SIZE
+        self._recv_buffer = None
+        self._parser = None
         self.set_socket(socket)
 
         if sys.version_info < (3, 0):
@@ -222,6 +311,23 @@ class XMLStream(object):
         #: to ``False``.
         self.use_cdata = False
 
+        #: Trust the addresses of stanzas on this stream, such as a
+        #: stream to our own server or component router. The ``to``
+        #: and ``from`` JIDs of stanzas are then only split into their
+        #: parts, without stringprep validation. Defaults to ``False``.
+        self.trusted_peer = False
+
+        #: If set to ``True``, incoming stanzas are frozen before being
+        #: passed to handlers, and the handlers share one read only
+        #: stanza instead of each receiving a copy. Handlers must use
+        #: the stanza returned by ``reply()`` or :func:`copy.copy` to
+        #: make changes. Defaults to ``False``.
+        self.frozen_stanzas = False
+
+        #: Raw stanza routes, chosen by the ``to`` address of incoming
+        #: stanzas. See :meth:`register_route`.
+        self.routes = RouteTable()
+
         #: An optional dictionary of proxy settings. It may provide:
         #: :host: The host offering proxy services.
         #: :port: The port for the proxy service.
@@ -276,25 +382,73 @@ class XMLStream(object):
         #: if the connection is terminated.
         self.end_session_on_disconnect = True
 
-        #: A queue of stream, custom, and scheduled events to be processed.
-        self.event_queue = Queue()
-
-        #: A queue of string data to be sent over the stream.
-        self.send_queue = Queue()
+        #: A queue of stream, custom, and scheduled events to be processed,
+        #: split into one queue for each event runner thread. Replace with
+        #: a :class:`~sleekxmpp.xmlstream.workers.ShardedQueue` of a
+        #: different size before calling :meth:`process` to change the
+        #: number of event runner threads for this stream.
+        self.event_queue = ShardedQueue(HANDLER_THREADS)
+
+        #: A :class:`~sleekxmpp.xmlstream.workers.WorkerPool` for running
+        #: event handlers registered with ``threaded=True``.
+        self.handler_pool = WorkerPool(THREADED_HANDLER_WORKERS,
+                                       THREADED_HANDLER_QUEUE,
+                                       THREADED_HANDLER_POLICY,
+                                       name='threaded_handler')
+
+        #: A :class:`~sleekxmpp.xmlstream.sendqueue.LaneQueue` of string
+        #: data to be sent over the stream. Stream control data is sent
+        #: first, followed by responses, and then all other stanzas,
+        #: unless :attr:`send_in_order` is set.
+        #: The ``send_queue_full`` and ``send_queue_drained`` events are
+        #: raised when the queue reaches its high-water mark and
+        #: later drains to its low-water mark.
+        self.send_queue = LaneQueue(SEND_QUEUE_HIGH_WATER,
+                                    policy=SEND_QUEUE_POLICY)
+        self.send_queue.on_full = lambda: self.event('send_queue_full')
+        self.send_queue.on_drained = lambda: self.event('send_queue_drained')
         self.send_queue_lock = threading.Lock()
         self.send_lock = threading.RLock()
 
+        #: If ``True``, stanzas are sent in the order they were queued,
+        #: instead of sending responses ahead of other traffic. Set
+        #: by stream management while it counts outgoing stanzas,
+        #: since the server's acks count stanzas in the order sent.
+        self.send_in_order = False
+
         #: A :class:`~sleekxmpp.xmlstream.scheduler.Scheduler` instance for
         #: executing callbacks in the future based on time delays.
         self.scheduler = Scheduler(self.stop)
         self.__failed_send_stanza = None
 
+        #: A :class:`~sleekxmpp.xmlstream.pending.PendingRequests` table
+        #: of the requests awaiting a response, such as those sent
+        #: using ``Iq.send(future=True)``.
+        self.pending_requests = PendingRequests(self)
+
         #: A mapping of XML namespaces to well-known prefixes.
         self.namespace_map = {StanzaBase.xml_ns: 'xml'}
 
+        #: An :class:`~sleekxmpp.xmlstream.aio.AsyncioTransport` that
+        #: runs the stream on an :mod:`asyncio` event loop instead of
+        #: dedicated threads. Set by :meth:`use_asyncio`; ``None`` when
+        #: using threads.
+        self.transport = None
+
+        #: The :mod:`asyncio` event loop used to run coroutine stream
+        #: and event handlers. Streams using :meth:`use_asyncio` use
+        #: their own loop; otherwise a loop running in a background
+        #: thread shared by all streams is started when first needed.
+        self.loop = None
+
+        #: The nesting depth and root element of the incoming
+        #: stream, used by :meth:`_handle_xml_event`.
+        self._xml_depth = 0
+        self._xml_root = None
+
         self.__thread = {}
         self.__root_stanza = []
-        self.__handlers = []
+        self.__handlers = HandlerIndex()
         self.__event_handlers = {}
         self.__event_handlers_lock = threading.Lock()
         self.__filters = {'in': [], 'out': [], 'out_sync': []}
@@ -380,6 +534,31 @@ class XMLStream(object):
             log.debug("Can not set interrupt signal handlers. " + \
                       "SleekXMPP is not running from a main thread.")
 
+    def use_asyncio(self, loop=None, executor=None):
+        """Run the stream on an :mod:`asyncio` event loop instead of
+        using dedicated reader, sender, scheduler, and event runner
+        threads. Requires Python 3.7 or later.
+
+        Reading, parsing, sending, and scheduled tasks for every stream
+        sharing the loop are done by the loop, while stream and event
+        handlers run in order for each stream on a thread pool that
+        is shared by all streams.
+
+        Must be called before :meth:`connect`. See
+        :class:`~sleekxmpp.xmlstream.aio.AsyncioTransport`.
+
+        :param loop: The :mod:`asyncio` event loop to use. Defaults
+                     to the running event loop, or else a new event
+                     loop, available as the returned transport's
+                     ``loop`` attribute.
+        :param executor: A :class:`concurrent.futures.Executor` for
+                         running handlers. Defaults to a thread pool
+                         shared by all streams.
+        """
+        from sleekxmpp.xmlstream.aio import AsyncioTransport
+        self.transport = AsyncioTransport(self, loop, executor)
+        return self.transport
+
     def new_id(self):
         """Generate and return a new stream ID in hexadecimal form.
 
@@ -429,6 +608,9 @@ class XMLStream(object):
         if use_tls is not None:
             self.use_tls = use_tls
 
+        if self.transport is not None:
+            return self.transport.connect(reattempt)
+
         # Repeatedly attempt to connect until a successful connection
         # is established.
         attempts = self.reconnect_max_attempts
@@ -492,6 +674,8 @@ class XMLStream(object):
             return False
 
         self.configure_socket()
+        self.ssl_handshake_time = None
+        self.ssl_session_reused = False
 
         if self.use_proxy:
             connected = self._connect_proxy()
@@ -502,17 +686,8 @@ class XMLStream(object):
 
         if self.use_ssl:
             log.debug("Socket Wrapped for SSL")
-            if self.ca_certs is None:
-                cert_policy = ssl.CERT_NONE
-            else:
-                cert_policy = ssl.CERT_REQUIRED
-
-            ssl_socket = ssl.wrap_socket(self.socket,
-                                         certfile=self.certfile,
-                                         keyfile=self.keyfile,
-                                         ca_certs=self.ca_certs,
-                                         cert_reqs=cert_policy,
-                                         do_handshake_on_connect=False)
+            ssl_socket = self._wrap_ssl(
+                    self.get_ssl_context(ssl.PROTOCOL_SSLv23))
 
             if hasattr(self.socket, 'socket'):
                 # We are using a testing socket, so preserve the top
@@ -531,7 +706,7 @@ class XMLStream(object):
 
                 if self.use_ssl:
                     try:
-                        self.socket.do_handshake()
+                        self._ssl_handshake()
                     except (Socket.error, ssl.SSLError):
                         log.error('CERT: Invalid certificate trust chain.')
                         if not self.event_handled('ssl_invalid_chain'):
@@ -559,7 +734,13 @@ class XMLStream(object):
 
             self.set_socket(self.socket, ignore=True)
             #this event is where you should set your application state
-            self.event('connected', direct=True)
+            if self.use_ssl:
+                self.event('connected',
+                           {'ssl_handshake_time': self.ssl_handshake_time,
+                            'ssl_session_reused': self.ssl_session_reused},
+                           direct=True)
+            else:
+                self.event('connected', direct=True)
             return True
         except (Socket.error, ssl.SSLError) as serr:
             error_msg = "Could not connect to %s:%s. Socket Error #%s: %s"
@@ -667,6 +848,8 @@ class XMLStream(object):
                            prevents error loops when trying to
                            disconnect after a socket error.
         """
+        if self.transport is not None:
+            return self.transport.disconnect(reconnect, wait, send_close)
         self.state.transition('connected', 'disconnected',
                               wait=2.0,
                               func=self._disconnect,
@@ -707,10 +890,13 @@ class XMLStream(object):
 
         if not self.auto_reconnect:
             self.stop.set()
+            self.scheduler.quit()
+            self.handler_pool.shutdown()
             if self._disconnect_wait_for_threads:
                 self._wait_for_threads()
 
         try:
+            self._save_ssl_session()
             self.socket.shutdown(Socket.SHUT_RDWR)
             self.socket.close()
             self.filesocket.close()
@@ -722,8 +908,12 @@ class XMLStream(object):
             return True
 
     def abort(self):
+        if self.transport is not None:
+            return self.transport.abort()
         self.session_started_event.clear()
         self.stop.set()
+        self.scheduler.quit()
+        self.handler_pool.shutdown()
         if self._disconnect_wait_for_threads:
             self._wait_for_threads()
         try:
@@ -738,6 +928,8 @@ class XMLStream(object):
     def reconnect(self, reattempt=True, wait=False, send_close=True):
         """Reset the stream's state and reconnect to the server."""
         log.debug("reconnecting...")
+        if self.transport is not None:
+            return self.transport.reconnect(reattempt, wait, send_close)
         if self.state.ensure('connected'):
             self.state.transition('connected', 'disconnected',
                     wait=2.0,
@@ -819,18 +1011,10 @@ class XMLStream(object):
         """
         log.info("Negotiating TLS")
         log.info("Using SSL version: %s", str(self.ssl_version))
-        if self.ca_certs is None:
-            cert_policy = ssl.CERT_NONE
-        else:
-            cert_policy = ssl.CERT_REQUIRED
+        if self.transport is not None:
+            return self.transport.start_tls()
 
-        ssl_socket = ssl.wrap_socket(self.socket,
-                                     certfile=self.certfile,
-                                     keyfile=self.keyfile,
-                                     ssl_version=self.ssl_version,
-                                     do_handshake_on_connect=False,
-                                     ca_certs=self.ca_certs,
-                                     cert_reqs=cert_policy)
+        ssl_socket = self._wrap_ssl(self.get_ssl_context())
 
         if hasattr(self.socket, 'socket'):
             # We are using a testing socket, so preserve the top
@@ -840,7 +1024,7 @@ class XMLStream(object):
             self.socket = ssl_socket
 
         try:
-            self.socket.do_handshake()
+            self._ssl_handshake()
         except (Socket.error, ssl.SSLError):
             log.error('CERT: Invalid certificate trust chain.')
             if not self.event_handled('ssl_invalid_chain'):
@@ -867,6 +1051,74 @@ class XMLStream(object):
         self.set_socket(self.socket)
         return True
 
+    def get_ssl_context(self, version=None):
+        """Return the SSL context to use for a TLS or SSL connection.
+
+        Returns :attr:`ssl_context` if set. Otherwise, a context is
+        created from the stream's certificate settings on first use
+        and reused until those settings change.
+
+        :param version: The SSL protocol version to use. Defaults
+                        to :attr:`ssl_version`.
+        """
+        if self.ssl_context is not None:
+            return self.ssl_context
+        if version is None:
+            version = self.ssl_version
+        key = (version, self.ca_certs, self.certfile, self.keyfile)
+        context = self._ssl_contexts.get(key)
+        if context is None:
+            context = ssl.SSLContext(version)
+            # The server name is checked by cert.verify instead.
+            context.check_hostname = False
+            if self.ca_certs is None:
+                context.verify_mode = ssl.CERT_NONE
+            else:
+                context.verify_mode = ssl.CERT_REQUIRED
+                context.load_verify_locations(self.ca_certs)
+            if self.certfile:
+                context.load_cert_chain(self.certfile, self.keyfile)
+            self._ssl_contexts[key] = context
+        return context
+
+    def _wrap_ssl(self, context):
+        """Wrap the stream's socket using an SSL context.
+
+        The TLS session of the last connection is offered for
+        resumption if it was made with the same context and to
+        the same address.
+
+        :param context: The :class:`ssl.SSLContext` to use.
+        """
+        kwargs = {'do_handshake_on_connect': False}
+        if SSL_SESSIONS and self.ssl_resume and self._ssl_session:
+            last_context, address, session = self._ssl_session
+            if last_context is context and address == self.address:
+                kwargs['session'] = session
+        return context.wrap_socket(self.socket, **kwargs)
+
+    def _ssl_handshake(self):
+        """Perform the TLS handshake, recording its duration and
+        whether an earlier session was resumed."""
+        start = time.time()
+        self.socket.do_handshake()
+        self.ssl_handshake_time = time.time() - start
+        self.ssl_session_reused = getattr(self.socket, 'session_reused',
+                                          False)
+        log.debug('TLS handshake took %.3f seconds, session reused: %s',
+                  self.ssl_handshake_time, self.ssl_session_reused)
+        self._save_ssl_session()
+
+    def _save_ssl_session(self):
+        """Keep the current TLS session for resuming on reconnect.
+
+        Servers using TLS 1.3 send session tickets after the
+        handshake, so this is done again before closing the socket.
+        """
+        session = getattr(self.socket, 'session', None)
+        if session is not None and self.ssl_resume:
+            self._ssl_session = (self.socket.context, self.address, session)
+
     def _cert_expiration(self, event):
         """Schedule an event for when the TLS certificate expires."""
 
@@ -1028,12 +1280,20 @@ class XMLStream(object):
         """Add a stream event handler that will be executed when a matching
         stanza is received.
 
+        Handlers are checked in the order they were registered, unless
+        ``before`` or ``after`` is given to place the new handler next
+        to an existing one.
+
         :param handler:
                 The :class:`~sleekxmpp.xmlstream.handler.base.BaseHandler`
                 derived object to execute.
+        :param before: The name of a registered handler that the new
+                       handler should be checked before.
+        :param after: The name of a registered handler that the new
+                      handler should be checked after.
         """
         if handler.stream is None:
-            self.__handlers.append(handler)
+            self.__handlers.add(handler, before=before, after=after)
             handler.stream = weakref.ref(self)
 
     def remove_handler(self, name):
@@ -1041,13 +1301,62 @@ class XMLStream(object):
 
         :param name: The name of the handler.
         """
-        idx = 0
-        for handler in self.__handlers:
-            if handler.name == name:
-                self.__handlers.pop(idx)
-                return True
-            idx += 1
-        return False
+        return self.__handlers.remove(name)
+
+    def register_route(self, pattern, pointer):
+        """Route incoming stanzas addressed to a domain or JID to a
+        function, without creating stanza objects.
+
+        The function is called in the stream's reader thread with the
+        :class:`~sleekxmpp.xmlstream.routing.Envelope` of each stanza
+        whose ``to`` address matches the pattern. Routed stanzas are
+        not passed through incoming filters or stream handlers, and
+        are typically sent on again using :meth:`forward`.
+
+        Since incoming filters are skipped, routed stanzas are not
+        counted by filters such as the one used by stream management
+        (XEP-0198) to acknowledge received stanzas. Iq results and
+        errors replying to requests in :attr:`pending_requests` are
+        never routed, so responses to the stream's own requests are
+        still delivered.
+
+        See :class:`~sleekxmpp.xmlstream.routing.RouteTable` for the
+        supported patterns.
+
+        :param string pattern: The domain, JID, or wildcard pattern.
+        :param pointer: The function to execute.
+        """
+        self.routes.add(pattern, pointer)
+
+    def remove_route(self, pattern):
+        """Remove the route registered for a pattern.
+
+        :param string pattern: The pattern given to :meth:`register_route`.
+        """
+        return self.routes.remove(pattern)
+
+    def forward(self, xml, sto=None, sfrom=None, now=False):
+        """Send a raw stanza, such as one given to a route, on the stream.
+
+        The stanza's XML is serialized directly, without creating a
+        stanza object or applying outgoing filters.
+
+        :param xml: The :class:`~xml.etree.ElementTree.Element` or
+                    :class:`~sleekxmpp.xmlstream.routing.Envelope`
+                    of the stanza.
+        :param sto: Optionally replace the ``to`` address.
+        :param sfrom: Optionally replace the ``from`` address.
+        :param bool now: Skip the send queue.
+        """
+        if hasattr(xml, 'xml'):
+            xml = xml.xml
+        if sto is not None:
+            xml.set('to', str(sto))
+        if sfrom is not None:
+            xml.set('from', str(sfrom))
+        self.send_raw(tobytes(xml, xmlns=self.default_ns,
+                                   stream=self,
+                                   top_level=True), now)
 
     def get_dns_records(self, domain, port=None):
         """Get the DNS records for a domain.
@@ -1089,9 +1398,12 @@ class XMLStream(object):
 
         :param name: The name of the event that will trigger
                      this handler.
-        :param pointer: The function to execute.
+        :param pointer: The function to execute. Coroutine functions
+                        (``async def``) are run on the stream's
+                        :attr:`loop` instead of by the event runner.
         :param threaded: If set to ``True``, the handler will execute
-                         in its own thread. Defaults to ``False``.
+                         in a thread from :attr:`handler_pool`.
+                         Defaults to ``False``.
         :param disposable: If set to ``True``, the handler will be
                            discarded after one use. Defaults to ``False``.
         """
@@ -1138,13 +1450,15 @@ class XMLStream(object):
         log.debug("Event triggered: " + name)
 
         handlers = self.__event_handlers.get(name, [])
+        shared = len(handlers) < 2 or getattr(data, 'frozen', False)
         for handler in handlers:
-            #TODO:  Data should not be copied, but should be read only,
-            #       but this might break current code so it's left for future.
-
-            out_data = copy.copy(data) if len(handlers) > 1 else data
+            # Each handler is given its own copy of the data, unless
+            # the data is a read only stanza.
+            out_data = data if shared else copy.copy(data)
             old_exception = getattr(data, 'exception', None)
-            if direct:
+            if iscoroutinefunction(handler[0]):
+                self.run_coroutine(handler[0](out_data), out_data)
+            elif direct:
                 try:
                     handler[0](out_data)
                 except Exception as e:
@@ -1167,6 +1481,38 @@ class XMLStream(object):
                     except:
                         pass
 
+    def run_coroutine(self, coro, origin=None):
+        """Run a coroutine on the stream's :attr:`loop`.
+
+        Exceptions raised by the coroutine are handled in the
+        same way as those raised by event handlers.
+
+        Returns a :class:`concurrent.futures.Future` for the
+        coroutine's result.
+
+        :param coro: The coroutine object to run.
+        :param origin: The stanza or event data the coroutine is
+                       processing, used for reporting exceptions.
+        """
+        if self.loop is None:
+            from sleekxmpp.xmlstream.aio import shared_loop
+            self.loop = shared_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+        def check_exception(future):
+            if future.cancelled() or future.exception() is None:
+                return
+            e = future.exception()
+            log.error('Error processing coroutine handler: %s', coro,
+                      exc_info=e)
+            if hasattr(origin, 'exception'):
+                origin.exception(e)
+            else:
+                self.exception(e)
+
+        future.add_done_callback(check_exception)
+        return future
+
     def schedule(self, name, seconds, callback, args=None,
                  kwargs=None, repeat=False):
         """Schedule a callback function to execute after a given delay.
@@ -1193,7 +1539,8 @@ class XMLStream(object):
         """
         return xml
 
-    def send(self, data, mask=None, timeout=None, now=False, use_filters=True):
+    def send(self, data, mask=None, timeout=None, now=False,
+             use_filters=True, lane=None):
         """A wrapper for :meth:`send_raw()` for sending stanza objects.
 
         May optionally block until an expected response is received.
@@ -1215,11 +1562,17 @@ class XMLStream(object):
                                  applied to the given stanza data. Disabling
                                  filters is useful when resending stanzas.
                                  Defaults to ``True``.
+        :param lane: The send queue lane to use. By default, Iq results
+                     and errors are sent as responses, other stanzas
+                     in the bulk lane, and any other elements, such as
+                     stream management requests, as control data.
         """
         if timeout is None:
             timeout = self.response_timeout
         if hasattr(mask, 'xml'):
             mask = mask.xml
+        if lane is None or self.send_in_order:
+            lane = self._send_lane(data)
 
         if isinstance(data, ElementBase):
             if use_filters:
@@ -1241,15 +1594,31 @@ class XMLStream(object):
                         data = filter(data)
                         if data is None:
                             return
-                str_data = tostring(data.xml, xmlns=self.default_ns,
-                                              stream=self,
-                                              top_level=True)
-                self.send_raw(str_data, now)
+                raw_data = tobytes(data.xml, xmlns=self.default_ns,
+                                             stream=self,
+                                             top_level=True)
+                self.send_raw(raw_data, now, lane=lane)
         else:
-            self.send_raw(data, now)
+            self.send_raw(data, now, lane=lane)
         if mask is not None:
             return wait_for.wait(timeout)
 
+    def _send_lane(self, data):
+        """Choose the send queue lane for outgoing data.
+
+        :param data: The stanza object or string to send.
+        """
+        if not isinstance(data, ElementBase):
+            return BULK
+        if data.name == 'iq':
+            if data['type'] in ('result', 'error') and \
+               not self.send_in_order:
+                return RESPONSE
+            return BULK
+        if data.name in ('message', 'presence'):
+            return BULK
+        return CONTROL
+
     def send_xml(self, data, mask=None, timeout=None, now=False):
         """Send an XML object on the stream, and optionally wait
         for a response.
@@ -1272,19 +1641,89 @@ class XMLStream(object):
             timeout = self.response_timeout
         return self.send(tostring(data), mask, timeout, now)
 
-    def send_raw(self, data, now=False, reconnect=None):
+    def send_template(self, template, recipients, use_filters=False,
+                      lane=BULK):
+        """Send a stanza template to many recipients.
+
+        Each recipient's stanza is stamped from the template's
+        serialization, and the stanzas are combined into writes of up
+        to :attr:`send_batch_bytes` bytes before being queued.
+
+        Outgoing filters are not used unless ``use_filters`` is set,
+        in which case a stanza object is created for each recipient
+        and sent with :meth:`send`. Filters registered as ``out_sync``,
+        such as the one used for stream management, are always used,
+        with a stanza object created for each recipient.
+
+        :param template: The
+                         :class:`~sleekxmpp.xmlstream.template.StanzaTemplate`
+                         to send.
+        :param recipients: An iterable of ``(to, id, from)`` tuples.
+        :param bool use_filters: Indicates if outgoing filters should
+                                 be applied to each stanza.
+                                 Defaults to ``False``.
+        :param lane: The send queue lane to use. Defaults to the
+                     bulk lane, which is always used while
+                     :attr:`send_in_order` is set.
+        """
+        if self.send_in_order:
+            lane = BULK
+        if use_filters:
+            for sto, sid, sfrom in recipients:
+                self.send(template.make_stanza(sto, sid, sfrom), lane=lane)
+            return
+
+        filters = self.__filters['out_sync']
+        if filters:
+            for sto, sid, sfrom in recipients:
+                data = template.make_stanza(sto, sid, sfrom)
+                with self.send_queue_lock:
+                    for filter in filters:
+                        data = filter(data)
+                        if data is None:
+                            break
+                    else:
+                        self.send_raw(tobytes(data.xml,
+                                              xmlns=self.default_ns,
+                                              stream=self,
+                                              top_level=True), lane=lane)
+            return
+
+        stamp = template.stamp
+        budget = self.send_batch_bytes
+        batch = []
+        size = 0
+        for sto, sid, sfrom in recipients:
+            data = stamp(sto, sid, sfrom)
+            batch.append(data)
+            size += len(data)
+            if size >= budget:
+                self.send_raw(b''.join(batch), lane=lane)
+                batch = []
+                size = 0
+        if batch:
+            self.send_raw(b''.join(batch), lane=lane)
+
+    def send_raw(self, data, now=False, reconnect=None, lane=BULK):
         """Send raw data across the stream.
 
-        :param string data: Any string value.
+        :param data: Any string value, or UTF-8 encoded bytes.
         :param bool reconnect: Indicates if the stream should be
                                restarted if there is an error sending
                                the stanza. Used mainly for testing.
                                Defaults to :attr:`auto_reconnect`.
+        :param lane: The send queue lane to use. Defaults to the
+                     bulk lane.
         """
-        if now:
-            log.debug("SEND (IMMED): %s", data)
-            try:
+        if self.transport is not None:
+            self.transport.send(data, now)
+        elif now:
+            if isinstance(data, bytes):
+                log.debug("SEND (IMMED): %s", data.decode('utf-8'))
+            else:
+                log.debug("SEND (IMMED): %s", data)
                 data = data.encode('utf-8')
+            try:
                 total = len(data)
                 sent = 0
                 count = 0
@@ -1318,7 +1757,7 @@ class XMLStream(object):
                 if not self.stop.is_set():
                     self.disconnect(reconnect, send_close=False)
         else:
-            self.send_queue.put(data)
+            self.send_queue.put(data, lane=lane)
         return True
 
     def _start_thread(self, name, target, track=True):
@@ -1397,6 +1836,9 @@ class XMLStream(object):
         - The event queue processor
         - The send queue processor
         - The scheduler
+
+        unless the stream is run on an :mod:`asyncio` event loop using
+        :meth:`use_asyncio`.
         """
         if 'threaded' in kwargs and 'block' in kwargs:
             raise ValueError("process() called with both " + \
@@ -1406,9 +1848,14 @@ class XMLStream(object):
         else:
             threaded = kwargs.get('threaded', True)
 
-        for t in range(0, HANDLER_THREADS):
+        if self.transport is not None:
+            return self.transport.process(block=not threaded)
+
+        self.handler_pool.daemon = self._use_daemons
+        for t, queue in enumerate(self.event_queue.queues):
             log.debug("Starting HANDLER THREAD")
-            self._start_thread('event_thread_%s' % t, self._event_runner)
+            self._start_thread('event_thread_%s' % t,
+                               lambda queue=queue: self._event_runner(queue))
 
         self._start_thread('send_thread', self._send_thread)
         self._start_thread('scheduler_thread', self._scheduler_thread)
@@ -1484,46 +1931,113 @@ class XMLStream(object):
 
         Stream events are raised for each received stanza.
         """
-        depth = 0
-        root = None
-        for event, xml in ET.iterparse(self.filesocket, (b'end', b'start')):
-            if event == b'start':
-                if depth == 0:
-                    # We have received the start of the root element.
-                    root = xml
-                    log.debug('RECV: %s', tostring(root, xmlns=self.default_ns,
-                                                         stream=self,
-                                                         top_level=True,
-                                                         open_only=True))
-                    # Perform any stream initialization actions, such
-                    # as handshakes.
-                    self.stream_end_event.clear()
-                    self.start_stream_handler(root)
-
-                    # We have a successful stream connection, so reset
-                    # exponential backoff for new reconnect attempts.
-                    self.reconnect_delay = 1.0
-                depth += 1
-            if event == b'end':
-                depth -= 1
-                if depth == 0:
-                    # The stream's root element has closed,
-                    # terminating the stream.
-                    log.debug("End of stream recieved")
-                    self.stream_end_event.set()
-                    return False
-                elif depth == 1:
-                    # We only raise events for stanzas that are direct
-                    # children of the root element.
-                    try:
-                        self.__spawn_event(xml)
-                    except RestartStream:
-                        return True
-                    if root is not None:
-                        # Keep the root element empty of children to
-                        # save on memory use.
-                        root.clear()
+        if not hasattr(ET, 'XMLPullParser'):
+            self._xml_depth = 0
+            self._xml_root = None
+            for event, xml in ET.iterparse(self.filesocket,
+                                           (b'end', b'start')):
+                result = self._handle_xml_event(event, xml)
+                if result is not None:
+                    return result
+            log.debug("Ending read XML loop")
+            return
+
+        self.reset_parser()
+        if self._recv_buffer is None or \
+           len(self._recv_buffer) != self.read_size:
+            self._recv_buffer = bytearray(self.read_size)
+        buf = self._recv_buffer
+        view = memoryview(buf)
+        recv_into = self.socket.recv_into
+        while True:
+            size = recv_into(buf)
+            if not size:
+                break
+            result = self.feed_xml(view[:size])
+            if result is not None:
+                return result
         log.debug("Ending read XML loop")
+        self._parser.close()
+
+    def reset_parser(self):
+        """Prepare to parse a new incoming stream with :meth:`feed_xml`."""
+        self._xml_depth = 0
+        self._xml_root = None
+        self._parser = ET.XMLPullParser(events=('end', 'start'))
+
+    def feed_xml(self, data):
+        """Parse a chunk of data received from the stream.
+
+        Stream events are raised for each completed stanza. The data
+        may end at any point, and will not block waiting for more.
+
+        Returns ``False`` if the stream was terminated, ``True`` if the
+        stream must be restarted, and ``None`` otherwise. Once a value
+        other than ``None`` is returned, :meth:`reset_parser` must be
+        called before parsing the next stream.
+
+        :param data: A bytes-like object with the received data.
+        """
+        if BACKEND == 'lxml':
+            # lxml's parser only accepts bytes objects.
+            data = bytes(data)
+        self._parser.feed(data)
+        for event, xml in self._parser.read_events():
+            result = self._handle_xml_event(event, xml)
+            if result is not None:
+                return result
+
+    def _handle_xml_event(self, event, xml):
+        """Process a single ``'start'`` or ``'end'`` parser event
+        from the incoming XML stream.
+
+        The nesting depth and root element of the stream being parsed
+        are kept in :attr:`_xml_depth` and :attr:`_xml_root`, which
+        must be reset before parsing a new stream.
+
+        Returns ``False`` if the stream was terminated, ``True`` if the
+        stream must be restarted, and ``None`` otherwise.
+
+        :param event: The parser event name.
+        :param xml: The :class:`~xml.etree.ElementTree.Element` for
+                    the event.
+        """
+        if event == 'start':
+            if self._xml_depth == 0:
+                # We have received the start of the root element.
+                self._xml_root = xml
+                log.debug('RECV: %s', tostring(xml, xmlns=self.default_ns,
+                                                    stream=self,
+                                                    top_level=True,
+                                                    open_only=True))
+                # Perform any stream initialization actions, such
+                # as handshakes.
+                self.stream_end_event.clear()
+                self.start_stream_handler(xml)
+
+                # We have a successful stream connection, so reset
+                # exponential backoff for new reconnect attempts.
+                self.reconnect_delay = 1.0
+            self._xml_depth += 1
+        elif event == 'end':
+            self._xml_depth -= 1
+            if self._xml_depth == 0:
+                # The stream's root element has closed,
+                # terminating the stream.
+                log.debug("End of stream recieved")
+                self.stream_end_event.set()
+                return False
+            elif self._xml_depth == 1:
+                # We only raise events for stanzas that are direct
+                # children of the root element.
+                try:
+                    self.__spawn_event(xml)
+                except RestartStream:
+                    return True
+                if self._xml_root is not None:
+                    # Keep the root element empty of children to
+                    # save on memory use.
+                    self._xml_root.clear()
 
     def _build_stanza(self, xml, default_ns=None):
         """Create a stanza object from a given XML object.
@@ -1550,6 +2064,16 @@ class XMLStream(object):
             stanza['lang'] = self.peer_default_lang
         return stanza
 
+    def _is_pending_response(self, xml):
+        """Check if raw XML is an Iq reply to a pending request.
+
+        :param xml: The :class:`~xml.etree.ElementTree.Element` of
+                    the received stanza.
+        """
+        return xml.get('type') in ('result', 'error') and \
+               xml.tag.endswith('}iq') and \
+               xml.get('id') in self.pending_requests
+
     def __spawn_event(self, xml):
         """
         Analyze incoming XML stanzas and convert them into stanza
@@ -1559,6 +2083,19 @@ class XMLStream(object):
         :param xml: The :class:`~sleekxmpp.xmlstream.stanzabase.ElementBase`
                     stanza to analyze.
         """
+        # Stanzas with a raw route are passed on without building a
+        # stanza object, or being counted by incoming filters. Replies
+        # to the stream's own pending requests are never routed.
+        if self.routes and not self._is_pending_response(xml):
+            route, envelope = self.routes.find(xml)
+            if route is not None:
+                try:
+                    route(envelope)
+                except Exception as e:
+                    log.exception('Error in route for %s', envelope)
+                    self.exception(e)
+                return
+
         # Apply any preprocessing filters.
         xml = self.incoming_filter(xml)
 
@@ -1574,23 +2111,29 @@ class XMLStream(object):
 
         log.debug("RECV: %s", stanza)
 
+        # Responses to requests in the pending request table are
+        # delivered directly, without looking for stream handlers.
+        if self.pending_requests and self.pending_requests.resolve(stanza):
+            return
+
+        if self.frozen_stanzas:
+            stanza.freeze()
+
         # Match the stanza against registered handlers. Handlers marked
         # to run "in stream" will be executed immediately; the rest will
         # be queued.
         unhandled = True
-        matched_handlers = [h for h in self.__handlers if h.match(stanza)]
+        matched_handlers = [h for h in self.__handlers.candidates(stanza) \
+                              if h.match(stanza)]
         for handler in matched_handlers:
-            if len(matched_handlers) > 1:
+            if len(matched_handlers) > 1 and not stanza.frozen:
                 stanza_copy = copy.copy(stanza)
             else:
                 stanza_copy = stanza
             handler.prerun(stanza_copy)
             self.event_queue.put(('stanza', handler, stanza_copy))
-            try:
-                if handler.check_delete():
-                    self.__handlers.remove(handler)
-            except:
-                pass  # not thread safe
+            if handler.check_delete():
+                self.__handlers.discard(handler)
             unhandled = False
 
         # Some stanzas require responses, such as Iq queries. A default
@@ -1617,65 +2160,31 @@ class XMLStream(object):
             else:
                 self.exception(e)
 
-    def _event_runner(self):
+    def _event_runner(self, queue=None):
         """Process the event queue and execute handlers.
 
         The number of event runner threads is controlled by HANDLER_THREADS.
 
         Stream event handlers will all execute in this thread. Custom event
-        handlers may be spawned in individual threads.
+        handlers registered with ``threaded=True`` are run by
+        :attr:`handler_pool`.
+
+        :param queue: The queue of events for this thread. Defaults
+                      to :attr:`event_queue`.
         """
         log.debug("Loading event runner")
+        if queue is None:
+            queue = self.event_queue
         try:
             while not self.stop.is_set():
                 try:
                     wait = self.wait_timeout
-                    event = self.event_queue.get(True, timeout=wait)
+                    event = queue.get(True, timeout=wait)
                 except QueueEmpty:
                     event = None
                 if event is None:
                     continue
-
-                etype, handler = event[0:2]
-                args = event[2:]
-                orig = copy.copy(args[0])
-
-                if etype == 'stanza':
-                    try:
-                        handler.run(args[0])
-                    except Exception as e:
-                        error_msg = 'Error processing stream handler: %s'
-                        log.exception(error_msg, handler.name)
-                        orig.exception(e)
-                elif etype == 'schedule':
-                    name = args[2]
-                    try:
-                        log.debug('Scheduled event: %s: %s', name, args[0])
-                        handler(*args[0], **args[1])
-                    except Exception as e:
-                        log.exception('Error processing scheduled task')
-                        self.exception(e)
-                elif etype == 'event':
-                    func, threaded, disposable = handler
-                    try:
-                        if threaded:
-                            x = threading.Thread(
-                                    name="Event_%s" % str(func),
-                                    target=self._threaded_event_wrapper,
-                                    args=(func, args))
-                            x.daemon = self._use_daemons
-                            x.start()
-                        else:
-                            func(*args)
-                    except Exception as e:
-                        error_msg = 'Error processing event handler: %s'
-                        log.exception(error_msg, str(func))
-                        if hasattr(orig, 'exception'):
-                            orig.exception(e)
-                        else:
-                            self.exception(e)
-                elif etype == 'quit':
-                    log.debug("Quitting event runner thread")
+                if not self._run_event(event):
                     break
         except KeyboardInterrupt:
             log.debug("Keyboard Escape Detected in _event_runner")
@@ -1687,6 +2196,55 @@ class XMLStream(object):
 
         self._end_thread('event runner')
 
+    def _run_event(self, event):
+        """Execute the handler for an item taken from the event queue.
+
+        Returns ``False`` if the item asked the event runner to quit.
+
+        :param event: A ``(type, handler, args...)`` event queue item.
+        """
+        etype, handler = event[0:2]
+        args = event[2:]
+        if getattr(args[0], 'frozen', False):
+            orig = args[0]
+        else:
+            orig = copy.copy(args[0])
+
+        if etype == 'stanza':
+            try:
+                handler.run(args[0])
+            except Exception as e:
+                error_msg = 'Error processing stream handler: %s'
+                log.exception(error_msg, handler.name)
+                orig.exception(e)
+        elif etype == 'schedule':
+            name = args[2]
+            try:
+                log.debug('Scheduled event: %s: %s', name, args[0])
+                handler(*args[0], **args[1])
+            except Exception as e:
+                log.exception('Error processing scheduled task')
+                self.exception(e)
+        elif etype == 'event':
+            func, threaded, disposable = handler
+            try:
+                if threaded:
+                    self.handler_pool.submit(self._threaded_event_wrapper,
+                                             func, args)
+                else:
+                    func(*args)
+            except Exception as e:
+                error_msg = 'Error processing event handler: %s'
+                log.exception(error_msg, str(func))
+                if hasattr(orig, 'exception'):
+                    orig.exception(e)
+                else:
+                    self.exception(e)
+        elif etype == 'quit':
+            log.debug("Quitting event runner thread")
+            return False
+        return True
+
     def _send_thread(self):
         """Extract stanzas from the send queue and send them on the stream."""
         try:
@@ -1695,15 +2253,15 @@ class XMLStream(object):
                       not self.session_started_event.is_set():
                     self.session_started_event.wait(timeout=0.1)
                 if self.__failed_send_stanza is not None:
-                    data = self.__failed_send_stanza
+                    data, items = self.__failed_send_stanza
                     self.__failed_send_stanza = None
                 else:
                     try:
                         data = self.send_queue.get(True, 1)
                     except QueueEmpty:
                         continue
-                log.debug("SEND: %s", data)
-                enc_data = data.encode('utf-8')
+                    data, items = self._send_batch(data)
+                enc_data = data
                 total = len(enc_data)
                 sent = 0
                 count = 0
@@ -1729,12 +2287,19 @@ class XMLStream(object):
                                 tries += 1
                     if count > 1:
                         log.debug('SENT: %d chunks', count)
-                    self.send_queue.task_done()
+                    stats = self.send_stats
+                    stats['writes'] += 1
+                    stats['stanzas'] += items
+                    stats['bytes'] += total
+                    stats['max_stanzas'] = max(stats['max_stanzas'], items)
+                    stats['max_bytes'] = max(stats['max_bytes'], total)
+                    for _ in range(items):
+                        self.send_queue.task_done()
                 except (Socket.error, ssl.SSLError) as serr:
                     self.event('socket_error', serr, direct=True)
                     log.warning("Failed to send %s", data)
                     if not self.stop.is_set():
-                        self.__failed_send_stanza = data
+                        self.__failed_send_stanza = (data, items)
                         self._end_thread('send')
                         self.disconnect(self.auto_reconnect, send_close=False)
                         return
@@ -1748,6 +2313,51 @@ class XMLStream(object):
 
         self._end_thread('send')
 
+    def _send_batch(self, data):
+        """Combine queued stanzas into a single write.
+
+        Stanzas are taken from the send queue until the batch holds at
+        least :attr:`send_batch_bytes` bytes, waiting up to
+        :attr:`send_cork` microseconds for more stanzas to arrive.
+
+        Returns the encoded data and the number of queue items used.
+        Stanzas queued by :meth:`send` are already encoded, and only
+        strings passed to :meth:`send_raw` are encoded here.
+
+        :param data: The first string or bytes of data to send.
+        """
+        debug = log.isEnabledFor(logging.DEBUG)
+        chunks = []
+        size = 0
+        budget = self.send_batch_bytes
+        if self.send_cork:
+            deadline = time.time() + self.send_cork / 1000000.0
+        while True:
+            if isinstance(data, bytes):
+                if debug:
+                    log.debug("SEND: %s", data.decode('utf-8'))
+                chunk = data
+            else:
+                log.debug("SEND: %s", data)
+                chunk = data.encode('utf-8')
+            chunks.append(chunk)
+            size += len(chunk)
+            if not budget or size >= budget:
+                break
+            try:
+                data = self.send_queue.get(False)
+            except QueueEmpty:
+                if not self.send_cork:
+                    break
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    data = self.send_queue.get(True, timeout)
+                except QueueEmpty:
+                    break
+        return b''.join(chunks), len(chunks)
+
     def _scheduler_thread(self):
         self.scheduler.process(threaded=False)
         self._end_thread('scheduler')
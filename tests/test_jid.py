@@ -1,5 +1,11 @@
+import pickle
+
 from sleekxmpp.test import *
 from sleekxmpp import JID, InvalidJID
+from sleekxmpp.jid import JIDCache, JID_CACHE, FrozenJID, freeze
+from sleekxmpp.jid import freeze_trusted, _intern
+from sleekxmpp.jid import nodeprep, resourceprep
+from sleekxmpp.util.stringprep_profiles import StringPrepError
 
 
 class TestJIDClass(SleekTest):
@@ -279,4 +285,115 @@ class TestJIDClass(SleekTest):
         #self.assertRaises(InvalidJID, JID, '%s@example.com' % 'bar2\\20')
 
 
+    def testJIDCache(self):
+        """Test evicting the least recently used JIDs."""
+        cache = JIDCache(size=2)
+        cache.add('a@example.com', ('a', 'example.com', None))
+        cache.add('b@example.com', ('b', 'example.com', None))
+        cache.add('me@example.com', ('me', 'example.com', None), pinned=True)
+        cache.get('a@example.com')
+        cache.add('c@example.com', ('c', 'example.com', None))
+
+        self.failUnless('a@example.com' in cache and
+                        'b@example.com' not in cache and
+                        'me@example.com' in cache,
+                "Least recently used JID was not evicted.")
+        self.failUnless(cache.get('b@example.com') is None)
+
+        cache.size = 1
+        self.failUnless('a@example.com' not in cache and len(cache) == 2,
+                "JIDs were not evicted after resizing the cache.")
+        self.assertEqual(cache.stats(), {'hits': 1,
+                                         'misses': 1,
+                                         'evictions': 2,
+                                         'entries': 1,
+                                         'pinned': 1,
+                                         'size': 1})
+
+        cache.unpin('me@example.com')
+        cache.add('d@example.com', ('d', 'example.com', None))
+        self.failUnless('me@example.com' not in cache,
+                "Unpinned JID was not evicted.")
+
+    def testJIDCachePinning(self):
+        """Test pinning JIDs used with cache_lock."""
+        JID('pinned@example.com/a', cache_lock=True)
+        self.assertEqual(JID_CACHE.get('pinned@example.com/a').full,
+                         'pinned@example.com/a')
+        size = JID_CACHE.size
+        try:
+            JID_CACHE.size = 0
+            self.failUnless('pinned@example.com/a' in JID_CACHE,
+                    "Pinned JID was evicted.")
+        finally:
+            JID_CACHE.size = size
+            JID_CACHE.unpin('pinned@example.com/a')
+
+    def testFrozenJID(self):
+        """Test using immutable, interned JID values."""
+        j = JID('User@Example.com/res')
+        frozen = j.frozen
+        self.failUnless(isinstance(frozen, FrozenJID))
+        self.failUnless(freeze('user@example.com/res') is frozen,
+                "Equal JID values were not interned.")
+        self.assertEqual(frozen.bare, 'user@example.com')
+        self.assertEqual(frozen.full, 'user@example.com/res')
+        self.failUnless(frozen.bare_jid is freeze('user@example.com'))
+
+        self.failUnless(frozen == 'user@example.com/res' and
+                        frozen == j and j == frozen)
+        items = {frozen.bare_jid: 'item'}
+        self.assertEqual(items['user@example.com'], 'item')
+        self.assertEqual(items[JID('user@example.com')], 'item')
+        self.assertEqual({'user@example.com': 'item'}[frozen.bare_jid],
+                         'item')
+
+        self.assertRaises(AttributeError, setattr, frozen, 'resource', 'x')
+        j.resource = 'other'
+        self.assertEqual(frozen.full, 'user@example.com/res')
+
+    def testInternedJIDNotParsed(self):
+        """Test that only parsed JIDs are found from JID strings."""
+        frozen = _intern('Bad User', 'EXAMPLE.com', '')
+        self.assertRaises(InvalidJID, JID, 'Bad User@EXAMPLE.com')
+
+        frozen = freeze('user@example.com/pickled')
+        self.failUnless(pickle.loads(pickle.dumps(frozen)) is frozen,
+                "Unpickled JID was not the interned value.")
+
+    def testTrustedJIDNotInterned(self):
+        """Test that trusted JIDs are never used for untrusted JIDs."""
+        frozen = freeze_trusted('Bad User@EXAMPLE.com/res')
+        self.failUnless(frozen.trusted)
+        self.assertEqual(frozen.local, 'Bad User')
+        self.failUnless(frozen.bare_jid.trusted,
+                "Bare JID of a trusted JID was not marked as trusted.")
+
+        j = JID(frozen)
+        j.resource = 'other'
+        self.failUnless(j.frozen.trusted)
+        j.bare = 'user@example.com'
+        self.failUnless(j.frozen.trusted)
+        self.failUnless(JID(frozen, local='user').frozen.trusted)
+
+        for value in ('Bad User@EXAMPLE.com',
+                      'Bad User@EXAMPLE.com/res',
+                      'Bad User@EXAMPLE.com/other'):
+            self.assertRaises(InvalidJID, JID, value)
+        self.failIf(freeze('user@example.com/other').trusted,
+                "Trusted JID was used for an untrusted JID.")
+
+    def testStringPrepASCII(self):
+        """Test checking ASCII strings with stringprep profiles."""
+        self.assertEqual(nodeprep('User.Name'), 'user.name')
+        self.assertEqual(resourceprep('My Laptop'), 'My Laptop')
+        self.assertEqual(nodeprep('M\xdcller'), 'm\xfcller')
+        self.failUnless(nodeprep.cache.get('User.Name') == 'user.name',
+                "Nodeprep result was not kept for reuse.")
+        self.assertRaises(StringPrepError, nodeprep, 'user name')
+        self.assertRaises(StringPrepError, resourceprep, 'tab\tbed')
+        self.assertRaises(InvalidJID, JID, 'user@exam_ple.com')
+        self.assertRaises(InvalidJID, JID, 'user@-example.com')
+        self.assertEqual(JID('user@EXAMPLE.com').domain, 'example.com')
+
 suite = unittest.TestLoader().loadTestsFromTestCase(TestJIDClass)
@@ -0,0 +1,61 @@
+from base64 import b64decode
+
+from sleekxmpp.test import *
+from sleekxmpp.util.sasl import mechanisms, SASLMutualAuthFailed
+from sleekxmpp.util.sasl.mechanisms import SCRAM
+
+
+class TestSASL(SleekTest):
+
+    """
+    Test the SASL mechanisms.
+    """
+
+    def setUp(self):
+        mechanisms._scram_keys.clear()
+
+    def scram(self, password=b'pencil'):
+        """Run the SCRAM-SHA-1 exchange from RFC 5802."""
+        credentials = {'username': b'user',
+                       'password': password,
+                       'authzid': b'',
+                       'channel_binding': b''}
+        security = {'encrypted': True, 'unencrypted_scram': True}
+        mech = SCRAM('SCRAM-SHA-1', credentials, security)
+        mech.process()
+        mech.cnonce = b'fyko+d2lbbFgONRv9qkxdawL'
+        mech.client_first_message_bare = b'n=user,r=' + mech.cnonce
+        response = mech.process(b'r=fyko+d2lbbFgONRv9qkxdawL3rfcNHYJY1Z'
+                                b'VvWVs7j,s=QSXCR+Q6sek8bf92,i=4096')
+        mech.process(b'v=rmF9pqV8S7suAoZWja4dJRkFsKQ=')
+        return response
+
+    def testSCRAM(self):
+        """Test the SCRAM-SHA-1 example exchange from RFC 5802."""
+        self.assertEqual(self.scram(),
+                b'c=biws,r=fyko+d2lbbFgONRv9qkxdawL3rfcNHYJY1ZVvWVs7j,'
+                b'p=v0X8v3Bz2T0CJGbJQyF0X+HI4Ts=')
+
+    def testSCRAMKeyCache(self):
+        """Test reusing derived SCRAM keys for an unchanged salt."""
+        first = self.scram()
+        self.assertEqual(len(mechanisms._scram_keys), 1)
+
+        # A cached entry must not be used for a different password.
+        self.assertRaises(SASLMutualAuthFailed, self.scram, b'pen')
+        self.assertEqual(len(mechanisms._scram_keys), 2)
+
+        self.assertEqual(self.scram(), first)
+        self.assertEqual(len(mechanisms._scram_keys), 2)
+
+    def testSCRAMHi(self):
+        """Test that PBKDF2 matches the HMAC loop it replaces."""
+        mech = SCRAM('SCRAM-SHA-1',
+                     {'username': b'user', 'password': b'pencil'},
+                     {'encrypted': True})
+        expected = b'\x1d\x96\xee:R\x9bZ_\x9eG\xc0\x1f"\x9a,\xb8\xa6\xe1_}'
+        self.assertEqual(mech.Hi(b'pencil', b64decode(b'QSXCR+Q6sek8bf92'),
+                                 4096), expected)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestSASL)
@@ -0,0 +1,100 @@
+import time
+import threading
+import unittest
+
+from sleekxmpp.xmlstream import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.stop = threading.Event()
+        self.scheduler = Scheduler(self.stop)
+        self.scheduler.process(threaded=True, daemon=True)
+
+    def tearDown(self):
+        self.stop.set()
+        self.scheduler.quit()
+        self.scheduler.thread.join(1)
+
+    def testOrdering(self):
+        """Test that tasks execute in order of their deadlines."""
+        events = []
+
+        self.scheduler.add('c', 0.15, events.append, args=('c',))
+        self.scheduler.add('a', 0.05, events.append, args=('a',))
+        self.scheduler.add('b', 0.1, events.append, args=('b',))
+
+        time.sleep(0.3)
+
+        self.failUnless(events == ['a', 'b', 'c'],
+                "Tasks executed out of order: %s" % events)
+
+    def testEarlierTaskWakesScheduler(self):
+        """Test that adding an earlier task does not wait for later ones."""
+        events = []
+
+        self.scheduler.add('late', 60, events.append, args=('late',))
+        time.sleep(0.05)
+        self.scheduler.add('early', 0.05, events.append, args=('early',))
+
+        time.sleep(0.2)
+
+        self.failUnless(events == ['early'],
+                "Early task was not executed: %s" % events)
+
+    def testRemove(self):
+        """Test removing a task before it executes."""
+        events = []
+
+        self.scheduler.add('removed', 0.05, events.append, args=('removed',))
+        self.scheduler.add('kept', 0.1, events.append, args=('kept',))
+        self.scheduler.remove('removed')
+        self.scheduler.remove('unknown')
+
+        time.sleep(0.2)
+
+        self.failUnless(events == ['kept'],
+                "Removed task was executed: %s" % events)
+
+        # The name of a finished task may be reused.
+        self.scheduler.add('kept', 0.05, events.append, args=('again',))
+        time.sleep(0.15)
+
+        self.failUnless(events == ['kept', 'again'],
+                "Task name was not released: %s" % events)
+
+    def testDuplicateName(self):
+        """Test that scheduled task names must be unique."""
+        self.scheduler.add('dup', 60, lambda: None)
+        self.assertRaises(ValueError,
+                          self.scheduler.add, 'dup', 60, lambda: None)
+
+    def testRepeat(self):
+        """Test repeating tasks until they are removed."""
+        events = []
+
+        self.scheduler.add('repeat', 0.03, events.append,
+                           args=('tick',), repeat=True)
+        time.sleep(0.2)
+        self.scheduler.remove('repeat')
+        count = len(events)
+        time.sleep(0.1)
+
+        self.failUnless(count >= 3, "Task did not repeat: %s" % events)
+        self.failUnless(len(events) == count,
+                "Removed task continued repeating: %s" % events)
+
+    def testManyRemovals(self):
+        """Test removing many tasks compacts the schedule."""
+        for i in range(1000):
+            self.scheduler.add('task-%s' % i, 60, lambda: None)
+        for i in range(1000):
+            self.scheduler.remove('task-%s' % i)
+
+        self.failUnless(len(self.scheduler.tasks) == 0)
+        self.failUnless(len(self.scheduler.schedule) < 1000,
+                "Removed tasks were not discarded.")
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestScheduler)
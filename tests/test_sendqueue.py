@@ -0,0 +1,239 @@
+import time
+import threading
+
+from sleekxmpp.test import *
+from sleekxmpp.util import QueueEmpty, QueueFull
+from sleekxmpp.xmlstream.sendqueue import LaneQueue, CONTROL, RESPONSE, \
+                                          BULK, BLOCK, RAISE, EVENT
+
+
+class TestLaneQueue(unittest.TestCase):
+
+    """
+    Test the send queue's priority lanes and limits.
+    """
+
+    def testLaneOrder(self):
+        """Test that higher priority lanes are sent first."""
+        queue = LaneQueue()
+        queue.put('bulk 1')
+        queue.put('response', lane=RESPONSE)
+        queue.put('bulk 2', lane=BULK)
+        queue.put('control', lane=CONTROL)
+
+        items = [queue.get(False) for i in range(4)]
+        self.failUnless(items == ['control', 'response', 'bulk 1', 'bulk 2'],
+                "Unexpected send order: %s" % items)
+        self.assertRaises(QueueEmpty, queue.get, False)
+
+    def testRaisePolicy(self):
+        """Test raising an exception while the queue is full."""
+        events = []
+        queue = LaneQueue(high_water=2, policy=RAISE)
+        queue.on_full = lambda: events.append('full')
+        queue.put('1')
+        queue.put('2')
+        self.assertRaises(QueueFull, queue.put, '3')
+        self.assertRaises(QueueFull, queue.put, '3')
+        self.failUnless(events == ['full'], "Unexpected events: %s" % events)
+
+        queue.put('ack', lane=CONTROL)
+        self.failUnless(queue.qsize() == 3)
+        self.failUnless(queue.qsize(CONTROL) == 1)
+
+    def testRaisePolicyDrained(self):
+        """Test accepting data if the queue drains before raising."""
+        queue = LaneQueue(high_water=2, low_water=0, policy=RAISE)
+        queue.on_full = lambda: queue.get(block=False)
+        queue.put('1')
+        queue.put('2')
+        queue.put('3')
+        self.failUnless(queue.qsize() == 2,
+                "Unexpected queue size: %s" % queue.qsize())
+
+    def testEventPolicy(self):
+        """Test callbacks for full and drained queues."""
+        events = []
+        queue = LaneQueue(high_water=2, low_water=1, policy=EVENT)
+        queue.on_full = lambda: events.append('full')
+        queue.on_drained = lambda: events.append('drained')
+
+        for i in range(4):
+            queue.put(str(i))
+        self.failUnless(events == ['full'], "Unexpected events: %s" % events)
+        self.failUnless(queue.qsize() == 4)
+
+        queue.get()
+        queue.get()
+        self.failUnless(events == ['full'], "Unexpected events: %s" % events)
+        queue.get()
+        self.failUnless(events == ['full', 'drained'],
+                "Unexpected events: %s" % events)
+
+    def testBlockPolicy(self):
+        """Test waiting for a full queue to drain."""
+        events = []
+        queue = LaneQueue(high_water=2, low_water=0, policy=BLOCK)
+        queue.on_full = lambda: events.append('full')
+        queue.on_drained = lambda: events.append('drained')
+        queue.put('1')
+        queue.put('2')
+        self.assertRaises(QueueFull, queue.put, '3', timeout=0.05)
+        self.failUnless(events == ['full'], "Unexpected events: %s" % events)
+
+        added = threading.Event()
+
+        def producer():
+            queue.put('3')
+            added.set()
+
+        t = threading.Thread(target=producer)
+        t.daemon = True
+        t.start()
+
+        self.failIf(added.wait(0.1), "Producer was not blocked.")
+        queue.get()
+        self.failIf(added.wait(0.1), "Producer resumed above low water.")
+        queue.get()
+        self.failUnless(added.wait(1), "Producer was not released.")
+        self.failUnless(events == ['full', 'drained'],
+                "Unexpected events: %s" % events)
+
+    def testBlockPolicyFull(self):
+        """Test reporting a full queue before a producer waits."""
+        events = []
+        queue = LaneQueue(high_water=1, low_water=0, policy=BLOCK)
+        queue.on_full = lambda: events.append('full')
+        queue.put('1')
+        self.assertRaises(QueueFull, queue.put, '2', block=False)
+        self.failUnless(events == ['full'], "Unexpected events: %s" % events)
+        queue.get()
+
+        events = []
+        queue.put('1')
+        added = threading.Event()
+
+        def producer():
+            queue.put('2')
+            added.set()
+
+        t = threading.Thread(target=producer)
+        t.daemon = True
+        t.start()
+
+        self.failIf(added.wait(0.1), "Producer was not blocked.")
+        self.failUnless(events == ['full'],
+                "Full queue was not reported while blocked: %s" % events)
+        queue.get()
+        self.failUnless(added.wait(1), "Producer was not released.")
+
+    def testJoin(self):
+        """Test waiting for all items to be sent."""
+        queue = LaneQueue()
+        queue.put('1', lane=CONTROL)
+        queue.put('2')
+        joined = threading.Event()
+
+        def join():
+            queue.join()
+            joined.set()
+
+        t = threading.Thread(target=join)
+        t.daemon = True
+        t.start()
+
+        for i in range(2):
+            queue.get()
+            queue.task_done()
+        self.failUnless(joined.wait(1), "Join did not return.")
+
+
+class TestSendQueueEvents(SleekTest):
+
+    """
+    Test send queue lanes and events on a stream.
+    """
+
+    def tearDown(self):
+        self.stream_close()
+
+    def testSendLanes(self):
+        """Test choosing send queue lanes for stanzas."""
+        self.stream_start()
+        lane = self.xmpp._send_lane
+        self.failUnless(lane(self.Iq(stype='result')) == RESPONSE)
+        self.failUnless(lane(self.Iq(stype='error')) == RESPONSE)
+        self.failUnless(lane(self.Iq(stype='get')) == BULK)
+        self.failUnless(lane(self.Message()) == BULK)
+        self.failUnless(lane(' ') == BULK)
+
+    def testQueueEvents(self):
+        """Test the send_queue_full and send_queue_drained events."""
+        self.stream_start()
+        events = []
+        drained = threading.Event()
+
+        self.xmpp.add_event_handler('send_queue_full',
+                                    lambda e: events.append('full'))
+        self.xmpp.add_event_handler('send_queue_drained',
+                                    lambda e: drained.set())
+
+        self.xmpp.session_started_event.clear()
+        self.xmpp.send_queue.high_water = 2
+        self.xmpp.send_queue.low_water = 0
+        self.xmpp.send_queue.policy = EVENT
+        for i in range(3):
+            self.xmpp.send_message(mto='user@localhost', mbody=str(i))
+
+        time.sleep(0.1)
+        self.failUnless(events == ['full'], "Unexpected events: %s" % events)
+        self.xmpp.session_started_event.set()
+        self.failUnless(drained.wait(2), "Send queue was not drained.")
+
+        for i in range(3):
+            self.send("""
+              <message to="user@localhost"><body>%s</body></message>
+            """ % i)
+
+
+    def testStreamManagementOrder(self):
+        """Test that acks match the order stanzas were sent in."""
+        self.stream_start(plugins=['xep_0198'])
+        sm = self.xmpp['xep_0198']
+        sm.window = 10
+        sm.window_counter = 10
+        sm.enabled.set()
+        sm._track_outgoing(True)
+
+        acked = []
+        self.xmpp.add_event_handler('stanza_acked',
+                lambda stanza: acked.append(stanza['id']))
+
+        # Queue messages before a response while the send loop is
+        # paused, so that the response could be sent first.
+        self.xmpp.session_started_event.clear()
+        for i in range(2):
+            msg = self.Message(sto='user@localhost')
+            msg['id'] = 'm%d' % i
+            msg.send()
+        self.Iq(stype='result', sto='user@localhost', sid='r0').send()
+        self.xmpp.session_started_event.set()
+
+        self.send("""<message to="user@localhost" id="m0" />""")
+        self.send("""<message to="user@localhost" id="m1" />""")
+        self.send("""<iq type="result" to="user@localhost" id="r0" />""")
+
+        self.recv("""<a xmlns="urn:xmpp:sm:3" h="1" />""")
+        time.sleep(0.1)
+        self.failUnless(acked == ['m0'], "Unexpected acks: %s" % acked)
+        remaining = [stanza['id'] for seq, stanza in sm.unacked_queue]
+        self.failUnless(remaining == ['m1', 'r0'],
+                "Unexpected unacked stanzas: %s" % remaining)
+
+        sm._track_outgoing(False)
+        self.failIf(self.xmpp.send_in_order,
+                "Stanzas are still sent in order without tracking.")
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestLaneQueue)
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(
+        TestSendQueueEvents))
@@ -18,6 +18,37 @@ class TestStanzaBase(SleekTest):
         self.failUnless(str(stanza['from']) == 'user@example.com',
             "Setting and retrieving stanza 'from' attribute did not work.")
 
+    def testAddressMemo(self):
+        """Test reusing parsed 'to' and 'from' JIDs."""
+        stanza = StanzaBase()
+        stanza['from'] = 'User@Example.com/a'
+        first = stanza['from']
+        first.resource = 'changed'
+        self.failUnless(stanza['from'].full == 'user@example.com/a',
+            "Changing a returned JID changed the stanza.")
+        self.failUnless(stanza['from'].frozen is stanza._from[1],
+            "Parsed 'from' JID was not kept.")
+
+        stanza.xml.attrib['from'] = 'other@example.com'
+        self.failUnless(stanza['from'].bare == 'other@example.com',
+            "Parsed JID was used after the attribute changed.")
+        del stanza['from']
+        self.failUnless(stanza['from'].full == '',
+            "Parsed JID was used after the attribute was removed.")
+
+    def testTrustedPeer(self):
+        """Test splitting addresses from a trusted stream."""
+        class Stream(object):
+            default_ns = 'jabber:client'
+            trusted_peer = True
+
+        stanza = StanzaBase(Stream())
+        stanza.xml.attrib['to'] = 'Room@Conference.Example.com/Nick Name'
+        self.failUnless(stanza['to'].user == 'Room' and
+                        stanza['to'].domain == 'Conference.Example.com' and
+                        stanza['to'].resource == 'Nick Name',
+            "Trusted address was not split as given.")
+
     def testPayload(self):
         """Test the 'payload' interface of StanzaBase."""
         stanza = StanzaBase()
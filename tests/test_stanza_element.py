@@ -1,3 +1,7 @@
+import copy
+import gc
+import tracemalloc
+
 from sleekxmpp.test import *
 from sleekxmpp.xmlstream.stanzabase import ElementBase
 from sleekxmpp.thirdparty import OrderedDict
@@ -1247,5 +1251,215 @@ class TestElementBase(SleekTest):
           <foo xmlns="test" />
         """)
 
+    def testLazyPlugins(self):
+        """Test that plugins for existing XML are created when used."""
+
+        class TestStanza(ElementBase):
+            name = 'foo'
+            namespace = 'foo'
+            interfaces = set()
+
+        class TestPlugin(ElementBase):
+            name = 'foobar'
+            namespace = 'foo'
+            plugin_attrib = name
+            interfaces = set(['bar'])
+
+        class TestSubStanza(ElementBase):
+            name = 'item'
+            namespace = 'foo'
+            plugin_attrib = name
+            interfaces = set(['id'])
+
+        register_stanza_plugin(TestStanza, TestPlugin)
+        register_stanza_plugin(TestStanza, TestSubStanza, iterable=True)
+
+        xml = ET.fromstring("""
+          <foo xmlns="foo">
+            <item id="1" />
+            <foobar bar="a" />
+            <item id="2" />
+            <item id="3" />
+          </foo>
+        """)
+        stanza = TestStanza(xml=xml)
+        self.failIf(stanza._plugins or stanza._iterables,
+                "Plugins were created before being used.")
+
+        self.failUnless(stanza['foobar']['bar'] == 'a')
+        self.failUnless(list(stanza._plugins) == [('foobar', '')],
+                "Unexpected plugins: %s" % list(stanza._plugins))
+        self.failIf(stanza._iterables,
+                "Substanzas were created before being used.")
+        self.failUnless(stanza.xml.find('{foo}foobar') is stanza['foobar'].xml,
+                "The plugin did not use the existing XML.")
+
+        self.failUnless(stanza.match('foo/item@id=2'))
+        self.failUnless([item['id'] for item in stanza] == ['1', '2', '3'],
+                "Substanzas are out of order: %s" % stanza.iterables)
+
+        copied = copy.copy(stanza)
+        self.failUnless(copied.values == stanza.values,
+                "Copied stanza differs: %s" % copied.values)
+
+        stanza.append(TestSubStanza())
+        self.failUnless(len(stanza) == 4)
+        self.failUnless(len(copied) == 3)
+
+    def testFreeze(self):
+        """Test that frozen stanzas can not be modified."""
+
+        class TestStanza(ElementBase):
+            name = 'foo'
+            namespace = 'foo'
+            interfaces = set(['bar', 'baz'])
+            sub_interfaces = set(['baz'])
+
+        class TestPlugin(ElementBase):
+            name = 'foobar'
+            namespace = 'foo'
+            plugin_attrib = name
+            interfaces = set(['qux'])
+
+        class TestOtherPlugin(ElementBase):
+            name = 'other'
+            namespace = 'foo'
+            plugin_attrib = name
+            interfaces = set(['qux'])
+
+        register_stanza_plugin(TestStanza, TestPlugin)
+        register_stanza_plugin(TestStanza, TestOtherPlugin)
+
+        stanza = TestStanza(xml=ET.fromstring("""
+          <foo xmlns="foo" bar="a"><foobar qux="b" /></foo>
+        """)).freeze()
+
+        self.failUnless(stanza['foobar']['qux'] == 'b')
+        self.failUnless(stanza['foobar'].frozen,
+                "Plugin of a frozen stanza is not frozen.")
+        self.assertRaises(TypeError, stanza.__setitem__, 'bar', 'b')
+        self.assertRaises(TypeError, stanza.__delitem__, 'bar')
+        self.assertRaises(TypeError, stanza['foobar'].__setitem__,
+                          'qux', 'c')
+        self.assertRaises(TypeError, stanza.append, TestPlugin())
+        self.assertRaises(TypeError, stanza.clear)
+
+        # Reading missing content does not change the XML.
+        self.failUnless(stanza['baz'] == '')
+        self.failUnless(stanza['other']['qux'] == '')
+        self.check(stanza, """
+          <foo xmlns="foo" bar="a"><foobar qux="b" /></foo>
+        """, use_values=False)
+
+        mutable = copy.copy(stanza)
+        mutable['bar'] = 'b'
+        mutable['foobar']['qux'] = 'c'
+        self.check(mutable, """
+          <foo xmlns="foo" bar="b"><foobar qux="c" /></foo>
+        """, use_values=False)
+
+    def testFreezeReply(self):
+        """Test that replying to a frozen stanza uses a new stanza."""
+        msg = self.Message()
+        msg['to'] = 'user@localhost'
+        msg['from'] = 'tester@localhost'
+        msg['body'] = 'Testing'
+        msg.freeze()
+
+        reply = msg.reply('Reply')
+        self.failIf(reply is msg)
+        self.failIf(reply.frozen)
+        self.check(reply, """
+          <message to="tester@localhost"><body>Reply</body></message>
+        """)
+        self.check(msg, """
+          <message to="user@localhost" from="tester@localhost">
+            <body>Testing</body>
+          </message>
+        """, use_values=False)
+
+
+    def testAccessorsAfterRegistering(self):
+        """Test that registering plugins updates interface lookups."""
+
+        class TestStanza(ElementBase):
+            name = "foo"
+            namespace = "foo"
+            interfaces = set(('bar', 'baz'))
+
+        class TestPlugin(ElementBase):
+            name = "foobar"
+            namespace = "foo"
+            plugin_attrib = "foobar"
+            interfaces = set(('qux',))
+
+        class TestOverride(ElementBase):
+            name = "overrider"
+            namespace = "foo"
+            plugin_attrib = "overrider"
+            interfaces = set(('bar',))
+            overrides = ['set_bar', 'get_bar']
+
+            def get_bar(self):
+                return 'override-%s' % self.parent()._get_attr('bar')
+
+            def set_bar(self, value):
+                self.parent()._set_attr('bar', value.upper())
+
+        stanza = TestStanza()
+        stanza['bar'] = 'a'
+        self.failUnless(stanza['bar'] == 'a')
+        self.failUnless(stanza['foobar'] == '')
+
+        register_stanza_plugin(TestStanza, TestPlugin)
+        stanza['foobar']['qux'] = 'b'
+        self.failUnless(stanza['foobar']['qux'] == 'b')
+
+        register_stanza_plugin(TestStanza, TestOverride, overrides=True)
+        stanza['bar'] = 'c'
+        self.failUnless(stanza['bar'] == 'override-C',
+                "Override was not used: %s" % stanza['bar'])
+
+        del stanza['bar']
+        self.check(stanza, """
+          <foo xmlns="foo"><foobar qux="b" /><overrider /></foo>
+        """, use_values=False)
+
+    def testStanzaMemory(self):
+        """Test the memory used by parsed presence and message stanzas."""
+        presence = """
+          <presence xmlns="jabber:client" from="user@localhost/a">
+            <show>away</show>
+            <status>Out</status>
+            <priority>5</priority>
+          </presence>
+        """
+        message = """
+          <message xmlns="jabber:client" from="user@localhost/a"
+                   type="chat">
+            <body>Testing</body>
+          </message>
+        """
+        count = 1000
+        for stanza_class, xml_string in ((self.Presence, presence),
+                                         (self.Message, message)):
+            xml = [self.parse_xml(xml_string) for i in range(count)]
+            gc.collect()
+            tracemalloc.start()
+            try:
+                before = tracemalloc.take_snapshot()
+                stanzas = [stanza_class(xml=x) for x in xml]
+                after = tracemalloc.take_snapshot()
+            finally:
+                tracemalloc.stop()
+            used = sum(stat.size_diff for stat in
+                       after.compare_to(before, 'filename')) / count
+            self.failUnless(used < 300,
+                    "%s stanzas use %s bytes each" % (
+                        stanza_class.__name__, used))
+
+            stanzas[0].extra = 'Extra'
+            self.failUnless(stanzas[0].extra == 'Extra',
+                    "Stanzas do not accept other attributes.")
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestElementBase)
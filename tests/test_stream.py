@@ -1,5 +1,45 @@
+import ssl
 import time
 from sleekxmpp.test import *
+from sleekxmpp.xmlstream import XMLStream, cert
+
+
+class FakeSSLSocket(object):
+
+    """A connected SSL socket which resumed its session if one
+    was offered."""
+
+    def __init__(self, context, session=None):
+        self.context = context
+        self.session_reused = session is not None
+        self.session = session or object()
+
+    def settimeout(self, timeout):
+        pass
+
+    def connect(self, address):
+        pass
+
+    def do_handshake(self):
+        pass
+
+    def getpeercert(self, binary_form=False):
+        return b'certificate'
+
+    def makefile(self, mode, bufsize):
+        return None
+
+
+class FakeSSLContext(object):
+
+    """An SSL context recording the arguments used to wrap sockets."""
+
+    def __init__(self):
+        self.wrapped = []
+
+    def wrap_socket(self, sock, **kwargs):
+        self.wrapped.append(kwargs)
+        return FakeSSLSocket(self, kwargs.get('session'))
 
 
 class TestStreamTester(SleekTest):
@@ -52,11 +92,271 @@ class TestStreamTester(SleekTest):
           </message>
         """)
 
+    def testComponentRouting(self):
+        """Test forwarding raw stanzas from a component."""
+        self.stream_start(mode='component')
+        events = []
+        routed = []
+
+        def route(envelope):
+            routed.append((envelope.name, envelope['from'],
+                           envelope['type'], envelope['payload']))
+            self.xmpp.forward(envelope, sto='user@remote.localhost/a',
+                                        sfrom='bot@gateway.localhost')
+
+        self.xmpp.add_event_handler('message', events.append)
+        self.xmpp.register_route('Gateway.localhost', route)
+        self.xmpp.register_route('*.other.localhost', route)
+
+        self.recv("""
+          <message to="bot@gateway.localhost/r" from="user@localhost"
+                   type="chat">
+            <body>Hi!</body>
+          </message>
+        """)
+        self.send("""
+          <message to="user@remote.localhost/a"
+                   from="bot@gateway.localhost" type="chat">
+            <body>Hi!</body>
+          </message>
+        """)
+
+        self.recv("""
+          <iq to="x@b.other.localhost" from="user@localhost" type="get"
+              id="1">
+            <query xmlns="jabber:iq:version" />
+          </iq>
+        """)
+        self.send("""
+          <iq to="user@remote.localhost/a" from="bot@gateway.localhost"
+              type="get" id="1">
+            <query xmlns="jabber:iq:version" />
+          </iq>
+        """)
+
+        self.failUnless(routed == [('message', 'user@localhost', 'chat', ''),
+                                   ('iq', 'user@localhost', 'get',
+                                    'jabber:iq:version')],
+                "Unexpected routed stanzas: %s" % routed)
+
+        self.failUnless(self.xmpp.remove_route('gateway.localhost'))
+        self.failIf(self.xmpp.remove_route('gateway.localhost'))
+        self.recv("""
+          <message to="bot@gateway.localhost" from="user@localhost">
+            <body>Hi!</body>
+          </message>
+        """)
+        time.sleep(0.1)
+        self.failUnless(len(events) == 1 and not self.xmpp.socket.next_sent(),
+                "Stanza was routed after removing the route.")
+
+    def testRoutingPendingResponse(self):
+        """Test delivering replies to pending requests instead of routing."""
+        self.stream_start(mode='component')
+        routed = []
+        self.xmpp.register_route('gateway.localhost', routed.append)
+
+        iq = self.xmpp.Iq(sto='user@localhost', sfrom='bot@gateway.localhost',
+                          stype='get', sid='pending-1')
+        iq['query'] = 'jabber:iq:version'
+        future = iq.send(future=True)
+        self.send("""
+          <iq to="user@localhost" from="bot@gateway.localhost"
+              type="get" id="pending-1">
+            <query xmlns="jabber:iq:version" />
+          </iq>
+        """)
+
+        self.recv("""
+          <iq to="bot@gateway.localhost" from="user@localhost"
+              type="result" id="pending-1" />
+        """)
+        result = future.result(timeout=1)
+        self.failUnless(result['id'] == 'pending-1',
+                "Unexpected future result: %s" % result)
+
+        self.recv("""
+          <iq to="bot@gateway.localhost" from="user@localhost"
+              type="result" id="pending-1" />
+        """)
+        time.sleep(0.1)
+        self.failUnless([envelope['id'] for envelope in routed] == \
+                        ['pending-1'],
+                "Unexpected routed stanzas: %s" % routed)
+
     def testSendStreamHeader(self):
         """Test that we can check a sent stream header."""
         self.stream_start(mode='client', skip=False)
         self.send_header(sto='localhost')
 
+    def testFastLogin(self):
+        """Test pipelining the roster request and presence after bind."""
+        self.stream_start(mode='client', skip=False, plugins=[],
+                          jid='tester@localhost/test')
+        self.xmpp.fast_login = True
+        self.send_header(sto='localhost')
+
+        self.recv_feature("""
+          <stream:features>
+            <bind xmlns="urn:ietf:params:xml:ns:xmpp-bind" />
+            <session xmlns="urn:ietf:params:xml:ns:xmpp-session">
+              <optional />
+            </session>
+          </stream:features>
+        """)
+        self.send("""
+          <iq type="set" id="1">
+            <bind xmlns="urn:ietf:params:xml:ns:xmpp-bind">
+              <resource>test</resource>
+            </bind>
+          </iq>
+        """)
+        self.recv("""
+          <iq type="result" id="1">
+            <bind xmlns="urn:ietf:params:xml:ns:xmpp-bind">
+              <jid>tester@localhost/test</jid>
+            </bind>
+          </iq>
+        """)
+
+        # The optional session request is skipped.
+        self.send("""
+          <iq type="get" id="2">
+            <query xmlns="jabber:iq:roster" />
+          </iq>
+        """)
+        self.send("<presence />")
+        self.recv("""
+          <iq type="result" id="2">
+            <query xmlns="jabber:iq:roster">
+              <item jid="user@localhost" subscription="both" />
+            </query>
+          </iq>
+        """)
+        time.sleep(0.1)
+
+        self.check_roster('tester@localhost', 'user@localhost',
+                          subscription='both')
+        self.failUnless(self.xmpp.sessionstarted,
+                "Session was not started.")
+        timing = self.xmpp.login_timing
+        self.failUnless(set(('bind', 'session', 'roster')) <= set(timing),
+                "Login phases were not timed: %s" % timing)
+
+    def testFastLoginSession(self):
+        """Test that fast login still requests a required session."""
+        self.stream_start(mode='client', skip=False, plugins=[],
+                          jid='tester@localhost/test')
+        self.xmpp.fast_login = True
+        self.send_header(sto='localhost')
+
+        self.recv_feature("""
+          <stream:features>
+            <bind xmlns="urn:ietf:params:xml:ns:xmpp-bind" />
+            <session xmlns="urn:ietf:params:xml:ns:xmpp-session" />
+          </stream:features>
+        """)
+        self.send("""
+          <iq type="set" id="1">
+            <bind xmlns="urn:ietf:params:xml:ns:xmpp-bind">
+              <resource>test</resource>
+            </bind>
+          </iq>
+        """)
+        self.recv("""
+          <iq type="result" id="1">
+            <bind xmlns="urn:ietf:params:xml:ns:xmpp-bind">
+              <jid>tester@localhost/test</jid>
+            </bind>
+          </iq>
+        """)
+        self.send("""
+          <iq type="set" id="2">
+            <session xmlns="urn:ietf:params:xml:ns:xmpp-session" />
+          </iq>
+        """)
+        self.recv("""<iq type="result" id="2" />""")
+        self.send("""
+          <iq type="get" id="3">
+            <query xmlns="jabber:iq:roster" />
+          </iq>
+        """)
+        self.send("<presence />")
+
+    def testSSLContext(self):
+        """Test reusing SSL contexts across connections."""
+        self.stream_start()
+        context = self.xmpp.get_ssl_context()
+        self.failUnless(self.xmpp.get_ssl_context() is context,
+                "SSL context was not reused.")
+        self.failUnless(context.verify_mode == ssl.CERT_NONE,
+                "Unexpected verify mode: %s" % context.verify_mode)
+
+        other = self.xmpp.get_ssl_context(ssl.PROTOCOL_SSLv23)
+        self.failUnless(other is not context,
+                "SSL context was reused for another protocol version.")
+
+        shared = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+        self.xmpp.ssl_context = shared
+        self.failUnless(self.xmpp.get_ssl_context() is shared,
+                "Shared SSL context was not used.")
+
+    def testSSLResume(self):
+        """Test offering the last TLS session when reconnecting."""
+        self.stream_start()
+        context = FakeSSLContext()
+        session = object()
+        self.xmpp.address = ('127.0.0.1', 5223)
+        self.xmpp._ssl_session = (context, ('127.0.0.1', 5223), session)
+
+        self.xmpp._wrap_ssl(context)
+        self.failUnless(context.wrapped[-1].get('session') is session,
+                "TLS session was not offered to the same address.")
+
+        self.xmpp.address = ('127.0.0.2', 5223)
+        self.xmpp._wrap_ssl(context)
+        self.failIf('session' in context.wrapped[-1],
+                "TLS session was offered to another address.")
+
+        other = FakeSSLContext()
+        self.xmpp.address = ('127.0.0.1', 5223)
+        self.xmpp._wrap_ssl(other)
+        self.failIf('session' in other.wrapped[-1],
+                "TLS session was offered with another SSL context.")
+
+        self.xmpp.ssl_resume = False
+        self.xmpp._wrap_ssl(context)
+        self.failIf('session' in context.wrapped[-1],
+                "TLS session was offered with resumption disabled.")
+
+    def testSSLConnected(self):
+        """Test reporting the TLS handshake in the connected event."""
+        xmpp = XMLStream()
+        xmpp.socket_class = lambda family, kind: FakeSSLSocket(None)
+        xmpp.ssl_context = FakeSSLContext()
+        xmpp.use_ssl = True
+        xmpp.address = ('127.0.0.1', 5223)
+        events = []
+        xmpp.add_event_handler('connected', events.append)
+
+        verify = cert.verify
+        cert.verify = lambda expected, raw_cert: True
+        try:
+            xmpp._connect(reattempt=False)
+            xmpp._connect(reattempt=False)
+        finally:
+            cert.verify = verify
+
+        self.failUnless(len(events) == 2,
+                "Unexpected connected events: %s" % events)
+        for event in events:
+            self.failUnless(event['ssl_handshake_time'] >= 0,
+                    "Handshake time not reported: %s" % event)
+        self.failIf(events[0]['ssl_session_reused'],
+                "First connection reported a resumed session.")
+        self.failUnless(events[1]['ssl_session_reused'],
+                "TLS session was not resumed on reconnect.")
+
     def testStreamDisconnect(self):
         """Test that the test socket can simulate disconnections."""
         self.stream_start()
@@ -75,5 +375,129 @@ class TestStreamTester(SleekTest):
         self.failUnless('socket_error' in events,
                 "Stream error event not raised: %s" % events)
 
+    def testSendBatching(self):
+        """Test combining queued stanzas into a single write."""
+        self.stream_start()
+        self.xmpp.send_batch_bytes = 16384
+        self.xmpp.send_cork = 200000
+
+        for i in range(3):
+            self.xmpp.send_raw('<message><body>%s</body></message>' % i)
+
+        sent = self.xmpp.socket.next_sent(timeout=1)
+        self.failUnless(sent == (b'<message><body>0</body></message>'
+                                 b'<message><body>1</body></message>'
+                                 b'<message><body>2</body></message>'),
+                "Stanzas were not combined: %s" % sent)
+        stats = self.xmpp.send_stats
+        self.failUnless(stats['max_stanzas'] == 3,
+                "Unexpected send stats: %s" % stats)
+
+    def testSendBatchBudget(self):
+        """Test limiting the number of bytes combined into a write."""
+        self.stream_start()
+        self.xmpp.send_batch_bytes = 40
+        self.xmpp.send_cork = 200000
+
+        for i in range(3):
+            self.xmpp.send_raw('<message><body>%s</body></message>' % i)
+
+        sent = [self.xmpp.socket.next_sent(timeout=1) for i in range(2)]
+        self.failUnless(sent == [b'<message><body>0</body></message>'
+                                 b'<message><body>1</body></message>',
+                                 b'<message><body>2</body></message>'],
+                "Unexpected writes: %s" % sent)
+
+    def testBroadcast(self):
+        """Test sending a stanza template to many recipients."""
+        self.stream_start(mode='component')
+        self.xmpp.send_batch_bytes = 0
+        filtered = []
+
+        def out_filter(stanza):
+            filtered.append(stanza['to'])
+            stanza['subject'] = 'Filtered'
+            return stanza
+
+        self.xmpp.add_filter('out', out_filter)
+
+        msg = self.xmpp.make_message('nobody@localhost', 'Hi & bye',
+                                     mtype='headline')
+        template = self.xmpp.make_template(msg)
+        ids = self.xmpp.broadcast(template, ['a@localhost',
+                                             'b@localhost/x&y'])
+        self.failUnless(len(set(ids)) == 2, "IDs were reused: %s" % ids)
+        self.send("""
+          <message to="a@localhost" id="%s" type="headline">
+            <body>Hi &amp; bye</body>
+          </message>
+        """ % ids[0])
+        self.send("""
+          <message to="b@localhost/x&amp;y" id="%s" type="headline">
+            <body>Hi &amp; bye</body>
+          </message>
+        """ % ids[1])
+        self.failIf(filtered, "Filters were used: %s" % filtered)
+
+        template = self.xmpp.make_template(msg, sfrom=True)
+        ids = self.xmpp.broadcast(template,
+                                  [('a@localhost', 'bot@tester.localhost')],
+                                  use_filters=True)
+        self.send("""
+          <message to="a@localhost" from="bot@tester.localhost"
+                   id="%s" type="headline">
+            <body>Hi &amp; bye</body>
+            <subject>Filtered</subject>
+          </message>
+        """ % ids[0])
+        self.failUnless(filtered == ['a@localhost'],
+                "Filters were not used: %s" % filtered)
+
+        counted = []
+        self.xmpp.add_filter('out_sync', lambda stanza: counted.append(
+                stanza['to'].bare) or stanza)
+        self.xmpp.broadcast(template, [('c@localhost', 'bot@tester.localhost')])
+        self.send("""
+          <message to="c@localhost" from="bot@tester.localhost"
+                   id="%s" type="headline">
+            <body>Hi &amp; bye</body>
+          </message>
+        """ % (int(ids[0]) + 1))
+        self.failUnless(counted == ['c@localhost'] and len(filtered) == 1,
+                "Unexpected filters used: %s %s" % (counted, filtered))
+
+    def testBroadcastBatching(self):
+        """Test combining broadcast stanzas into writes."""
+        self.stream_start()
+        self.xmpp.send_batch_bytes = 100
+
+        msg = self.xmpp.make_message('nobody@localhost', 'Hi')
+        template = self.xmpp.make_template(msg)
+        sent = template.stamp('a@localhost', 'x')
+        self.failUnless(sent.startswith(b'<message ') and
+                        b'to="a@localhost"' in sent and
+                        b'id="x"' in sent,
+                "Unexpected stamped stanza: %s" % sent)
+
+        self.xmpp.broadcast(template, ['a@localhost'] * 4)
+        writes = [self.xmpp.socket.next_sent(timeout=1) for i in range(2)]
+        self.failUnless([w.count(b'</message>') for w in writes] == [2, 2],
+                "Unexpected writes: %s" % writes)
+
+    def testPartialStanzas(self):
+        """Test parsing stanzas split across several reads."""
+        self.stream_start()
+        bodies = []
+        self.xmpp.add_event_handler('message',
+                                    lambda msg: bodies.append(msg['body']))
+
+        self.xmpp.socket.recv_data('<message><bo')
+        self.xmpp.socket.recv_data('dy>Testing</body></message><message>')
+        self.xmpp.socket.recv_data('<body>Again</body></message>')
+        time.sleep(0.2)
+
+        self.failUnless(bodies == ['Testing', 'Again'],
+                "Unexpected messages: %s" % bodies)
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestStreamTester)
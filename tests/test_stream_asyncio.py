@@ -0,0 +1,232 @@
+import sys
+import threading
+import unittest
+
+from sleekxmpp import ComponentXMPP
+from sleekxmpp.test import SleekTest
+from sleekxmpp.xmlstream.handler import Callback
+from sleekxmpp.xmlstream.matcher import StanzaPath
+
+if sys.version_info >= (3, 7):
+    import asyncio
+
+
+HEADER = ("<stream:stream xmlns='jabber:component:accept' "
+          "xmlns:stream='http://etherx.jabber.org/streams' "
+          "id='test' from='localhost'>").encode('utf-8')
+
+
+class ComponentServer(object):
+
+    """Accept any component handshake, then echo all received data."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.data = b''
+        self.accepted = False
+
+    def data_received(self, data):
+        if self.accepted:
+            self.transport.write(data)
+            return
+        if not self.data:
+            self.transport.write(HEADER)
+        self.data += data
+        if b'</handshake>' in self.data:
+            self.accepted = True
+            self.transport.write(b'<handshake />')
+
+    def eof_received(self):
+        pass
+
+    def connection_lost(self, exc):
+        pass
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'asyncio streams need Python 3.7')
+class TestAsyncioStreams(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(
+                self.loop.create_server(ComponentServer, '127.0.0.1', 0),
+                self.loop).result(5)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+    def make_stream(self, name):
+        xmpp = ComponentXMPP(name, 'secret', '127.0.0.1', self.port)
+        xmpp.use_asyncio(self.loop)
+        return xmpp
+
+    def testSharedLoop(self):
+        """Test several components sharing one event loop."""
+        received = []
+        done = threading.Event()
+        streams = [self.make_stream('c%s.localhost' % i) for i in range(3)]
+
+        def handle_message(msg):
+            received.append(msg['body'])
+            if len(received) == len(streams):
+                done.set()
+
+        for xmpp in streams:
+            def handle_session(event, xmpp=xmpp):
+                xmpp.send_message(mto='user@localhost',
+                                  mbody=xmpp.boundjid.bare)
+            xmpp.add_event_handler('session_start', handle_session)
+            xmpp.add_event_handler('message', handle_message)
+            xmpp.connect()
+            xmpp.process()
+
+        self.failUnless(done.wait(5), "Messages were not echoed: %s" % received)
+        self.failUnless(sorted(received) == ['c0.localhost',
+                                             'c1.localhost',
+                                             'c2.localhost'],
+                "Unexpected messages: %s" % received)
+
+        for xmpp in streams:
+            self.failUnless(xmpp.state.ensure('connected'))
+            xmpp.disconnect()
+
+    def testDefaultLoop(self):
+        """Test choosing an event loop when none is given."""
+        xmpp = ComponentXMPP('tester.localhost', 'secret',
+                             '127.0.0.1', self.port)
+        loop = xmpp.use_asyncio().loop
+        try:
+            self.failUnless(isinstance(loop, asyncio.AbstractEventLoop))
+            self.failIf(loop is self.loop or loop.is_running(),
+                    "An existing event loop was used.")
+        finally:
+            loop.close()
+
+        async def running():
+            return xmpp.use_asyncio().loop
+
+        loop = asyncio.run_coroutine_threadsafe(running(),
+                                                self.loop).result(5)
+        self.failUnless(loop is self.loop,
+                "The running event loop was not used.")
+
+    def testDisconnect(self):
+        """Test closing a stream on an event loop."""
+        events = []
+        started = threading.Event()
+        disconnected = threading.Event()
+
+        xmpp = self.make_stream('tester.localhost')
+        xmpp.add_event_handler('session_start',
+                               lambda e: started.set())
+        xmpp.add_event_handler('session_end',
+                               lambda e: events.append('session_end'))
+        xmpp.add_event_handler('disconnected',
+                               lambda e: disconnected.set())
+        xmpp.connect()
+        xmpp.process()
+
+        self.failUnless(started.wait(5), "Session did not start.")
+        xmpp.disconnect()
+        self.failUnless(disconnected.wait(5), "Stream was not closed.")
+        self.failUnless(xmpp.stop.is_set())
+        self.failUnless(xmpp.state.ensure('disconnected'))
+        self.failUnless(xmpp.scheduler.tasks == {},
+                "Scheduled tasks were not removed: %s" % xmpp.scheduler.tasks)
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'asyncio streams need Python 3.7')
+class TestCoroutineHandlers(SleekTest):
+
+    """
+    Test using coroutines as handlers for threaded streams.
+    """
+
+    def setUp(self):
+        self.stream_start(plugins=['xep_0030'])
+
+    def tearDown(self):
+        self.stream_close()
+
+    def testCoroutineEventHandler(self):
+        """Test running coroutine event handlers."""
+        events = []
+        done = threading.Event()
+
+        async def handle_message(msg):
+            await asyncio.sleep(0)
+            events.append(msg['body'])
+            done.set()
+
+        self.xmpp.add_event_handler('message', handle_message)
+        self.recv("""<message><body>Testing</body></message>""")
+
+        self.failUnless(done.wait(2), "Coroutine handler did not run.")
+        self.failUnless(events == ['Testing'],
+                "Unexpected coroutine results: %s" % events)
+
+    def testCoroutineCallback(self):
+        """Test running coroutine stream handlers."""
+        done = threading.Event()
+
+        async def handle_message(msg):
+            done.set()
+
+        self.xmpp.register_handler(
+                Callback('Coroutine Callback',
+                         StanzaPath('message/body'),
+                         handle_message))
+        self.recv("""<message><body>Testing</body></message>""")
+
+        self.failUnless(done.wait(2), "Coroutine handler did not run.")
+
+    def testAwaitDiscoInfo(self):
+        """Test awaiting a disco#info request from a coroutine."""
+
+        async def handle_message(msg):
+            info = await self.xmpp['xep_0030'].get_info(msg['from'],
+                                                        future=True)
+            reply = msg.reply(str(info['disco_info']['features']))
+            reply.send()
+
+        self.xmpp.add_event_handler('message', handle_message)
+        self.recv("""
+          <message from="user@localhost/a"><body>Testing</body></message>
+        """)
+
+        self.send("""
+          <iq type="get" id="1" to="user@localhost/a">
+            <query xmlns="http://jabber.org/protocol/disco#info" />
+          </iq>
+        """)
+        self.recv("""
+          <iq type="result" id="1" from="user@localhost/a">
+            <query xmlns="http://jabber.org/protocol/disco#info">
+              <feature var="urn:xmpp:ping" />
+            </query>
+          </iq>
+        """)
+        self.send("""
+          <message to="user@localhost/a">
+            <body>{'urn:xmpp:ping'}</body>
+          </message>
+        """)
+
+    def testLocalDiscoInfoFuture(self):
+        """Test that local disco#info results may be awaited."""
+        future = self.xmpp['xep_0030'].get_info(local=True, future=True)
+        self.failUnless(future.done())
+        self.failUnless('http://jabber.org/protocol/disco#info' in \
+                        future.result()['features'])
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestAsyncioStreams)
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(
+        TestCoroutineHandlers))
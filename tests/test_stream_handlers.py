@@ -2,6 +2,7 @@ import time
 
 from sleekxmpp import Message
 from sleekxmpp.test import *
+from sleekxmpp.xmlstream.dispatch import HandlerIndex
 from sleekxmpp.xmlstream.handler import *
 from sleekxmpp.xmlstream.matcher import *
 
@@ -226,5 +227,270 @@ class TestHandlers(SleekTest):
           </message>
         """)
 
+    def testHandlerOrdering(self):
+        """Test registering handlers before and after other handlers."""
+        events = []
+
+        def make_handler(name):
+            def handler(stanza):
+                events.append(name)
+            return handler
+
+        for name, kwargs in (('b', {}),
+                             ('d', {}),
+                             ('a', {'before': 'b'}),
+                             ('c', {'after': 'b'}),
+                             ('e', {'after': 'missing'})):
+            self.xmpp.register_handler(
+                    Callback(name,
+                             StanzaPath('message/body'),
+                             make_handler(name)),
+                    **kwargs)
+
+        self.recv("""<message><body>Testing</body></message>""")
+
+        # Give event queue time to process
+        time.sleep(0.1)
+
+        self.failUnless(events == ['a', 'b', 'c', 'd', 'e'],
+                "Handlers executed out of order: %s" % events)
+
+    def testCompiledMatchers(self):
+        """Test matching stanzas with compiled matchers."""
+        msg = self.Message()
+        msg['type'] = 'chat'
+        msg['body'] = 'Testing'
+        iq = self.Iq()
+        iq['type'] = 'get'
+        iq.append(ET.Element('{test}query', {'node': 'a'}))
+
+        matchers = [
+            (StanzaPath('message@type=chat/body'), True, False),
+            (StanzaPath('message@type=normal/body'), False, False),
+            (MatchXPath('{jabber:client}message/{jabber:client}body'),
+             True, False),
+            (MatchXPath('{jabber:client}iq/{test}query'), False, True),
+            (MatchXPath('{jabber:client}iq/{test}query[@node="a"]'),
+             False, True),
+            (MatchXPath('{jabber:client}iq/{test}query[@node="b"]'),
+             False, False),
+            (MatchXMLMask('<message xmlns="jabber:client">' + \
+                          '<body>Testing</body></message>'), True, False),
+            (MatchXMLMask('<message xmlns="jabber:client">' + \
+                          '<body>Other</body></message>'), False, False),
+            (MatchXMLMask('<iq xmlns="jabber:client" type="get">' + \
+                          '<query xmlns="test" /></iq>'), False, True)]
+
+        for matcher, msg_match, iq_match in matchers:
+            self.failUnless(bool(matcher.match(msg)) == msg_match,
+                    "Unexpected message match for %s" % matcher._criteria)
+            self.failUnless(bool(matcher.match(iq)) == iq_match,
+                    "Unexpected iq match for %s" % matcher._criteria)
+
+        mask = MatchXMLMask('<message type="chat" />', 'other')
+        self.failIf(mask.match(msg))
+        mask.setDefaultNS('jabber:client')
+        self.failUnless(mask.match(msg), "Default namespace was not used.")
+        mask = MatchXMLMask('<message><body /></message>', 'jabber:client')
+        self.failIf(mask.match(msg), "Unqualified child matched.")
+
+        self.failUnless(matchers[3][0].index_keys() == \
+                [('child', '{jabber:client}iq', 'test')])
+        self.failUnless(matchers[8][0].index_keys() == \
+                [('child', '{jabber:client}iq', 'test')])
+
+    def testChildNamespaceIndex(self):
+        """Test dispatching handlers indexed by a child namespace."""
+        events = []
+
+        query = Callback('Test Query',
+                         MatchXPath('{jabber:client}iq/{test}query'),
+                         lambda iq: events.append('query'))
+        other = Callback('Other Query',
+                         MatchXPath('{jabber:client}iq/{other}query'),
+                         lambda iq: events.append('other'))
+
+        index = HandlerIndex()
+        index.add(query)
+        index.add(other)
+        iq = self.Iq(xml=ET.fromstring(
+                '<iq xmlns="jabber:client"><query xmlns="test" /></iq>'))
+        self.failUnless(index.candidates(iq) == [query],
+                "Unexpected candidate handlers: %s" % index.candidates(iq))
+
+        self.xmpp.register_handler(query)
+        self.xmpp.register_handler(other)
+        self.recv("""
+          <iq type="get" id="1"><query xmlns="test" /></iq>
+        """)
+
+        # Give event queue time to process
+        time.sleep(0.1)
+
+        self.failUnless(events == ['query'],
+                "Unexpected handlers were run: %s" % events)
+
+    def testManyIqCallbacks(self):
+        """Test dispatching replies with many pending Iq callbacks."""
+        events = []
+
+        def handle_result(iq):
+            events.append(iq['id'])
+
+        for i in range(500):
+            iq = self.Iq()
+            iq['type'] = 'get'
+            iq['id'] = 'test-%s' % i
+            iq.send(callback=handle_result)
+            self.xmpp.socket.next_sent(timeout=1)
+
+        self.recv("""<iq type="result" id="test-250" />""")
+        self.recv("""<iq type="result" id="test-7" />""")
+        self.recv("""<iq type="result" id="test-250" />""")
+
+        # Give event queue time to process
+        time.sleep(0.1)
+
+        self.failUnless(events == ['test-250', 'test-7'],
+                "Iq callbacks were not executed once: %s" % events)
+
+        self.failUnless(self.xmpp.remove_handler('IqCallback_test-8'),
+                "Pending Iq callback was not found.")
+        self.failIf(self.xmpp.remove_handler('IqCallback_test-8'),
+                "Iq callback was removed twice.")
+
+    def testIqFuture(self):
+        """Test that iq.send(future=True) works."""
+        iq = self.Iq()
+        iq['type'] = 'get'
+        iq['id'] = 'test-future'
+        iq['query'] = 'foo'
+        future = iq.send(future=True)
+
+        self.send("""
+          <iq type="get" id="test-future">
+            <query xmlns="foo" />
+          </iq>
+        """)
+
+        self.failIf(future.done(), "Future completed before the reply.")
+        self.failUnless('test-future' in self.xmpp.pending_requests)
+
+        self.recv("""
+          <iq type="result" id="test-future">
+            <query xmlns="foo"><data /></query>
+          </iq>
+        """)
+
+        result = future.result(timeout=1)
+        self.failUnless(result['id'] == 'test-future',
+                "Unexpected future result: %s" % result)
+        self.failIf('test-future' in self.xmpp.pending_requests,
+                "Resolved request is still pending.")
+
+    def testIqFutureError(self):
+        """Test that iq.send(future=True) raises IqError for errors."""
+        iq = self.Iq()
+        iq['type'] = 'get'
+        iq['id'] = 'test-future'
+        future = iq.send(future=True)
+        self.xmpp.socket.next_sent(timeout=1)
+
+        self.recv("""
+          <iq type="error" id="test-future">
+            <error type="cancel">
+              <item-not-found
+                  xmlns="urn:ietf:params:xml:ns:xmpp-stanzas" />
+            </error>
+          </iq>
+        """)
+
+        try:
+            future.result(timeout=1)
+        except IqError as e:
+            self.failUnless(e.condition == 'item-not-found')
+        else:
+            self.fail("IqError was not raised.")
+
+    def testIqFutureTimeout(self):
+        """Test that iq.send(future=True) raises IqTimeout."""
+        futures = []
+        for i in range(3):
+            iq = self.Iq()
+            iq['type'] = 'get'
+            iq['id'] = 'test-timeout-%s' % i
+            futures.append(iq.send(future=True, timeout=0.05 * (i + 1)))
+            self.xmpp.socket.next_sent(timeout=1)
+
+        self.recv("""<iq type="result" id="test-timeout-1" />""")
+
+        for i, future in enumerate(futures):
+            if i == 1:
+                self.failUnless(future.result(timeout=2)['type'] == 'result')
+            else:
+                self.assertRaises(IqTimeout, future.result, timeout=2)
+        self.failUnless(len(self.xmpp.pending_requests) == 0,
+                "Expired requests are still pending.")
+
+    def testFrozenStanzas(self):
+        """Test that handlers share one read only stanza when enabled."""
+        self.xmpp.frozen_stanzas = True
+        received = []
+
+        def handler_1(msg):
+            received.append(msg)
+            msg.reply("Handler 1: %s" % msg['body']).send()
+
+        def handler_2(msg):
+            received.append(msg)
+            try:
+                msg['body'] = 'Changed'
+            except TypeError:
+                msg.reply("Handler 2: %s" % msg['body']).send()
+
+        self.xmpp.add_event_handler('message', handler_1)
+        self.xmpp.add_event_handler('message', handler_2)
+
+        self.recv("""
+          <message to="tester@localhost" from="user@example.com">
+            <body>Testing</body>
+          </message>
+        """)
+
+        self.send("""
+          <message to="user@example.com">
+            <body>Handler 1: Testing</body>
+          </message>
+        """)
+        self.send("""
+          <message to="user@example.com">
+            <body>Handler 2: Testing</body>
+          </message>
+        """)
+        self.failUnless(received[0] is received[1],
+                "Handlers did not share the stanza.")
+        self.failUnless(received[0].frozen)
+
+    def testFrozenUnhandledIq(self):
+        """Test replying to unhandled requests using frozen stanzas."""
+        self.xmpp.frozen_stanzas = True
+
+        self.recv("""
+          <iq type="get" id="test" from="user@example.com">
+            <query xmlns="urn:example:unknown" />
+          </iq>
+        """)
+        self.send("""
+          <iq type="error" id="test" to="user@example.com">
+            <error type="cancel" code="501">
+              <feature-not-implemented
+                  xmlns="urn:ietf:params:xml:ns:xmpp-stanzas" />
+              <text xmlns="urn:ietf:params:xml:ns:xmpp-stanzas">
+                No handlers registered for this request.
+              </text>
+            </error>
+          </iq>
+        """)
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestHandlers)
@@ -1,7 +1,7 @@
 from sleekxmpp.test import *
 from sleekxmpp.stanza import Message
 from sleekxmpp.xmlstream.stanzabase import ET, ElementBase
-from sleekxmpp.xmlstream.tostring import tostring, escape
+from sleekxmpp.xmlstream.tostring import tostring, tobytes, escape
 
 
 class TestToString(SleekTest):
@@ -115,5 +115,38 @@ class TestToString(SleekTest):
         self.failUnless(expected == result,
             "Serialization with xml:lang failed: %s" % result)
 
+    def testXMLEscapeCDATA(self):
+        """Test escaping XML special characters using CDATA sections."""
+        self.failUnless(escape('plain text', True) == 'plain text')
+        escaped = escape('a < b ]]> c', True)
+        desired = '<![CDATA[a < b ]]><![CDATA[]]]><![CDATA[]>]]>'
+        desired += '<![CDATA[ c]]>'
+        self.failUnless(escaped == desired,
+            "CDATA escaping did not work: %s." % escaped)
+
+    def testNamespaceMap(self):
+        """Test serializing mapped namespace prefixes."""
+        self.stream_start()
+        self.xmpp.namespace_map['urn:example'] = 'ex'
+        xml = ET.fromstring('<a xmlns="jabber:client">' + \
+                            '<b xmlns:ex="urn:example" ex:c="1" />' + \
+                            '<d xmlns:ex="urn:example" ex:e="2" /></a>')
+        result = tostring(xml, stream=self.xmpp, top_level=True)
+        expected = '<a><b xmlns:ex="urn:example" ex:c="1" />' + \
+                   '<d xmlns:ex="urn:example" ex:e="2" /></a>'
+        self.failUnless(result == expected,
+            "Mapped namespace serialization failed: %s" % result)
+
+    def testToBytes(self):
+        """Test serializing directly to UTF-8 encoded bytes."""
+        self.stream_start()
+        msg = self.Message()
+        msg['body'] = '\u0ca0_\u0ca0 & more'
+        result = tobytes(msg.xml, xmlns=self.xmpp.default_ns,
+                         stream=self.xmpp, top_level=True)
+        self.failUnless(result == str(msg).encode('utf-8'),
+            "Byte serialization differs from string serialization: %s" % \
+            result)
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestToString)
@@ -0,0 +1,221 @@
+import time
+import threading
+
+from sleekxmpp.test import *
+from sleekxmpp.xmlstream import xmlstream
+from sleekxmpp.xmlstream.workers import WorkerPool, ShardedQueue, \
+                                        BLOCK, DROP, INLINE
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    """
+    Test the bounded pool used for threaded event handlers.
+    """
+
+    def setUp(self):
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def wait_for(self, check, timeout=2):
+        end = time.time() + timeout
+        while not check() and time.time() < end:
+            time.sleep(0.01)
+        return check()
+
+    def testBoundedWorkers(self):
+        """Test that the pool never starts more than max_workers threads."""
+        pool = WorkerPool(max_workers=2, max_queue=0)
+        for i in range(5):
+            pool.submit(self.release.wait)
+
+        self.failUnless(self.wait_for(lambda: pool.active == 2))
+        stats = pool.stats()
+        self.failUnless(stats['workers'] == 2,
+                "Unexpected number of workers: %s" % stats)
+        self.failUnless(stats['queued'] == 3,
+                "Unexpected number of queued jobs: %s" % stats)
+
+        self.release.set()
+        self.failUnless(self.wait_for(lambda: pool.completed == 5))
+        pool.shutdown()
+        self.failUnless(self.wait_for(lambda: pool.workers == 0),
+                "Workers did not exit after shutdown.")
+
+    def testIdleWorkerBurst(self):
+        """Test that a burst of jobs does not wait for one idle worker."""
+        pool = WorkerPool(max_workers=4, max_queue=0)
+        pool.submit(lambda: None)
+        self.failUnless(self.wait_for(lambda: pool._idle == 1))
+
+        names = set()
+
+        def job():
+            names.add(threading.current_thread().name)
+            self.release.wait()
+
+        for i in range(3):
+            pool.submit(job)
+
+        self.failUnless(self.wait_for(lambda: pool.active == 3),
+                "Jobs were not run concurrently: %s" % pool.stats())
+        self.failUnless(len(names) == 3,
+                "Unexpected worker threads: %s" % names)
+
+        self.release.set()
+        self.failUnless(self.wait_for(lambda: pool.completed == 4))
+        pool.shutdown()
+
+    def testDropPolicy(self):
+        """Test dropping jobs while the queue is full."""
+        ran = []
+        pool = WorkerPool(max_workers=1, max_queue=1, policy=DROP)
+        pool.submit(self.release.wait)
+        self.failUnless(self.wait_for(lambda: pool.active == 1))
+
+        self.failUnless(pool.submit(ran.append, 1))
+        self.failIf(pool.submit(ran.append, 2))
+        self.failUnless(pool.dropped == 1)
+
+        self.release.set()
+        self.failUnless(self.wait_for(lambda: pool.completed == 2))
+        self.failUnless(ran == [1], "Unexpected jobs run: %s" % ran)
+        pool.shutdown()
+
+    def testInlinePolicy(self):
+        """Test running jobs in the caller while the queue is full."""
+        ran = []
+        pool = WorkerPool(max_workers=1, max_queue=1, policy=INLINE)
+        pool.submit(self.release.wait)
+        self.failUnless(self.wait_for(lambda: pool.active == 1))
+
+        pool.submit(ran.append, 1)
+        pool.submit(lambda: ran.append(threading.current_thread().name))
+        self.failUnless(pool.inlined == 1)
+        self.failUnless(ran == [threading.current_thread().name],
+                "Job was not run inline: %s" % ran)
+
+        self.release.set()
+        self.failUnless(self.wait_for(lambda: pool.completed == 2))
+        pool.shutdown()
+
+    def testBlockPolicy(self):
+        """Test waiting for room in the queue."""
+        pool = WorkerPool(max_workers=1, max_queue=1, policy=BLOCK)
+        pool.submit(self.release.wait)
+        self.failUnless(self.wait_for(lambda: pool.active == 1))
+        pool.submit(lambda: None)
+
+        submitted = threading.Event()
+
+        def submit():
+            pool.submit(lambda: None)
+            submitted.set()
+
+        t = threading.Thread(target=submit)
+        t.daemon = True
+        t.start()
+        self.failIf(submitted.wait(0.2), "Submit did not block.")
+
+        self.release.set()
+        self.failUnless(submitted.wait(2), "Submit did not resume.")
+        self.failUnless(self.wait_for(lambda: pool.completed == 3))
+        pool.shutdown()
+
+    def testUnknownPolicy(self):
+        """Test rejecting unknown policies."""
+        self.assertRaises(ValueError, WorkerPool, policy='spill')
+
+
+class TestShardedQueue(unittest.TestCase):
+
+    """
+    Test splitting events between event runner threads.
+    """
+
+    def testSenderShard(self):
+        """Test that events from one sender use the same queue."""
+        queue = ShardedQueue(4)
+        for resource in ('a', 'b', 'c'):
+            msg = Message(sfrom='user@localhost/%s' % resource)
+            queue.put(('stanza', None, msg))
+
+        sizes = [q.qsize() for q in queue.queues]
+        self.failUnless(sorted(sizes) == [0, 0, 0, 3],
+                "Events were split between queues: %s" % sizes)
+
+    def testOtherEvents(self):
+        """Test that other events use the first queue."""
+        queue = ShardedQueue(4)
+        queue.put(('event', None, {}))
+        queue.put(('schedule', None, (), {}, 'task'))
+        self.failUnless(queue.queues[0].qsize() == 2)
+        self.failUnless(queue.qsize() == 2)
+
+    def testQuit(self):
+        """Test that quit events reach every queue."""
+        queue = ShardedQueue(3)
+        queue.put(('quit', None, None))
+        self.failUnless([q.qsize() for q in queue.queues] == [1, 1, 1])
+
+
+class TestShardedEvents(SleekTest):
+
+    """
+    Test handling events with several event runner threads.
+    """
+
+    def setUp(self):
+        self.handler_threads = xmlstream.HANDLER_THREADS
+        xmlstream.HANDLER_THREADS = 4
+        self.stream_start()
+
+    def tearDown(self):
+        self.stream_close()
+        xmlstream.HANDLER_THREADS = self.handler_threads
+
+    def testSenderOrder(self):
+        """Test that events from each sender are handled in order."""
+        received = {}
+
+        def handle_message(msg):
+            time.sleep(0.01)
+            sender = msg['from'].bare
+            received.setdefault(sender, []).append(msg['body'])
+
+        self.xmpp.add_event_handler('message', handle_message)
+        for i in range(10):
+            for user in ('a', 'b', 'c'):
+                self.recv("""
+                  <message from="%s@localhost/x"><body>%s</body></message>
+                """ % (user, i))
+
+        time.sleep(0.5)
+        expected = [str(i) for i in range(10)]
+        for user in ('a', 'b', 'c'):
+            self.failUnless(received.get('%s@localhost' % user) == expected,
+                    "Events out of order: %s" % received)
+
+    def testThreadedHandler(self):
+        """Test running threaded handlers on the worker pool."""
+        done = threading.Event()
+        threads = []
+
+        def handle_message(msg):
+            threads.append(threading.current_thread().name)
+            done.set()
+
+        self.xmpp.add_event_handler('message', handle_message,
+                                    threaded=True)
+        self.recv("""<message><body>Testing</body></message>""")
+
+        self.failUnless(done.wait(2), "Threaded handler did not run.")
+        self.failUnless(threads[0].startswith('threaded_handler'),
+                "Handler did not use the pool: %s" % threads)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestWorkerPool)
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestShardedQueue))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestShardedEvents))
@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+import subprocess
+
+from glob import glob
+from os.path import splitext, basename, dirname, abspath, join as pjoin
+
+try:
+    import lxml
+except ImportError:
+    lxml = None
+
+
+class TestXMLBackends(unittest.TestCase):
+
+    """
+    Test that stanzas behave the same with each XML backend by running
+    the stanza and serialization tests using each backend.
+    """
+
+    root = dirname(dirname(abspath(__file__)))
+
+    def run_tests(self, backend):
+        modules = ['tests.test_tostring']
+        for t in sorted(glob(pjoin(self.root, 'tests', 'test_stanza_*.py'))):
+            modules.append('tests.%s' % splitext(basename(t))[0])
+
+        env = dict(os.environ)
+        env['SLEEKXMPP_XML_BACKEND'] = backend
+        proc = subprocess.Popen([sys.executable, '-m', 'unittest'] + modules,
+                                cwd=self.root, env=env,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT)
+        output = proc.communicate()[0].decode('utf-8', 'replace')
+        self.failUnless(proc.returncode == 0,
+                "Stanza tests failed using %s:\n%s" % (backend, output))
+
+    def testDefaultBackend(self):
+        """Test that xml.etree is used unless lxml is requested."""
+        env = dict(os.environ)
+        env.pop('SLEEKXMPP_XML_BACKEND', None)
+        proc = subprocess.Popen([sys.executable, '-c',
+                                 'from sleekxmpp.xmlstream.xmlbackend '
+                                 'import BACKEND; print(BACKEND)'],
+                                cwd=self.root, env=env,
+                                stdout=subprocess.PIPE)
+        output = proc.communicate()[0].decode('utf-8').strip()
+        self.failUnless(output == 'etree',
+                "Unexpected default XML backend: %s" % output)
+
+    def testElementTree(self):
+        """Test stanzas using xml.etree."""
+        self.run_tests('etree')
+
+    @unittest.skipIf(lxml is None, 'lxml is not installed')
+    def testLxml(self):
+        """Test stanzas using lxml."""
+        self.run_tests('lxml')
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestXMLBackends)